@@ -34,6 +34,14 @@ target_metadata = Base.metadata
 config.set_main_option("sqlalchemy.url", str(settings.db.url))
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    # партиции transactions, теневая и старая таблицы (app/db/partitions.py)
+    # есть только в базе — autogenerate не должен предлагать их удалить
+    if type_ == "table" and reflected and compare_to is None:
+        return not name.startswith("transactions_")
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -50,6 +58,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -59,7 +68,11 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
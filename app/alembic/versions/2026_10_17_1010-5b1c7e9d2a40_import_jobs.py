@@ -0,0 +1,83 @@
+"""import jobs
+
+Revision ID: 5b1c7e9d2a40
+Revises: ac2a6b0459b6
+Create Date: 2026-10-17 10:10:12.402118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1c7e9d2a40"
+down_revision: Union[str, Sequence[str], None] = "ac2a6b0459b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "import_jobs",
+        sa.Column("account_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "format", sa.Enum("csv", "ofx", name="import_format"), nullable=False
+        ),
+        sa.Column("filename", sa.String(length=255), nullable=True),
+        sa.Column(
+            "status",
+            sa.Enum("pending", "running", "done", "failed", name="import_status"),
+            nullable=False,
+        ),
+        sa.Column("rows_parsed", sa.Integer(), nullable=False),
+        sa.Column("rows_imported", sa.Integer(), nullable=False),
+        sa.Column("error", sa.String(length=500), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["account_id"],
+            ["accounts.id"],
+            name=op.f("fk__import_jobs__account_id__accounts"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f("fk__import_jobs__user_id__users"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk__import_jobs")),
+    )
+    op.create_index(
+        op.f("ix__import_jobs__import_jobs_user_id"),
+        "import_jobs",
+        ["user_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix__import_jobs__import_jobs_user_id"), table_name="import_jobs"
+    )
+    op.drop_table("import_jobs")
+    sa.Enum(name="import_status").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="import_format").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,92 @@
+"""transactions composite indexes
+
+Revision ID: 8d41f0c3b7e5
+Revises: 5b1c7e9d2a40
+Create Date: 2026-10-17 11:20:41.118402
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d41f0c3b7e5"
+down_revision: Union[str, Sequence[str], None] = "5b1c7e9d2a40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# CONCURRENTLY нельзя внутри транзакции, поэтому всё — в autocommit_block;
+# if_not_exists — чтобы миграцию можно было перезапустить после обрыва
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix__transactions__user_id_created_at_id",
+            "transactions",
+            ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix__transactions__user_id_occurred_at_id",
+            "transactions",
+            ["user_id", sa.text("occurred_at DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix__transactions__user_id_account_id_created_at_id",
+            "transactions",
+            [
+                "user_id",
+                "account_id",
+                sa.text("created_at DESC"),
+                sa.text("id DESC"),
+            ],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix__transactions__user_id_occurred_at_outgoing",
+            "transactions",
+            ["user_id", "occurred_at"],
+            postgresql_include=["category_id", "account_id", "amount"],
+            postgresql_where=sa.text("direction = 'outgoing'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            op.f("ix__transactions__transactions_user_id"),
+            table_name="transactions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix__transactions__transactions_user_id"),
+            "transactions",
+            ["user_id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for name in (
+            "ix__transactions__user_id_occurred_at_outgoing",
+            "ix__transactions__user_id_account_id_created_at_id",
+            "ix__transactions__user_id_occurred_at_id",
+            "ix__transactions__user_id_created_at_id",
+        ):
+            op.drop_index(
+                name,
+                table_name="transactions",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
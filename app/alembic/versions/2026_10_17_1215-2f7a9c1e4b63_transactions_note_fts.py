@@ -0,0 +1,45 @@
+"""transactions note fts
+
+Revision ID: 2f7a9c1e4b63
+Revises: 8d41f0c3b7e5
+Create Date: 2026-10-17 12:15:06.530219
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2f7a9c1e4b63"
+down_revision: Union[str, Sequence[str], None] = "8d41f0c3b7e5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# индекс по выражению, а не generated-колонка: не нужен rewrite таблицы,
+# и его можно строить CONCURRENTLY
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix__transactions__note_fts",
+            "transactions",
+            [sa.text("to_tsvector('simple'::regconfig, coalesce(note, ''))")],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix__transactions__note_fts",
+            table_name="transactions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
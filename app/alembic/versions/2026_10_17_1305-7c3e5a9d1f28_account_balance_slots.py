@@ -0,0 +1,64 @@
+"""account balance slots
+
+Revision ID: 7c3e5a9d1f28
+Revises: 2f7a9c1e4b63
+Create Date: 2026-10-17 13:05:44.208133
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c3e5a9d1f28"
+down_revision: Union[str, Sequence[str], None] = "2f7a9c1e4b63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "account_balance_slots",
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("slot", sa.SmallInteger(), nullable=False),
+        sa.Column("delta", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column("dirty", sa.Boolean(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["account_id"],
+            ["accounts.id"],
+            name=op.f("fk__account_balance_slots__account_id__accounts"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk__account_balance_slots")),
+        sa.UniqueConstraint(
+            "account_id", "slot", name=op.f("uq__account_balance_slots__account_id_slot")
+        ),
+    )
+    op.create_index(
+        "ix__account_balance_slots__account_id_dirty",
+        "account_balance_slots",
+        ["account_id"],
+        unique=False,
+        postgresql_where=sa.text("dirty"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix__account_balance_slots__account_id_dirty",
+        table_name="account_balance_slots",
+        postgresql_where=sa.text("dirty"),
+    )
+    op.drop_table("account_balance_slots")
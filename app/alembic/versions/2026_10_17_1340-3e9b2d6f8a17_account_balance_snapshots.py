@@ -0,0 +1,65 @@
+"""account balance snapshots
+
+Revision ID: 3e9b2d6f8a17
+Revises: 7c3e5a9d1f28
+Create Date: 2026-10-17 13:40:12.517304
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3e9b2d6f8a17"
+down_revision: Union[str, Sequence[str], None] = "7c3e5a9d1f28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "account_balance_snapshots",
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("slot", sa.SmallInteger(), nullable=False),
+        sa.Column("delta", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["account_id"],
+            ["accounts.id"],
+            name=op.f("fk__account_balance_snapshots__account_id__accounts"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk__account_balance_snapshots")),
+        sa.UniqueConstraint(
+            "account_id",
+            "day",
+            "slot",
+            name=op.f("uq__account_balance_snapshots__account_id_day_slot"),
+        ),
+    )
+    # обороты по уже существующим транзакциям
+    op.execute(
+        """
+        INSERT INTO account_balance_snapshots (account_id, day, slot, delta)
+        SELECT account_id, (occurred_at AT TIME ZONE 'UTC')::date, 0,
+               sum(CASE WHEN direction = 'incoming' THEN amount ELSE -amount END)
+        FROM transactions
+        GROUP BY 1, 2
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("account_balance_snapshots")
@@ -0,0 +1,151 @@
+"""category month rollups
+
+Revision ID: 9a4f6c2e1d83
+Revises: 3e9b2d6f8a17
+Create Date: 2026-10-17 14:20:31.904615
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9a4f6c2e1d83"
+down_revision: Union[str, Sequence[str], None] = "3e9b2d6f8a17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "category_month_rollups",
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=True),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column(
+            "direction",
+            postgresql.ENUM(
+                "incoming", "outgoing", name="direction", create_type=False
+            ),
+            nullable=False,
+        ),
+        sa.Column("slot", sa.SmallInteger(), nullable=False),
+        sa.Column("total", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["account_id"],
+            ["accounts.id"],
+            name=op.f("fk__category_month_rollups__account_id__accounts"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["category_id"],
+            ["categories.id"],
+            name=op.f("fk__category_month_rollups__category_id__categories"),
+            ondelete="SET NULL",
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f("fk__category_month_rollups__user_id__users"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk__category_month_rollups")),
+        sa.UniqueConstraint(
+            "user_id",
+            "month",
+            "direction",
+            "account_id",
+            "category_id",
+            "slot",
+            name="uq__category_month_rollups__key",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+    # обороты по уже существующим транзакциям
+    op.execute(
+        """
+        INSERT INTO category_month_rollups
+            (user_id, account_id, category_id, month, direction, slot, total, count)
+        SELECT user_id, account_id, category_id,
+               date_trunc('month', occurred_at AT TIME ZONE 'UTC')::date,
+               direction, 0, sum(amount), count(*)
+        FROM transactions
+        GROUP BY 1, 2, 3, 4, 5
+        """
+    )
+    # удаление категории: transactions.category_id -> NULL, значит и обороты
+    # переезжают в строку без категории. Простой SET NULL упёрся бы в ключ
+    # (NULLS NOT DISTINCT), поэтому строки сливаются до удаления категории;
+    # при удалении пользователя строки уходят каскадом, сливать нечего
+    op.execute(
+        """
+        CREATE FUNCTION category_month_rollups_uncategorize() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM users WHERE id = OLD.user_id) THEN
+                RETURN OLD;
+            END IF;
+            INSERT INTO category_month_rollups
+                (user_id, account_id, category_id, month, direction, slot,
+                 total, count)
+            SELECT user_id, account_id, NULL, month, direction, slot,
+                   total, count
+            FROM category_month_rollups
+            WHERE category_id = OLD.id
+            ON CONFLICT (user_id, month, direction, account_id, category_id, slot)
+            DO UPDATE SET
+                total = category_month_rollups.total + EXCLUDED.total,
+                count = category_month_rollups.count + EXCLUDED.count;
+            DELETE FROM category_month_rollups WHERE category_id = OLD.id;
+            RETURN OLD;
+        END $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER category_month_rollups_uncategorize
+        BEFORE DELETE ON categories
+        FOR EACH ROW EXECUTE FUNCTION category_month_rollups_uncategorize()
+        """
+    )
+    # индекс служил только агрегату факта бюджетов по transactions
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix__transactions__user_id_occurred_at_outgoing",
+            table_name="transactions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix__transactions__user_id_occurred_at_outgoing",
+            "transactions",
+            ["user_id", "occurred_at"],
+            postgresql_include=["category_id", "account_id", "amount"],
+            postgresql_where=sa.text("direction = 'outgoing'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+    op.execute(
+        "DROP TRIGGER IF EXISTS category_month_rollups_uncategorize ON categories"
+    )
+    op.execute("DROP FUNCTION IF EXISTS category_month_rollups_uncategorize()")
+    op.drop_table("category_month_rollups")
@@ -0,0 +1,44 @@
+"""budgets unique (user_id, month, category_id)
+
+Revision ID: dd8d7303c8e8
+Revises: 9a4f6c2e1d83
+Create Date: 2026-10-17 14:55:12.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "dd8d7303c8e8"
+down_revision: Union[str, Sequence[str], None] = "9a4f6c2e1d83"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # на ключ опирается ON CONFLICT в PUT /budgets/{month}; из дублей
+    # оставляем последний созданный
+    op.execute(
+        """
+        DELETE FROM budgets b
+        USING budgets newer
+        WHERE newer.user_id = b.user_id
+          AND newer.month = b.month
+          AND newer.category_id = b.category_id
+          AND newer.id > b.id
+        """
+    )
+    op.create_unique_constraint(
+        "uq__budget__user_month_category",
+        "budgets",
+        ["user_id", "month", "category_id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("uq__budget__user_month_category", "budgets", type_="unique")
@@ -0,0 +1,170 @@
+"""transactions partitioned shadow table
+
+Revision ID: 4c8e2a6f9b13
+Revises: dd8d7303c8e8
+Create Date: 2026-10-17 15:30:27.604118
+
+"""
+
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4c8e2a6f9b13"
+down_revision: Union[str, Sequence[str], None] = "dd8d7303c8e8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    "id",
+    "user_id",
+    "account_id",
+    "category_id",
+    "direction",
+    "amount",
+    "note",
+    "occurred_at",
+    "created_at",
+)
+# месяцев вперёд от текущего; дальше — app.db.partitions.maintain
+PREMAKE_MONTHS = 3
+
+
+def _month(first: date, n: int) -> date:
+    y, m = divmod(first.year * 12 + first.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+# Первый шаг перехода на помесячные партиции без долгих блокировок:
+# рядом с transactions создаётся партиционированная transactions_p, и
+# триггер повторяет в ней каждую запись. Старые строки переносит пачками
+# `python -m app.cli partitions-backfill`, переключение — следующая
+# ревизия (9e5b7d3c1a64). Индексы — с префиксом transactions_p, при
+# переключении они получат имена нынешних.
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "transactions_p",
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=True),
+        sa.Column("amount", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column(
+            "direction",
+            postgresql.ENUM(name="direction", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("note", sa.String(length=500), nullable=True),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        # та же последовательность: id остаются сквозными и уникальными
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('transactions_id_seq'::regclass)"),
+            nullable=False,
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["account_id"],
+            ["accounts.id"],
+            name="fk__transactions__account_id__accounts",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["category_id"],
+            ["categories.id"],
+            name="fk__transactions__category_id__categories",
+            ondelete="SET NULL",
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name="fk__transactions__user_id__users",
+            ondelete="CASCADE",
+        ),
+        # ключ партиционирования обязан входить в первичный ключ
+        sa.PrimaryKeyConstraint("id", "occurred_at", name="pk__transactions_p"),
+        postgresql_partition_by="RANGE (occurred_at)",
+    )
+    op.create_index(
+        "ix__transactions_p__transactions_account_id",
+        "transactions_p",
+        ["account_id"],
+    )
+    op.create_index(
+        "ix__transactions_p__user_id_created_at_id",
+        "transactions_p",
+        ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix__transactions_p__user_id_occurred_at_id",
+        "transactions_p",
+        ["user_id", sa.text("occurred_at DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix__transactions_p__user_id_account_id_created_at_id",
+        "transactions_p",
+        ["user_id", "account_id", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix__transactions_p__note_fts",
+        "transactions_p",
+        [sa.text("to_tsvector('simple'::regconfig, coalesce(note, ''))")],
+        postgresql_using="gin",
+    )
+
+    # таблица новая и пустая — PARTITION OF здесь никого не блокирует
+    op.execute("CREATE TABLE transactions_default PARTITION OF transactions_p DEFAULT")
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    for n in range(PREMAKE_MONTHS + 1):
+        lo, hi = _month(current, n), _month(current, n + 1)
+        op.execute(
+            f"CREATE TABLE transactions_{lo:%Y_%m} PARTITION OF transactions_p"
+            f" FOR VALUES FROM ('{lo} 00:00:00+00') TO ('{hi} 00:00:00+00')"
+        )
+
+    # UPDATE — удалить старую версию и вставить новую: occurred_at могла
+    # смениться, и строка переехала бы в другую партицию
+    new = ", ".join(f"NEW.{c}" for c in COLUMNS)
+    op.execute(
+        f"""
+        CREATE FUNCTION transactions_mirror() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM transactions_p
+                WHERE id = OLD.id AND occurred_at = OLD.occurred_at;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO transactions_p ({", ".join(COLUMNS)}) VALUES ({new});
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER transactions_mirror
+        AFTER INSERT OR UPDATE OR DELETE ON transactions
+        FOR EACH ROW EXECUTE FUNCTION transactions_mirror()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS transactions_mirror ON transactions")
+    op.execute("DROP FUNCTION IF EXISTS transactions_mirror()")
+    # партиции уходят вместе с родителем; отключенные (DETACH) остаются
+    op.drop_table("transactions_p")
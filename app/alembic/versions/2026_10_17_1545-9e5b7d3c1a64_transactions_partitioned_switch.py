@@ -0,0 +1,139 @@
+"""transactions switch to the partitioned table
+
+Revision ID: 9e5b7d3c1a64
+Revises: 4c8e2a6f9b13
+Create Date: 2026-10-17 15:45:51.280377
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9e5b7d3c1a64"
+down_revision: Union[str, Sequence[str], None] = "4c8e2a6f9b13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    "id",
+    "user_id",
+    "account_id",
+    "category_id",
+    "direction",
+    "amount",
+    "note",
+    "occurred_at",
+    "created_at",
+)
+INDEXES = (
+    "pk__transactions",
+    "ix__transactions__transactions_account_id",
+    "ix__transactions__user_id_created_at_id",
+    "ix__transactions__user_id_occurred_at_id",
+    "ix__transactions__user_id_account_id_created_at_id",
+    "ix__transactions__note_fts",
+)
+# переименования под ACCESS EXCLUSIVE — мгновенные, ждать дольше нельзя:
+# за нами в очередь встают все запросы к transactions
+LOCK_TIMEOUT = "10s"
+
+
+def _index(name: str, table: str) -> str:
+    """pk__transactions -> pk__<table>, ix__transactions__x -> ix__<table>__x."""
+    prefix, rest = name.split("__transactions", 1)
+    return f"{prefix}__{table}{rest}"
+
+
+def _swap(old: str, new: str) -> None:
+    """transactions -> old, new -> transactions, вместе с именами индексов."""
+    op.rename_table("transactions", old)
+    for name in INDEXES:
+        op.execute(f"ALTER INDEX {name} RENAME TO {_index(name, old)}")
+    op.rename_table(new, "transactions")
+    for name in INDEXES:
+        op.execute(f"ALTER INDEX {_index(name, new)} RENAME TO {name}")
+
+
+# Переключение на партиционированную таблицу (после 4c8e2a6f9b13 и
+# `python -m app.cli partitions-backfill`): сверка, что все строки
+# перенесены, идёт до блокировки; под блокировкой — только
+# переименования. Старая таблица остаётся как transactions_legacy, её
+# удаляют вручную, убедившись, что всё в порядке.
+def upgrade() -> None:
+    """Upgrade schema."""
+    missing = op.get_bind().scalar(
+        sa.text(
+            """
+            SELECT count(*)
+            FROM transactions t
+            WHERE NOT EXISTS (
+                SELECT 1 FROM transactions_p p
+                WHERE p.id = t.id AND p.occurred_at = t.occurred_at
+            )
+            """
+        )
+    )
+    if missing:
+        raise RuntimeError(
+            f"{missing} rows of transactions are not in transactions_p yet;"
+            " run `python -m app.cli partitions-backfill` first"
+        )
+    op.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+    op.execute("LOCK TABLE transactions, transactions_p IN ACCESS EXCLUSIVE MODE")
+    op.execute("DROP TRIGGER transactions_mirror ON transactions")
+    op.execute("DROP FUNCTION transactions_mirror()")
+    _swap("transactions_legacy", "transactions_p")
+    # последовательность — новой таблице: DROP TABLE transactions_legacy
+    # иначе удалил бы её вместе с default у id
+    op.execute("ALTER TABLE transactions_legacy ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id")
+
+
+# Обратно — с полной копией под блокировкой: запись в transactions стоит,
+# пока строки переписываются в старую таблицу.
+def downgrade() -> None:
+    """Downgrade schema."""
+    columns = ", ".join(COLUMNS)
+    op.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+    op.execute("LOCK TABLE transactions, transactions_legacy IN ACCESS EXCLUSIVE MODE")
+    op.execute("TRUNCATE transactions_legacy")
+    op.execute(
+        f"INSERT INTO transactions_legacy ({columns})"
+        f" SELECT {columns} FROM transactions"
+    )
+    op.execute(
+        "ALTER TABLE transactions_legacy"
+        " ALTER COLUMN id SET DEFAULT nextval('transactions_id_seq'::regclass)"
+    )
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY transactions_legacy.id")
+    _swap("transactions_p", "transactions_legacy")
+    # как после 4c8e2a6f9b13: теневая таблица снова повторяет записи
+    new = ", ".join(f"NEW.{c}" for c in COLUMNS)
+    op.execute(
+        f"""
+        CREATE FUNCTION transactions_mirror() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM transactions_p
+                WHERE id = OLD.id AND occurred_at = OLD.occurred_at;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO transactions_p ({columns}) VALUES ({new});
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER transactions_mirror
+        AFTER INSERT OR UPDATE OR DELETE ON transactions
+        FOR EACH ROW EXECUTE FUNCTION transactions_mirror()
+        """
+    )
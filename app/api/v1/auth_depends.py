@@ -9,7 +9,7 @@ from fastapi.security import (
 from app.core.security import decode_token
 
 
-from app.db.db_helper import get_session
+from app.db.db_helper import bind_user, db_helper, get_session
 from app.db.repositories.user_repo import UserRepository
 
 # oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
@@ -98,8 +98,21 @@ class UserGetterFromToken:
         validate_token_type(payload, self.token_type)
 
         user_id = payload.get("sub")
-        return await UserRepository(session).get_by_id(int(user_id))
+        # снимок пользователя из кэша процесса: на попадании БД не трогаем
+        user = await UserRepository(session).get_principal(int(user_id))
+        if user is None:
+            _unauthorized("token invalid (user not found)")
+        bind_user(session, user.id)
+        # для журнала медленных запросов (app.core.request_context)
+        request.state.user_id = user.id
+        return user
 
 
 get_current_user = UserGetterFromToken(ACCESS_COOKIE_NAME)
 get_user_by_refresh = UserGetterFromToken(REFRESH_COOKIE_NAME)
+
+
+async def get_read_session(user=Depends(get_current_user)) -> AsyncSession:
+    """Сессия для GET-ручек: реплика, либо primary в окне read-your-writes."""
+    async with db_helper.read_session(user.id) as s:
+        yield s
@@ -1,21 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.schemas.account import AccountCreate, AccountOut, AccountPatch
-from app.api.v1.auth_depends import get_current_user
+from app.api.v1.schemas.account import (
+    AccountCreate,
+    AccountOut,
+    AccountPatch,
+    BalanceHistoryOut,
+    BalancePoint,
+)
+from app.api.v1.auth_depends import get_current_user, get_read_session
+from app.api.v1.responses import COLUMNAR_RESPONSES, ListResponder, sparse_response
+from app.api.v1.sparse import Fields, FieldSet
 from app.db.db_helper import get_session
-from app.core.models import User
 from app.db.repositories.account_repo import AccountRepository
+from app.db.repositories.user_repo import Principal
+from app.db.types import BalanceStep
 
 router = APIRouter(prefix="/accounts", tags=["accounts"])
 
+_list = ListResponder(AccountOut)
+_fields = Fields(AccountOut)
+
+# по дням — до ~5 лет точек в одном ответе
+MAX_HISTORY_DAYS = 366 * 5
+
 
 @router.post("", response_model=AccountOut, status_code=status.HTTP_201_CREATED)
 async def create_account(
     payload: AccountCreate,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     repo = AccountRepository(session)
 
@@ -38,46 +55,94 @@ async def create_account(
     return AccountOut.model_validate(acc)
 
 
-@router.get("", response_model=list[AccountOut])
+@router.get("", response_model=list[AccountOut], responses=COLUMNAR_RESPONSES)
 async def list_accounts(
+    request: Request,
     include_archived: bool = Query(False),
     limit: int = Query(100, ge=1, le=200),
     offset: int = Query(0, ge=0),
-    session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    fields: FieldSet | None = Depends(_fields),
+    session: AsyncSession = Depends(get_read_session),
+    user: Principal = Depends(get_current_user),
 ):
     repo = AccountRepository(session)
-    accounts = await repo.list_for_user(
+    accounts = await repo.list_rows_for_user(
         user_id=user.id,
+        columns=fields,
         include_archived=include_archived,
         limit=limit,
         offset=offset,
     )
-    return [AccountOut.model_validate(a) for a in accounts]
+    return _list.narrow(fields).response(request, accounts)
 
 
 @router.get("/{account_id}", response_model=AccountOut)
 async def get_account(
     account_id: int,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
     archived: bool = False,
+    fields: FieldSet | None = Depends(_fields),
 ):
     repo = AccountRepository(session)
-    acc = await repo.get_owned(user.id, account_id, archived=archived)
+    if fields is not None:
+        acc = await repo.get_row_owned(
+            user.id, account_id, archived=archived, columns=fields
+        )
+    else:
+        acc = await repo.get_owned(user.id, account_id, archived=archived)
     if not acc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="account not found"
         )
+    if fields is not None:
+        return sparse_response(AccountOut, fields, acc)
     return AccountOut.model_validate(acc)
 
 
+@router.get("/{account_id}/balance-history", response_model=BalanceHistoryOut)
+async def balance_history(
+    account_id: int,
+    date_from: date | None = Query(None, alias="from"),
+    date_to: date | None = Query(None, alias="to"),
+    step: BalanceStep = BalanceStep.day,
+    session: AsyncSession = Depends(get_session),
+    user: Principal = Depends(get_current_user),
+):
+    if date_to is None:
+        date_to = datetime.now(timezone.utc).date()
+    if date_from is None:
+        date_from = date_to - timedelta(days=30)
+    if date_from > date_to:
+        raise HTTPException(status_code=422, detail="from must not be after to")
+    if (date_to - date_from).days > MAX_HISTORY_DAYS:
+        raise HTTPException(
+            status_code=422, detail=f"range is limited to {MAX_HISTORY_DAYS} days"
+        )
+
+    repo = AccountRepository(session)
+    res = await repo.balance_history(
+        user.id, account_id, date_from=date_from, date_to=date_to, step=step
+    )
+    if not res:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="account not found"
+        )
+    acc, points = res
+    return BalanceHistoryOut(
+        account_id=acc.id,
+        currency=acc.currency,
+        step=step,
+        items=[BalancePoint(day=d, balance=b) for d, b in points],
+    )
+
+
 @router.patch("/{account_id}", response_model=AccountOut)
 async def patch_account(
     account_id: int,
     payload: AccountPatch,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     repo = AccountRepository(session)
     acc = await repo.get_owned(user.id, account_id)
@@ -96,7 +161,7 @@ async def patch_account(
 async def archive_account(
     account_id: int,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     repo = AccountRepository(session)
     acc = await repo.get_owned(user.id, account_id)
@@ -12,8 +12,8 @@ from app.api.v1.auth_depends import (
 from app.db.db_helper import get_session
 from app.db.repositories.user_repo import UserRepository
 from app.core.security import (
-    hash_password,
-    verify_password,
+    PasswordHasherBusy,
+    password_hasher,
     create_access_token,
     create_refresh_token,
 )
@@ -42,6 +42,10 @@ def _set_cookie(
     )
 
 
+def _hasher_busy(e: PasswordHasherBusy) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
 def _clear_cookie(response: Response, name: str, path: str = "/"):
     response.delete_cookie(
         key=name,
@@ -57,10 +61,14 @@ async def register(payload: UserCreate, session: AsyncSession = Depends(get_sess
     repo = UserRepository(session)
     if await repo.get_by_email(payload.email):
         raise HTTPException(status_code=409, detail="Email already registered")
+    try:
+        password_hash = await password_hasher.hash(payload.password)
+    except PasswordHasherBusy as e:
+        raise _hasher_busy(e)
     user = await repo.create(
         email=payload.email,
         name=payload.name,
-        password_hash=hash_password(payload.password),
+        password_hash=password_hash,
     )
     await session.commit()
     return user
@@ -74,8 +82,20 @@ async def login(
 ):
     repo = UserRepository(session)
     user = await repo.get_by_email(payload.email)
-    if not user or not verify_password(payload.password, user.password_hash):
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    try:
+        ok, new_hash = await password_hasher.verify_and_update(
+            payload.password, user.password_hash
+        )
+    except PasswordHasherBusy as e:
+        raise _hasher_busy(e)
+    if not ok:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # сменилась стоимость bcrypt — пересохраняем хэш, пока пароль под рукой
+        await repo.update(user, password_hash=new_hash)
+        await session.commit()
 
     access = create_access_token(str(user.id))
     refresh = create_refresh_token(str(user.id))
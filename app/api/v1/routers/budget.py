@@ -3,14 +3,26 @@ from datetime import date
 from fastapi import APIRouter, HTTPException, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.auth_depends import get_current_user
-from app.api.v1.schemas.budget import BudgetMonthOut, BudgetPut, BudgetOut, BudgetUpdate
-from app.core.models import User
+from app.api.v1.auth_depends import get_current_user, get_read_session
+from app.api.v1.responses import sparse_response
+from app.api.v1.schemas.budget import (
+    BudgetMonthOut,
+    BudgetPut,
+    BudgetOut,
+    BudgetRangeOut,
+    BudgetUpdate,
+)
+from app.api.v1.sparse import Fields, FieldSet
 from app.db.db_helper import get_session
 from app.db.repositories.budget import BudgetRepository, BudgetUpsertItem
+from app.db.repositories.user_repo import Principal
 
 router = APIRouter(prefix="/budgets", tags=["budgets"])
 
+MAX_RANGE_MONTHS = 60
+
+_fields = Fields(BudgetOut)
+
 
 def parse_month_param(month_str: str) -> date:
     try:
@@ -28,7 +40,7 @@ async def upsert_month_budgets(
     month: str,
     items: list[BudgetPut],
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     m = parse_month_param(month)
     repo = BudgetRepository(session)
@@ -47,6 +59,7 @@ async def upsert_month_budgets(
             BudgetUpsertItem(category_id=i.category_id, amount=i.amount) for i in items
         ],
     )
+    await session.commit()
     return await repo.build_month_response(user_id=user.id, month=m)
 
 
@@ -54,8 +67,8 @@ async def upsert_month_budgets(
 async def get_month_budgets(
     month: str,
     account_id: int | None = Query(None, ge=1),
-    session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+    user: Principal = Depends(get_current_user),
 ):
     m = parse_month_param(month)
     repo = BudgetRepository(session)
@@ -64,12 +77,34 @@ async def get_month_budgets(
     )
 
 
+@router.get("", response_model=BudgetRangeOut)
+async def get_range_budgets(
+    month_from: str = Query(..., alias="from"),
+    month_to: str = Query(..., alias="to"),
+    account_id: int | None = Query(None, ge=1),
+    session: AsyncSession = Depends(get_read_session),
+    user: Principal = Depends(get_current_user),
+):
+    m_from, m_to = parse_month_param(month_from), parse_month_param(month_to)
+    if m_from > m_to:
+        raise HTTPException(status_code=422, detail="from must not be after to")
+    months = (m_to.year - m_from.year) * 12 + m_to.month - m_from.month + 1
+    if months > MAX_RANGE_MONTHS:
+        raise HTTPException(
+            status_code=422, detail=f"range is limited to {MAX_RANGE_MONTHS} months"
+        )
+    repo = BudgetRepository(session)
+    return await repo.build_range_response(
+        user_id=user.id, month_from=m_from, month_to=m_to, account_id=account_id
+    )
+
+
 # Базовые CRUD — удобно для тестов и UI
 @router.post("", response_model=BudgetOut, status_code=status.HTTP_201_CREATED)
 async def create_budget(
     body: BudgetPut,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     repo = BudgetRepository(session)
     try:
@@ -91,13 +126,21 @@ async def create_budget(
 @router.get("/{budget_id:int}/one", response_model=BudgetOut)
 async def get_budget(
     budget_id: int,
+    fields: FieldSet | None = Depends(_fields),
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     repo = BudgetRepository(session)
-    obj = await repo.get_owned(user_id=user.id, budget_id=budget_id)
+    if fields is not None:
+        obj = await repo.get_row_owned(
+            user_id=user.id, budget_id=budget_id, columns=fields
+        )
+    else:
+        obj = await repo.get_owned(user_id=user.id, budget_id=budget_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Budget not found")
+    if fields is not None:
+        return sparse_response(BudgetOut, fields, obj)
     return BudgetOut.model_validate(obj, from_attributes=True)
 
 
@@ -106,7 +149,7 @@ async def patch_budget(
     budget_id: int,
     body: BudgetUpdate,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     repo = BudgetRepository(session)
     if body.category_id is not None:
@@ -133,7 +176,7 @@ async def patch_budget(
 async def delete_budget(
     budget_id: int,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     repo = BudgetRepository(session)
     deleted = await repo.delete_owned(user_id=user.id, budget_id=budget_id)
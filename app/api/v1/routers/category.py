@@ -1,15 +1,21 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query, Path
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Path, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.auth_depends import get_current_user
+from app.api.v1.auth_depends import get_current_user, get_read_session
+from app.api.v1.responses import COLUMNAR_RESPONSES, ListResponder, sparse_response
+from app.api.v1.sparse import Fields, FieldSet
 from app.api.v1.schemas.category import CategoryOut, CategoryCreate, CategoryUpdate
-from app.core.models import Category, User
+from app.core.models import Category
 from app.db.db_helper import get_session
 from app.db.repositories.category_repo import CategoryRepository
+from app.db.repositories.user_repo import Principal
 from app.db.types import CategoryKind
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
+_list = ListResponder(CategoryOut)
+_fields = Fields(CategoryOut)
+
 
 async def _ensure_parent_valid(
     repo: CategoryRepository,
@@ -37,7 +43,7 @@ async def _ensure_parent_valid(
 async def create_category(
     payload: CategoryCreate,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     repo = CategoryRepository(session)
 
@@ -75,20 +81,24 @@ async def create_category(
 @router.get(
     "",
     response_model=list[CategoryOut],
+    responses=COLUMNAR_RESPONSES,
 )
 async def list_categories(
+    request: Request,
     kind: CategoryKind | None = Query(default=None),
     parent_id: int | None = Query(default=None),
     include_archived: bool = Query(default=False),
     search: str | None = Query(default=None, min_length=1),
     limit: int = Query(default=50, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
-    session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    fields: FieldSet | None = Depends(_fields),
+    session: AsyncSession = Depends(get_read_session),
+    user: Principal = Depends(get_current_user),
 ):
     repo = CategoryRepository(session)
-    items = await repo.list(
+    items = await repo.list_rows(
         user_id=user.id,
+        columns=fields,
         kind=kind,
         include_archived=include_archived,
         search=search,
@@ -96,7 +106,7 @@ async def list_categories(
         limit=limit,
         offset=offset,
     )
-    return [CategoryOut.model_validate(c) for c in items]
+    return _list.narrow(fields).response(request, items)
 
 
 @router.get(
@@ -105,13 +115,19 @@ async def list_categories(
 )
 async def get_category(
     category_id: int = Path(...),
+    fields: FieldSet | None = Depends(_fields),
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     repo = CategoryRepository(session)
-    cat = await repo.get_by_id(user.id, category_id)
+    if fields is not None:
+        cat = await repo.get_row(user.id, category_id, columns=fields)
+    else:
+        cat = await repo.get_by_id(user.id, category_id)
     if not cat:
         raise HTTPException(status_code=404, detail="category not found")
+    if fields is not None:
+        return sparse_response(CategoryOut, fields, cat)
     return CategoryOut.model_validate(cat)
 
 
@@ -123,7 +139,7 @@ async def update_category(
     category_id: int,
     payload: CategoryUpdate,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     repo = CategoryRepository(session)
     cat = await repo.get_by_id(user.id, category_id)
@@ -164,7 +180,7 @@ async def update_category(
 async def delete_category(
     category_id: int,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     repo = CategoryRepository(session)
     cat = await repo.get_by_id(user.id, category_id)
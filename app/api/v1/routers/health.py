@@ -0,0 +1,112 @@
+import hmac
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+
+from app.core import metrics
+from app.core.cache import CacheStats
+from app.core.config import settings
+from app.db import db_helper
+from app.db.repositories.budget import month_cache
+from app.db.repositories.user_repo import principal_cache
+
+# пробы балансировщика и оркестратора, без авторизации
+router = APIRouter(tags=["health"])
+
+
+def _internal_access(request: Request) -> None:
+    token = settings.internal.token
+    if token is None:
+        return
+    scheme, _, given = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        given.encode(), token.encode()
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+
+# служебные ручки: подключаются только с APP_CONFIG__INTERNAL__ENABLED,
+# с заданным APP_CONFIG__INTERNAL__TOKEN — только по нему
+internal_router = APIRouter(
+    tags=["internal"], dependencies=[Depends(_internal_access)]
+)
+
+
+@router.get("/health/live")
+async def live():
+    # процесс жив и event loop отвечает
+    return {"status": "ok"}
+
+
+@router.get("/health/ready")
+async def ready():
+    try:
+        await db_helper.ping(settings.health.ready_timeout_s)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"database unavailable: {type(e).__name__}",
+        )
+    return {"status": "ok"}
+
+
+def _cache(stats: CacheStats) -> dict:
+    return {**asdict(stats), "hit_rate": stats.hit_rate}
+
+
+@internal_router.get("/internal/metrics")
+async def internal_metrics():
+    return {
+        "db_pool": db_helper.pool_stats.snapshot(),
+        "replica_pools": {
+            r.name: {**r.pool_stats.snapshot(), "down": r.down}
+            for r in db_helper.replicas
+        },
+        "caches": {
+            "budget_month": _cache(month_cache.stats),
+            "principal": _cache(principal_cache.stats),
+        },
+    }
+
+
+def _collect():
+    pool = metrics.Gauge(
+        "db_pool_connections", "Pool connections by state", ("pool", "state")
+    )
+    waits = metrics.Counter(
+        "db_pool_checkout_wait_seconds_total",
+        "Time waited for a connection",
+        ("pool",),
+    )
+    timeouts = metrics.Counter(
+        "db_pool_timeouts_total", "Checkouts that hit pool_timeout", ("pool",)
+    )
+    pools = [("primary", db_helper.pool_stats)]
+    pools += [(r.name, r.pool_stats) for r in db_helper.replicas]
+    for name, stats in pools:
+        snap = stats.snapshot()
+        for state in ("checked_out", "checked_in", "overflow"):
+            pool.set((name, state), snap[state])
+        waits.inc((name,), stats.wait_total_s)
+        timeouts.inc((name,), stats.timeouts)
+
+    cache = metrics.Counter(
+        "cache_requests_total", "Cache lookups", ("cache", "result")
+    )
+    for name, c in (("budget_month", month_cache), ("principal", principal_cache)):
+        cache.inc((name, "hit"), c.stats.hits)
+        cache.inc((name, "miss"), c.stats.misses)
+    return pool, waits, timeouts, cache
+
+
+metrics.register_collector(_collect)
+
+
+@internal_router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    if not settings.metrics.enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import os
+from contextlib import suppress
+import tempfile
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    UploadFile,
+    status,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.auth_depends import get_current_user
+from app.api.v1.schemas.imports import ImportJobOut
+from app.core.config import settings
+from app.db.db_helper import bind_user, db_helper, get_session
+from app.db.repositories.import_repo import ImportJobRepository, TransactionImporter
+from app.db.repositories.transaction_repo import (
+    InsufficientFunds,
+    NotFound,
+    ValidationError,
+)
+from app.db.types import ImportFormat, ImportStatus
+from app.utils.statement_parser import StatementError, guess_format, iter_statement
+
+log = logging.getLogger("imports")
+
+router = APIRouter(prefix="/transactions/import", tags=["imports"])
+
+_COPY_BUF = 1024 * 1024
+
+
+async def _spool_upload(file: UploadFile) -> str:
+    """Копирует загрузку во временный файл кусками — фоновая задача читает уже его."""
+    limit = settings.imports.max_upload_mb * 1024 * 1024
+    fd, path = tempfile.mkstemp(prefix="wallet-import-", dir=settings.imports.tmp_dir)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(_COPY_BUF):
+                size += len(chunk)
+                if size > limit:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="file too large",
+                    )
+                out.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+async def _heartbeat(job_id: int) -> None:
+    """Отметка живого импорта: без неё fail_stale сочтёт задачу брошенной."""
+    while True:
+        await asyncio.sleep(settings.imports.heartbeat_s)
+        try:
+            async with db_helper.session_factory() as session:
+                await ImportJobRepository(session).set_state(job_id)
+                await session.commit()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception("import job %s heartbeat failed", job_id)
+
+
+async def run_import_job(
+    job_id: int,
+    user_id: int,
+    path: str,
+    fmt: ImportFormat,
+    account_id: int | None,
+) -> None:
+    heartbeat = asyncio.create_task(_heartbeat(job_id))
+    try:
+        # прогресс пишем отдельной сессией: основная транзакция импорта
+        # коммитится только в самом конце
+        async with (
+            db_helper.session_factory() as progress,
+            db_helper.session_factory() as session,
+        ):
+            bind_user(session, user_id)
+            jobs = ImportJobRepository(progress)
+            await jobs.set_state(job_id, status=ImportStatus.running)
+            await progress.commit()
+
+            async def on_progress(rows: int) -> None:
+                await jobs.set_state(job_id, rows_parsed=rows)
+                await progress.commit()
+
+            try:
+                with open(
+                    path, encoding="utf-8-sig", errors="replace", newline=""
+                ) as f:
+                    importer = TransactionImporter(
+                        session, user_id, chunk_size=settings.imports.chunk_size
+                    )
+                    imported = await importer.run(
+                        iter_statement(f, fmt, default_account_id=account_id),
+                        on_progress,
+                    )
+                await session.commit()
+            except (StatementError, ValidationError) as e:
+                error = str(e)
+            except NotFound as e:
+                error = f"{e.args[0]} not found"
+            except InsufficientFunds:
+                error = "not enough balance for this import"
+            except Exception:
+                log.exception("import job %s failed", job_id)
+                error = "internal error"
+            else:
+                await jobs.set_state(
+                    job_id, status=ImportStatus.done, rows_imported=imported
+                )
+                await progress.commit()
+                return
+
+            await session.rollback()
+            await jobs.set_state(job_id, status=ImportStatus.failed, error=error)
+            await progress.commit()
+    finally:
+        heartbeat.cancel()
+        with suppress(asyncio.CancelledError):
+            await heartbeat
+        os.unlink(path)
+
+
+@router.post("", response_model=ImportJobOut, status_code=status.HTTP_202_ACCEPTED)
+async def start_import(
+    background: BackgroundTasks,
+    file: UploadFile = File(...),
+    account_id: int | None = Form(None, ge=1),
+    format: ImportFormat | None = Form(None),
+    session: AsyncSession = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    fmt = format or guess_format(file.filename)
+    if fmt == ImportFormat.ofx and account_id is None:
+        raise HTTPException(status_code=422, detail="account_id is required for OFX")
+
+    path = await _spool_upload(file)
+    try:
+        job = await ImportJobRepository(session).create(
+            user_id=user.id,
+            account_id=account_id,
+            format_=fmt,
+            filename=file.filename,
+        )
+        await session.commit()
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    background.add_task(run_import_job, job.id, user.id, path, fmt, account_id)
+    return job
+
+
+@router.get("/{job_id}", response_model=ImportJobOut)
+async def get_import(
+    job_id: int,
+    session: AsyncSession = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    jobs = ImportJobRepository(session)
+    if await jobs.fail_stale(user.id, settings.imports.stale_after_s):
+        await session.commit()
+    job = await jobs.get_owned(user.id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="import job not found")
+    return job
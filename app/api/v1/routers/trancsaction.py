@@ -1,28 +1,50 @@
+from contextlib import aclosing
 from datetime import datetime
 from decimal import Decimal
 
-from fastapi import APIRouter, status, Depends, HTTPException, Query
+from fastapi import APIRouter, status, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.auth_depends import get_current_user
+from app.api.v1.auth_depends import get_current_user, get_read_session
+from app.api.v1.responses import COLUMNAR_RESPONSES, ListResponder, sparse_response
+from app.api.v1.sparse import Fields, FieldSet
 from app.api.v1.schemas.transaction import (
     TransactionOut,
     TransactionCreate,
+    TransactionBatchCreate,
     TransactionsPage,
+    TransactionSearchHit,
     TransactionUpdate,
 )
-from app.db.db_helper import get_session
+from app.core.config import settings
+from app.db.db_helper import db_helper, get_session
 from app.db.repositories.transaction_repo import (
     TransactionRepository,
     NotFound,
     ValidationError,
     InsufficientFunds,
     Conflict,
+    TransactionCreateItem,
+)
+from app.db.types import Direction, TransactionSort
+from app.utils.columnar import negotiate
+from app.utils.export import (
+    FILE_EXTENSIONS,
+    MEDIA_TYPES,
+    ExportFormat,
+    encode_stream,
+    gzip_stream,
 )
-from app.db.types import Direction
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
+_page = ListResponder(TransactionOut, page=TransactionsPage)
+_fields = Fields(TransactionOut)
+_EXPORT_BY_MEDIA_TYPE = {
+    media_type: fmt for fmt, media_type in MEDIA_TYPES.items()
+}
+
 
 @router.post("", response_model=TransactionOut, status_code=status.HTTP_201_CREATED)
 async def create_transaction(
@@ -32,7 +54,7 @@ async def create_transaction(
 ):
     repo = TransactionRepository(session, enforce_non_negative=True)
     try:
-        tx = await repo.create(
+        tx = await repo.create_fast(
             user.id,
             account_id=payload.account_id,
             category_id=payload.category_id,
@@ -57,10 +79,44 @@ async def create_transaction(
         )
 
 
-@router.get("", response_model=TransactionsPage)
+@router.post(
+    "/batch",
+    response_model=list[TransactionOut],
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_transactions_batch(
+    payload: TransactionBatchCreate,
+    session: AsyncSession = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    repo = TransactionRepository(session, enforce_non_negative=True)
+    try:
+        txs = await repo.create_many(
+            user.id,
+            [TransactionCreateItem(**item.model_dump()) for item in payload],
+        )
+        await session.commit()
+        return txs
+    except NotFound as e:
+        raise HTTPException(status_code=404, detail=f"{e.args[0]} not found")
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except InsufficientFunds:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "code": "INSUFFICIENT_FUNDS",
+                "message": "not enough balance for this batch",
+            },
+        )
+
+
+@router.get("", response_model=TransactionsPage, responses=COLUMNAR_RESPONSES)
 async def list_transactions(
+    request: Request,
     limit: int = Query(50, ge=1, le=100),
     cursor: str | None = Query(None),
+    sort: TransactionSort = TransactionSort.created_at,
     account_id: int | None = None,
     category_id: int | None = None,
     direction: Direction | None = None,
@@ -69,14 +125,85 @@ async def list_transactions(
     min_amount: Decimal | None = None,
     max_amount: Decimal | None = None,
     search: str | None = None,
+    fields: FieldSet | None = Depends(_fields),
+    session: AsyncSession = Depends(get_read_session),
+    user=Depends(get_current_user),
+):
+    repo = TransactionRepository(session)
+    try:
+        items, next_cursor = await repo.list_rows(
+            user.id,
+            columns=fields,
+            limit=limit,
+            cursor=cursor,
+            sort=sort,
+            account_id=account_id,
+            category_id=category_id,
+            direction=direction,
+            date_from=date_from,
+            date_to=date_to,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            search=search,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return _page.narrow(fields).response(request, items, next_cursor)
+
+
+@router.get("/search", response_model=list[TransactionSearchHit])
+async def search_transactions(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=50),
+    highlight: bool = False,
     session: AsyncSession = Depends(get_session),
     user=Depends(get_current_user),
 ):
     repo = TransactionRepository(session)
-    items, next_cursor = await repo.list(
+    hits = await repo.search(
         user.id,
+        q,
         limit=limit,
-        cursor=cursor,
+        rank_window=settings.search.rank_window,
+        highlight=(
+            (settings.search.highlight_start, settings.search.highlight_stop)
+            if highlight
+            else None
+        ),
+    )
+    return [
+        TransactionSearchHit(
+            **TransactionOut.model_validate(tx).model_dump(),
+            rank=rank,
+            highlight=headline,
+        )
+        for tx, rank, headline in hits
+    ]
+
+
+@router.get("/export")
+async def export_transactions(
+    request: Request,
+    # без format — по Accept: колоночные типы или NDJSON
+    format: ExportFormat | None = None,
+    gzip: bool = False,
+    sort: TransactionSort = TransactionSort.created_at,
+    account_id: int | None = None,
+    category_id: int | None = None,
+    direction: Direction | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    min_amount: Decimal | None = None,
+    max_amount: Decimal | None = None,
+    search: str | None = None,
+    user=Depends(get_current_user),
+):
+    if format is None:
+        format = _EXPORT_BY_MEDIA_TYPE.get(
+            negotiate(request.headers.get("accept")), ExportFormat.ndjson
+        )
+    user_id = user.id
+    filters = dict(
         account_id=account_id,
         category_id=category_id,
         direction=direction,
@@ -86,17 +213,48 @@ async def list_transactions(
         max_amount=max_amount,
         search=search,
     )
-    return TransactionsPage(items=items, next_cursor=next_cursor)
+
+    async def batches():
+        # сессия зависимости закрывается до начала стрима — берём свою;
+        # обрыв клиента StreamingResponse отменяет сам, aclosing закрывает
+        # курсор сразу, а не при сборке мусора
+        async with db_helper.session_factory() as session:
+            repo = TransactionRepository(session)
+            stream = repo.stream(
+                user_id,
+                batch_size=settings.export.batch_size,
+                sort=sort,
+                **filters,
+            )
+            async with aclosing(stream):
+                async for batch in stream:
+                    yield batch
+
+    body = encode_stream(batches(), format)
+    headers = {
+        "Content-Disposition": (
+            f'attachment; filename="transactions.{FILE_EXTENSIONS[format]}"'
+        ),
+        "Vary": "Accept",
+    }
+    if gzip:
+        body = gzip_stream(body, settings.export.gzip_level)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format], headers=headers)
 
 
 @router.get("/{tx_id}", response_model=TransactionOut)
 async def get_transaction(
     tx_id: int,
+    fields: FieldSet | None = Depends(_fields),
     session: AsyncSession = Depends(get_session),
     user=Depends(get_current_user),
 ):
     repo = TransactionRepository(session)
     try:
+        if fields is not None:
+            row = await repo.get_row(user.id, tx_id, columns=fields)
+            return sparse_response(TransactionOut, fields, row)
         tx = await repo.get(user.id, tx_id)
         return tx
     except NotFound:
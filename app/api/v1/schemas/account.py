@@ -1,9 +1,9 @@
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 
-from app.db.types import AccountType
+from app.db.types import AccountType, BalanceStep
 
 
 class AccountCreate(BaseModel):
@@ -26,8 +26,24 @@ class AccountOut(BaseModel):
     currency: str
     type: AccountType
     archived: bool
-    balance: Decimal
+    # в ledger-режиме Account.balance — только свёрнутая часть
+    balance: Decimal = Field(
+        validation_alias=AliasChoices("current_balance", "balance")
+    )
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class BalancePoint(BaseModel):
+    # баланс на конец дня day
+    day: date
+    balance: Decimal
+
+
+class BalanceHistoryOut(BaseModel):
+    account_id: int
+    currency: str
+    step: BalanceStep
+    items: list[BalancePoint]
@@ -64,3 +64,21 @@ class BudgetMonthOut(BaseModel):
     month: date
     items: list[BudgetFactItem]
     totals: dict[str, Decimal]
+
+
+class BudgetRangeItem(BudgetFactItem):
+    # факт того же месяца годом раньше и разница с ним
+    actual_prev_year: Decimal = Field(..., max_digits=14, decimal_places=2)
+    yoy_delta: Decimal = Field(..., max_digits=14, decimal_places=2)
+
+
+class BudgetRangeMonth(BaseModel):
+    month: date
+    items: list[BudgetRangeItem]
+    totals: dict[str, Decimal]
+
+
+class BudgetRangeOut(BaseModel):
+    month_from: date
+    month_to: date
+    months: list[BudgetRangeMonth]
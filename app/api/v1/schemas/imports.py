@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from app.db.types import ImportFormat, ImportStatus
+
+
+class ImportJobOut(BaseModel):
+    id: int
+    status: ImportStatus
+    format: ImportFormat
+    filename: str | None
+    account_id: int | None
+    rows_parsed: int
+    rows_imported: int
+    error: str | None
+    created_at: datetime
+    finished_at: datetime | None
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
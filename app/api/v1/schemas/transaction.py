@@ -1,5 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
+from typing import Annotated
 
 from pydantic import BaseModel, Field, condecimal
 
@@ -7,6 +8,7 @@ from app.db.types import Direction
 
 
 Money = condecimal(gt=0, max_digits=14, decimal_places=2)
+TRANSACTIONS_BATCH_MAX = 500
 
 
 class TransactionBase(BaseModel):
@@ -22,6 +24,11 @@ class TransactionCreate(TransactionBase):
     pass
 
 
+TransactionBatchCreate = Annotated[
+    list[TransactionCreate], Field(min_length=1, max_length=TRANSACTIONS_BATCH_MAX)
+]
+
+
 class TransactionUpdate(BaseModel):
     account_id: int | None = None
     category_id: int | None = None
@@ -49,3 +56,8 @@ class TransactionOut(BaseModel):
 class TransactionsPage(BaseModel):
     items: list[TransactionOut]
     next_cursor: str | None = None
+
+
+class TransactionSearchHit(TransactionOut):
+    rank: float
+    highlight: str | None = None
@@ -0,0 +1,67 @@
+"""
+Разреженные наборы полей: ?fields=id,amount,occurred_at. Имена — ключи
+ответа (алиас, если он есть: у BudgetOut это id), проверяются по
+allowlist и доходят до репозитория именами колонок — в SELECT попадают
+только они, — а ответ описывает модель из этих же полей. Модели
+собираются один раз на набор полей и кэшируются: набор приводится к
+порядку полей схемы, так что "amount,id" и "id,amount" — одна модель.
+"""
+
+from functools import lru_cache
+from typing import Iterable
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel, create_model
+
+FieldSet = tuple[str, ...]
+
+
+def _public_names(model: type[BaseModel]) -> dict[str, str]:
+    """Ключ в JSON -> имя поля модели."""
+    return {f.alias or name: name for name, f in model.model_fields.items()}
+
+
+class Fields:
+    """Зависимость: разобранный ?fields= или None, если параметра нет."""
+
+    def __init__(self, model: type[BaseModel], allowed: Iterable[str] | None = None):
+        public = _public_names(model)
+        allowed = set(public if allowed is None else allowed)
+        self.allowed = [key for key in public if key in allowed]
+
+    def __call__(
+        self,
+        fields: str | None = Query(
+            None, description="поля ответа через запятую, например id,amount"
+        ),
+    ) -> FieldSet | None:
+        if fields is None:
+            return None
+        requested = {f.strip() for f in fields.split(",") if f.strip()}
+        if not requested:
+            raise HTTPException(status_code=422, detail="fields must not be empty")
+        unknown = requested.difference(self.allowed)
+        if unknown:
+            raise HTTPException(
+                status_code=422,
+                detail=(
+                    f"unknown fields: {', '.join(sorted(unknown))}; "
+                    f"allowed: {', '.join(self.allowed)}"
+                ),
+            )
+        return tuple(key for key in self.allowed if key in requested)
+
+
+@lru_cache(maxsize=512)
+def sparse_model(model: type[BaseModel], fields: FieldSet) -> type[BaseModel]:
+    """Модель только с полями fields; алиасы и конфиг — как у model."""
+    public = _public_names(model)
+    definitions = {}
+    for key in fields:
+        field = model.model_fields[public[key]]
+        definitions[public[key]] = (field.annotation, field)
+    return create_model(
+        f"{model.__name__}[{','.join(fields)}]",
+        __config__=model.model_config,
+        **definitions,
+    )
@@ -0,0 +1,239 @@
+"""
+Служебные команды поверх той же БД, что и приложение:
+
+    python -m app.cli ledger-compact [--fold-all]
+    python -m app.cli snapshots-backfill [--account ID ...]
+    python -m app.cli rollups-check [--user ID ...] [--since YYYY-MM] [--rebuild]
+    python -m app.cli partitions-maintain [--since YYYY-MM]
+    python -m app.cli partitions-backfill [--batch N] [--from-id ID] [--pause S]
+    python -m app.cli seed --users 10000 --transactions 300 [--workers N]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import date, datetime, timezone
+
+from sqlalchemy import select
+
+from app.cli import seed as seed_data
+from app.core.config import settings
+from app.core.models import Account
+from app.core.security import hash_password
+from app.db import db_helper, partitions
+from app.db.repositories import balance_snapshots, ledger, rollups
+
+
+def month_arg(value: str) -> date:
+    """YYYY-MM -> первое число месяца."""
+    return date.fromisoformat(f"{value}-01")
+
+
+async def ledger_compact(args: argparse.Namespace) -> None:
+    cfg = settings.ledger
+    if args.fold_all:
+        # перед выключением ledger-режима: всё в Account.balance, без резерва
+        cfg = cfg.model_copy(update={"reserve_ratio": 0})
+    total = 0
+    try:
+        while True:
+            async with db_helper.session_factory() as session:
+                n = await ledger.compact(session, cfg, dirty_only=not args.fold_all)
+                await session.commit()
+            total += n
+            if n < cfg.compact_batch:
+                break
+    finally:
+        await db_helper.dispose()
+    print(f"compacted {total} accounts")
+
+
+async def snapshots_backfill(args: argparse.Namespace) -> None:
+    total = 0
+    try:
+        async with db_helper.session_factory() as session:
+            q = select(Account.id).order_by(Account.id)
+            if args.account:
+                q = q.where(Account.id.in_(args.account))
+            ids = list(await session.scalars(q))
+        # пачками: каждая пачка держит свои счета до коммита
+        for i in range(0, len(ids), args.batch):
+            async with db_helper.session_factory() as session:
+                total += await balance_snapshots.backfill(
+                    session, ids[i : i + args.batch]
+                )
+                await session.commit()
+    finally:
+        await db_helper.dispose()
+    print(f"rebuilt snapshots for {total} accounts")
+
+
+async def rollups_check(args: argparse.Namespace) -> None:
+    since = args.since
+    retain = settings.partitions.retain_months
+    if since is None and retain is not None:
+        # отключённых партиций в transactions нет — их месяцы не сверяем
+        current = datetime.now(timezone.utc).date().replace(day=1)
+        since = partitions.add_months(current, -retain)
+    try:
+        async with db_helper.session_factory() as session:
+            drift = await rollups.check(session, args.user, since)
+        for r in drift:
+            print(
+                f"user={r.user_id} account={r.account_id} category={r.category_id}"
+                f" {r.month:%Y-%m} {r.direction.value}:"
+                f" rollup {r.rollup_total}/{r.rollup_count},"
+                f" actual {r.actual_total}/{r.actual_count}"
+            )
+        users = sorted({r.user_id for r in drift})
+        print(f"{len(drift)} drifted keys, {len(users)} users")
+        if drift and args.rebuild:
+            async with db_helper.session_factory() as session:
+                rows = await rollups.rebuild(session, users, since)
+                await session.commit()
+            print(f"rebuilt {rows} rollup rows")
+    finally:
+        await db_helper.dispose()
+    if drift and not args.rebuild:
+        sys.exit(1)
+
+
+def _months(values: list[date]) -> str:
+    return ", ".join(f"{m:%Y-%m}" for m in values) or "-"
+
+
+async def partitions_maintain(args: argparse.Namespace) -> None:
+    try:
+        report = await partitions.maintain(
+            db_helper.engine, settings.partitions, since=args.since
+        )
+    finally:
+        await db_helper.dispose()
+    print(
+        f"created: {_months(report.created)} ({report.moved} rows from default);"
+        f" detached: {_months(report.detached)}"
+    )
+
+
+async def partitions_backfill(args: argparse.Namespace) -> None:
+    cfg = settings.partitions
+    if args.batch:
+        cfg = cfg.model_copy(update={"backfill_batch": args.batch})
+
+    def progress(at: int, last: int, copied: int) -> None:
+        print(f"id {at}/{last}, copied {copied}", flush=True)
+
+    try:
+        copied = await partitions.backfill(
+            db_helper.engine,
+            cfg,
+            from_id=args.from_id,
+            pause_s=args.pause,
+            progress=progress,
+        )
+    except RuntimeError as e:
+        sys.exit(str(e))
+    finally:
+        await db_helper.dispose()
+    print(f"copied {copied} rows; switch over with `alembic upgrade head`")
+
+
+async def seed(args: argparse.Namespace) -> None:
+    params = seed_data.SeedParams(
+        seed=args.seed,
+        prefix=args.prefix,
+        # один хэш на всех: bcrypt на миллион пользователей — это часы
+        password_hash=hash_password(args.password),
+        transactions=args.transactions,
+        months=args.months,
+        end=args.end,
+    )
+    await seed_data.seed(
+        params, args.users, args.workers, args.shard_size, analyze=not args.no_analyze
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ledger-compact", help="свернуть слоты балансов в accounts")
+    p.add_argument(
+        "--fold-all",
+        action="store_true",
+        help="свернуть все слоты без резерва (перед выключением ledger-режима)",
+    )
+    p.set_defaults(func=ledger_compact)
+
+    p = sub.add_parser(
+        "snapshots-backfill", help="пересчитать дневные обороты счетов из транзакций"
+    )
+    p.add_argument("--account", type=int, nargs="+", help="только эти счета")
+    p.add_argument("--batch", type=int, default=100, help="счетов на транзакцию")
+    p.set_defaults(func=snapshots_backfill)
+
+    p = sub.add_parser(
+        "rollups-check", help="сверить месячные обороты с транзакциями"
+    )
+    p.add_argument("--user", type=int, nargs="+", help="только эти пользователи")
+    p.add_argument(
+        "--since",
+        type=month_arg,
+        help="только месяцы с этого, YYYY-MM (по умолчанию — все хранимые)",
+    )
+    p.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="пересчитать обороты пользователей с расхождениями",
+    )
+    p.set_defaults(func=rollups_check)
+
+    p = sub.add_parser(
+        "partitions-maintain",
+        help="создать партиции transactions вперёд, отключить старые",
+    )
+    p.add_argument(
+        "--since", type=month_arg, help="создать и месяцы с этого, YYYY-MM"
+    )
+    p.set_defaults(func=partitions_maintain)
+
+    p = sub.add_parser(
+        "partitions-backfill",
+        help="перенести строки transactions в партиционированную таблицу",
+    )
+    p.add_argument("--batch", type=int, help="строк на транзакцию")
+    p.add_argument("--from-id", type=int, default=0, help="продолжить с этого id")
+    p.add_argument("--pause", type=float, default=0.0, help="пауза между пачками, с")
+    p.set_defaults(func=partitions_backfill)
+
+    p = sub.add_parser("seed", help="засеять синтетические данные через COPY")
+    p.add_argument("--users", type=int, default=1000)
+    p.add_argument(
+        "--transactions", type=int, default=300, help="в среднем на пользователя"
+    )
+    p.add_argument("--months", type=int, default=24, help="глубина истории")
+    p.add_argument(
+        "--end",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="последний день истории (для одинаковых данных между днями)",
+    )
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument(
+        "--prefix", default="seed", help="email пользователей: <prefix><номер>@..."
+    )
+    p.add_argument("--password", default="password123")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument(
+        "--shard-size", type=int, default=500, help="пользователей на транзакцию COPY"
+    )
+    p.add_argument("--no-analyze", action="store_true")
+    p.set_defaults(func=seed)
+
+    args = parser.parse_args()
+    asyncio.run(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+"""
+Синтетические данные для локальных замеров: пользователи с готовым
+хэшем пароля, счета, деревья категорий, транзакции, переводы и бюджеты.
+
+Содержимое пользователя зависит только от --seed, --end и его номера, а
+не от числа воркеров: на одних и тех же аргументах данные те же (id —
+какие выдадут последовательности). Пользователи режутся на шарды; шард
+генерируется в отдельном процессе и пишется через COPY одной
+транзакцией, там же пересчитываются месячные обороты и дневные снимки.
+
+Первая транзакция каждого счёта — начальный остаток, подобранный так,
+чтобы баланс нигде в истории не уходил в минус; итоговый баланс счёта
+равен сумме его транзакций. Перевод — строка transfers и пара транзакций
+без категории: расход (с комиссией) и приход.
+"""
+
+import asyncio
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from multiprocessing import get_context
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db import db_helper, partitions
+from app.db.repositories import balance_snapshots, rollups
+
+# корень -> [(подкатегория, медиана суммы, разброс, частота)]
+EXPENSE_TREE = {
+    "Еда": [
+        ("Продукты", 1800, 0.7, 30),
+        ("Кафе", 650, 0.6, 14),
+        ("Кофе", 250, 0.3, 12),
+        ("Доставка", 1200, 0.5, 6),
+    ],
+    "Транспорт": [
+        ("Такси", 450, 0.6, 8),
+        ("Метро", 62, 0.05, 12),
+        ("Топливо", 2800, 0.3, 3),
+    ],
+    "Дом": [
+        ("Аренда", 45000, 0.2, 1),
+        ("Коммуналка", 6500, 0.3, 1),
+        ("Связь", 900, 0.2, 1),
+    ],
+    "Здоровье": [("Аптека", 900, 0.7, 3), ("Врачи", 3500, 0.5, 1)],
+    "Развлечения": [
+        ("Кино", 700, 0.3, 2),
+        ("Подписки", 399, 0.3, 2),
+        ("Путешествия", 35000, 0.8, 0.3),
+    ],
+    "Покупки": [("Одежда", 4500, 0.7, 2), ("Техника", 15000, 0.9, 0.5)],
+}
+# корень -> (медиана, разброс, частота); зарплата идёт отдельно, по графику
+INCOME = {
+    "Подработка": (15000, 0.6, 1),
+    "Кэшбэк": (600, 0.5, 1.5),
+    "Проценты": (1200, 0.4, 0.5),
+}
+SALARY = "Зарплата"
+ACCOUNTS = [
+    ("Основная карта", "card"),
+    ("Наличные", "cash"),
+    ("Вклад", "deposit"),
+    ("Кредитка", "card"),
+]
+NOTES = ["", "", "", "чек", "с друзьями", "по акции", "онлайн", "повтор"]
+NAMES = ["Анна", "Иван", "Мария", "Пётр", "Ольга", "Алексей", "Елена", "Дмитрий"]
+
+_COLUMNS = {
+    "users": ["id", "email", "password_hash", "name", "role", "created_at"],
+    "accounts": [
+        "id",
+        "user_id",
+        "name",
+        "currency",
+        "type",
+        "archived",
+        "balance",
+        "created_at",
+    ],
+    "categories": [
+        "id",
+        "user_id",
+        "name",
+        "kind",
+        "parent_id",
+        "archived",
+        "created_at",
+    ],
+    "transactions": [
+        "user_id",
+        "account_id",
+        "category_id",
+        "direction",
+        "amount",
+        "note",
+        "occurred_at",
+        "created_at",
+    ],
+    "transfers": [
+        "user_id",
+        "from_account_id",
+        "to_account_id",
+        "amount",
+        "fee_amount",
+        "note",
+        "occurred_at",
+        "created_at",
+    ],
+    "budgets": ["user_id", "category_id", "month", "amount", "created_at"],
+}
+
+SIGNED_BALANCE_CHECK = text(
+    """
+    SELECT count(*)
+    FROM accounts a
+    JOIN users u ON u.id = a.user_id
+    WHERE u.email LIKE :pattern
+      AND a.balance <> coalesce((
+          SELECT sum(CASE WHEN t.direction = 'incoming' THEN t.amount ELSE -t.amount END)
+          FROM transactions t
+          WHERE t.account_id = a.id
+      ), 0)
+    """
+)
+
+
+@dataclass(frozen=True)
+class SeedParams:
+    seed: int
+    prefix: str
+    password_hash: str
+    transactions: int  # в среднем на пользователя
+    months: int
+    end: date
+
+
+@dataclass
+class _User:
+    """Пользователь с локальными ссылками: счета и категории — индексы."""
+
+    index: int
+    name: str
+    joined: datetime
+    accounts: list[tuple[str, str]] = field(default_factory=list)
+    # (имя, kind, индекс родителя или None)
+    categories: list[tuple[str, str, int | None]] = field(default_factory=list)
+    # (счёт, категория или None, incoming, копейки, заметка, occurred_at)
+    transactions: list[tuple] = field(default_factory=list)
+    # (со счёта, на счёт, копейки, комиссия, occurred_at)
+    transfers: list[tuple] = field(default_factory=list)
+    # (категория, месяц, копейки)
+    budgets: list[tuple[int, date, int]] = field(default_factory=list)
+    balances: list[int] = field(default_factory=list)
+
+
+def _kopecks(rng: random.Random, median: float, sigma: float) -> int:
+    value = rng.lognormvariate(math.log(median), sigma)
+    # крупные суммы — в целых рублях, как в жизни
+    return round(value) * 100 if value >= 1000 else max(1, round(value * 100))
+
+
+def _moment(rng: random.Random, start: datetime, end: datetime) -> datetime:
+    day = start + (end - start) * rng.random()
+    # днём трат больше, чем ночью
+    hour = min(23, max(0, int(rng.gauss(15, 4))))
+    return day.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60))
+
+
+def _month_starts(start: datetime, end: datetime) -> list[date]:
+    months, m = [], date(start.year, start.month, 1)
+    while m <= end.date():
+        months.append(m)
+        m = date(m.year + m.month // 12, m.month % 12 + 1, 1)
+    return months
+
+
+def generate_user(params: SeedParams, index: int) -> _User:
+    rng = random.Random(f"{params.seed}:{index}")
+    end = datetime(
+        params.end.year, params.end.month, params.end.day, tzinfo=timezone.utc
+    )
+    period = timedelta(days=params.months * 30.44)
+    # кто-то с нами с начала периода, кто-то пришёл позже
+    joined = end - period * (1 - 0.5 * rng.random() ** 2)
+    user = _User(index=index, name=rng.choice(NAMES), joined=joined)
+
+    n_accounts = rng.choices((1, 2, 3, 4), (30, 40, 20, 10))[0]
+    user.accounts = ACCOUNTS[:n_accounts]
+    # основная карта — большинство операций
+    account_weights = [6] + [1] * (n_accounts - 1)
+
+    leaves: list[tuple[int, float, float, float]] = []
+    for root, children in EXPENSE_TREE.items():
+        root_i = len(user.categories)
+        user.categories.append((root, "expense", None))
+        for name, median, sigma, freq in children:
+            if rng.random() < 0.75:
+                leaves.append((len(user.categories), median, sigma, freq))
+                user.categories.append((name, "expense", root_i))
+    salary_i = len(user.categories)
+    user.categories.append((SALARY, "income", None))
+    incomes: list[tuple[int, float, float, float]] = []
+    for name, (median, sigma, freq) in INCOME.items():
+        if rng.random() < 0.6:
+            incomes.append((len(user.categories), median, sigma, freq))
+            user.categories.append((name, "income", None))
+
+    # число операций — логнормально вокруг среднего: есть «тяжёлые» пользователи
+    sigma = 0.8
+    mu = math.log(params.transactions) - sigma**2 / 2
+    n_tx = max(1, round(rng.lognormvariate(mu, sigma)))
+    pool = leaves + incomes
+    weights = [freq for *_, freq in pool]
+    for _ in range(n_tx):
+        cat, median, spread, _ = rng.choices(pool, weights)[0]
+        incoming = cat >= salary_i
+        account = rng.choices(range(n_accounts), account_weights)[0]
+        note = rng.choice(NOTES) or None
+        user.transactions.append(
+            (
+                account,
+                cat,
+                incoming,
+                _kopecks(rng, median, spread),
+                note,
+                _moment(rng, joined, end),
+            )
+        )
+
+    months = _month_starts(joined, end)
+    salary = _kopecks(rng, 90000, 0.5)
+    for m in months:
+        for day, share in ((5, 0.4), (20, 0.6)):
+            at = datetime(m.year, m.month, day, 10, tzinfo=timezone.utc)
+            if joined <= at <= end:
+                amount = round(salary * share)
+                user.transactions.append((0, salary_i, True, amount, None, at))
+
+    if n_accounts > 1:
+        for _ in range(rng.randint(0, 2) * len(months)):
+            src, dst = rng.sample(range(n_accounts), 2)
+            amount = _kopecks(rng, 10000, 0.7)
+            fee = round(amount * 0.01) if rng.random() < 0.2 else 0
+            at = _moment(rng, joined, end)
+            user.transfers.append((src, dst, amount, fee, at))
+            user.transactions.append(
+                (src, None, False, amount + fee, f"Перевод: {user.accounts[dst][0]}", at)
+            )
+            user.transactions.append(
+                (dst, None, True, amount, f"Перевод: {user.accounts[src][0]}", at)
+            )
+
+    roots = [
+        i
+        for i, (_, kind, parent) in enumerate(user.categories)
+        if kind == "expense" and parent is None
+    ]
+    for cat in roots:
+        if rng.random() < 0.5:
+            continue
+        base = rng.choice((5000, 10000, 15000, 20000, 30000, 50000))
+        for m in months:
+            amount = round(base * rng.uniform(0.9, 1.1) / 500) * 500
+            user.budgets.append((cat, m, amount * 100))
+
+    # начальный остаток: баланс не уходит в минус ни в какой момент истории
+    user.transactions.sort(key=lambda t: t[5])
+    running, lowest = [0] * n_accounts, [0] * n_accounts
+    for account, _, incoming, amount, _, _ in user.transactions:
+        running[account] += amount if incoming else -amount
+        lowest[account] = min(lowest[account], running[account])
+    opening_at = joined - timedelta(days=1)
+    for account in range(n_accounts):
+        opening = -lowest[account] + _kopecks(rng, 20000, 1.0)
+        user.transactions.insert(
+            0, (account, None, True, opening, "Начальный остаток", opening_at)
+        )
+        running[account] += opening
+    user.balances = running
+    return user
+
+
+def _money(kopecks: int) -> Decimal:
+    return Decimal(kopecks).scaleb(-2)
+
+
+def _naive(at: datetime) -> datetime:
+    return at.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def _reserve_ids(session, table: str, n: int) -> list[int]:
+    """id из последовательности таблицы: безопасно рядом с живым приложением."""
+    if not n:
+        return []
+    res = await session.execute(
+        text(
+            "SELECT nextval(pg_get_serial_sequence(:t, 'id'))"
+            " FROM generate_series(1, :n)"
+        ),
+        {"t": table, "n": n},
+    )
+    return list(res.scalars())
+
+
+async def _write_shard(params: SeedParams, start: int, count: int) -> dict:
+    users = [generate_user(params, i) for i in range(start, start + count)]
+    rows = {name: [] for name in _COLUMNS}
+
+    async with db_helper.session_factory() as session:
+        user_ids = await _reserve_ids(session, "users", len(users))
+        account_ids = iter(
+            await _reserve_ids(session, "accounts", sum(len(u.accounts) for u in users))
+        )
+        category_ids = iter(
+            await _reserve_ids(
+                session, "categories", sum(len(u.categories) for u in users)
+            )
+        )
+        for user_id, u in zip(user_ids, users):
+            created = _naive(u.joined - timedelta(days=1))
+            rows["users"].append(
+                (
+                    user_id,
+                    f"{params.prefix}{u.index}@example.com",
+                    params.password_hash,
+                    u.name,
+                    "user",
+                    created,
+                )
+            )
+            accs = [next(account_ids) for _ in u.accounts]
+            for acc_id, (name, type_), balance in zip(accs, u.accounts, u.balances):
+                rows["accounts"].append(
+                    (
+                        acc_id,
+                        user_id,
+                        name,
+                        "RUB",
+                        type_,
+                        False,
+                        _money(balance),
+                        created,
+                    )
+                )
+            cats = [next(category_ids) for _ in u.categories]
+            for cat_id, (name, kind, parent) in zip(cats, u.categories):
+                parent_id = cats[parent] if parent is not None else None
+                rows["categories"].append(
+                    (cat_id, user_id, name, kind, parent_id, False, created)
+                )
+            for account, cat, incoming, amount, note, at in u.transactions:
+                rows["transactions"].append(
+                    (
+                        user_id,
+                        accs[account],
+                        cats[cat] if cat is not None else None,
+                        "incoming" if incoming else "outgoing",
+                        _money(amount),
+                        note,
+                        at,
+                        _naive(at + timedelta(minutes=5)),
+                    )
+                )
+            for src, dst, amount, fee, at in u.transfers:
+                rows["transfers"].append(
+                    (
+                        user_id,
+                        accs[src],
+                        accs[dst],
+                        _money(amount),
+                        _money(fee) if fee else None,
+                        "Перевод",
+                        _naive(at),
+                        _naive(at + timedelta(minutes=5)),
+                    )
+                )
+            for cat, month, amount in u.budgets:
+                rows["budgets"].append(
+                    (user_id, cats[cat], month, _money(amount), created)
+                )
+
+        # COPY — сырым соединением asyncpg внутри транзакции сессии
+        conn = await session.connection()
+        raw = (await conn.get_raw_connection()).driver_connection
+        for table, columns in _COLUMNS.items():
+            if rows[table]:
+                await raw.copy_records_to_table(
+                    table, records=rows[table], columns=columns
+                )
+        # обороты и снимки — теми же функциями, что и app.cli
+        await rollups.rebuild(session, user_ids)
+        await balance_snapshots.backfill(session, [r[0] for r in rows["accounts"]])
+        await session.commit()
+    return {table: len(r) for table, r in rows.items()}
+
+
+def _run_shard(params: SeedParams, start: int, count: int) -> dict:
+    async def run() -> dict:
+        try:
+            return await _write_shard(params, start, count)
+        finally:
+            # у каждого asyncio.run свой loop — соединения прошлого не годятся
+            await db_helper.dispose()
+
+    return asyncio.run(run())
+
+
+async def seed(
+    params: SeedParams, users: int, workers: int, shard_size: int, analyze: bool
+) -> None:
+    shards = [(s, min(shard_size, users - s)) for s in range(0, users, shard_size)]
+    totals: dict[str, int] = {}
+    started = time.perf_counter()
+    # партиции на всю историю заранее: иначе COPY сложит её в default
+    first = partitions.add_months(params.end.replace(day=1), -(params.months + 1))
+    await partitions.maintain(db_helper.engine, settings.partitions, since=first)
+    loop = asyncio.get_running_loop()
+    # spawn: форкнутый процесс унаследовал бы пул соединений родителя
+    with ProcessPoolExecutor(workers, mp_context=get_context("spawn")) as pool:
+        futures = [
+            loop.run_in_executor(pool, _run_shard, params, start, count)
+            for start, count in shards
+        ]
+        for fut in asyncio.as_completed(futures):
+            for table, n in (await fut).items():
+                totals[table] = totals.get(table, 0) + n
+            elapsed = time.perf_counter() - started
+            print(
+                f"{totals['users']}/{users} users,"
+                f" {totals['transactions']} transactions,"
+                f" {totals['transactions'] / elapsed:,.0f} tx/s"
+            )
+
+    try:
+        if analyze:
+            async with db_helper.engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                for table in (*_COLUMNS, "category_month_rollups"):
+                    await conn.execute(text(f"ANALYZE {table}"))
+        async with db_helper.session_factory() as session:
+            drift = await session.scalar(
+                SIGNED_BALANCE_CHECK, {"pattern": f"{params.prefix}%@example.com"}
+            )
+    finally:
+        await db_helper.dispose()
+    print(
+        ", ".join(f"{n} {table}" for table, n in totals.items())
+        + f" in {time.perf_counter() - started:.1f} s;"
+        + f" accounts with balance != sum of transactions: {drift}"
+    )
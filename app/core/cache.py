@@ -0,0 +1,144 @@
+"""
+Кэш с версиями: значение лежит под ключом (scope, версия scope, key).
+Запись данных scope (например, пользователя) после commit поднимает его
+версию — старые записи становятся недостижимы и вытесняются LRU/TTL.
+Версия читается до запроса в БД, поэтому ответ, посчитанный параллельно
+с записью, ляжет под старую версию и отдан уже не будет.
+
+Хранилище подключаемое (CacheBackend). LocalCache — в памяти процесса:
+при нескольких воркерах uvicorn запись в одном не поднимает версию в
+других, для них нужно общее хранилище с тем же интерфейсом.
+"""
+
+import itertools
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from dataclasses import dataclass
+from importlib import import_module
+from typing import Any
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0  # вытеснено по размеру или по TTL
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class CacheBackend(ABC):
+    stats: CacheStats
+
+    @abstractmethod
+    async def get(self, key: Hashable) -> Any | None:
+        """None — промах."""
+
+    @abstractmethod
+    async def set(self, key: Hashable, value: Any) -> None: ...
+
+    @abstractmethod
+    async def version(self, scope: Hashable) -> int: ...
+
+    @abstractmethod
+    async def bump(self, scopes: Iterable[Hashable]) -> None:
+        """Новая версия, которой у scope ещё не было."""
+
+    async def clear(self) -> None:
+        pass
+
+
+class LocalCache(CacheBackend):
+    """LRU с TTL в памяти процесса; годится и как заглушка в тестах."""
+
+    def __init__(
+        self, max_entries: int = 10_000, ttl_s: float = 60.0, max_scopes: int = 0
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        # версий храним не больше max_scopes (0 — столько же, сколько записей)
+        self.max_scopes = max_scopes or max_entries
+        self.stats = CacheStats()
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._versions: OrderedDict[Hashable, int] = OrderedDict()
+        self._counter = itertools.count(1)
+        # версия scope, вытесненного из _versions: не меньше любой его прежней,
+        # так что записи под старыми версиями не оживут
+        self._floor = 0
+
+    async def get(self, key: Hashable) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            self.stats.misses += 1
+            return None
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            self.stats.evictions += 1
+            self.stats.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    async def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl_s, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def version(self, scope: Hashable) -> int:
+        return self._versions.get(scope, self._floor)
+
+    async def bump(self, scopes: Iterable[Hashable]) -> None:
+        for scope in scopes:
+            self._versions[scope] = next(self._counter)
+            self._versions.move_to_end(scope)
+        while len(self._versions) > self.max_scopes:
+            _, v = self._versions.popitem(last=False)
+            self._floor = max(self._floor, v)
+
+    async def clear(self) -> None:
+        self._data.clear()
+
+
+def load_backend(path: str, **kwargs) -> CacheBackend:
+    """'module:Class' — класс хранилища из настроек."""
+    module, _, name = path.partition(":")
+    backend = getattr(import_module(module), name)(**kwargs)
+    if not isinstance(backend, CacheBackend):
+        raise TypeError(f"{path} is not a CacheBackend")
+    return backend
+
+
+class VersionedCache:
+    def __init__(self, backend: CacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.backend.stats
+
+    async def get_or_build(
+        self, scope: Hashable, key: Hashable, build: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        if not self.enabled:
+            return await build()
+        full_key = (scope, await self.backend.version(scope), key)
+        value = await self.backend.get(full_key)
+        if value is None:
+            value = await build()
+            if value is not None:
+                await self.backend.set(full_key, value)
+        return value
+
+    async def invalidate(self, scopes: Iterable[Hashable]) -> None:
+        if self.enabled:
+            await self.backend.bump(scopes)
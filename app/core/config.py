@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel, PostgresDsn
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
@@ -21,15 +23,37 @@ class DataConfig(BaseModel):
     echo: bool = False
     echo_pool: bool = False
     max_overflow: int = 10
-    pool_size: int = 50
+    # на каждый воркер: workers * (pool_size + max_overflow) <= max_connections
+    pool_size: int = 10
+    pool_timeout: float = 30.0  # сколько ждать свободное соединение
+    # за pgbouncer в режиме transaction pooling: без кэша prepared statements
+    pgbouncer: bool = False
+    # реплики для GET-ручек (get_read_session), выбираются по кругу
+    replica_urls: list[PostgresDsn] = []
+    # после записи пользователь столько читает с primary: больше лага реплик;
+    # окно едет в подписанной cookie, так что общее для всех воркеров
+    read_your_writes_s: float = 5.0
+    replica_retry_s: float = 10.0  # пауза для упавшей реплики
 
 
 class AuthJWT(BaseModel):
     private_key_path: Path = PROJECT_ROOT / "app" / "certs" / "jwt-private.pem"
     public_key_path: Path = PROJECT_ROOT / "app" / "certs" / "jwt-public.pem"
+    # RS256 или EdDSA (Ed25519: подпись дешевле, ключи и токены короче)
     algorithm: str = "RS256"
     access_ttl_min: int = 120
     refresh_ttl_min: int = 120
+    # проверенных токенов в памяти процесса; 0 — проверять подпись всегда
+    verified_cache_size: int = 10_000
+
+
+class PasswordConfig(BaseModel):
+    # смена bcrypt_rounds перехэширует пароль при следующем логине
+    bcrypt_rounds: int = 12
+    pool: Literal["thread", "process"] = "thread"
+    workers: int = 2  # одновременно считаемых хэшей
+    max_queue: int = 64  # сверх этого — сразу 503
+    queue_timeout_s: float = 5.0
 
 
 class CookieSettings(BaseModel):
@@ -37,6 +61,104 @@ class CookieSettings(BaseModel):
     samesite: str = "lax"
 
 
+class ImportConfig(BaseModel):
+    chunk_size: int = 10_000  # строк на один COPY
+    max_upload_mb: int = 512
+    tmp_dir: Path | None = None  # None -> системный tempdir
+    heartbeat_s: float = 30.0  # как часто идущий импорт обновляет updated_at
+    # pending/running без отметки столько времени — воркер умер, задача failed
+    stale_after_s: float = 300.0
+
+
+class ExportConfig(BaseModel):
+    batch_size: int = 1000  # строк на один fetch серверного курсора
+    gzip_level: int = 6
+
+
+class SearchConfig(BaseModel):
+    # сколько самых свежих совпадений ранжируется в /transactions/search
+    rank_window: int = 200
+    highlight_start: str = "<mark>"
+    highlight_stop: str = "</mark>"
+
+
+class LedgerConfig(BaseModel):
+    # изменения баланса пишутся в слоты счёта, а не в строку accounts
+    enabled: bool = False
+    slots: int = 8
+    # какую долю остатка компактор раскладывает по слотам под списания
+    reserve_ratio: float = 0.5
+    compact_interval_s: float = 5.0
+    compact_batch: int = 500  # счетов за один проход
+
+
+class BudgetCacheConfig(BaseModel):
+    # кэш GET /budgets/{month}; версия пользователя растёт на каждую запись
+    enabled: bool = True
+    # LocalCache — в памяти процесса; при нескольких воркерах нужно общее
+    # хранилище ("module:Class", наследник app.core.cache.CacheBackend)
+    backend: str = "app.core.cache:LocalCache"
+    max_entries: int = 10_000
+    ttl_s: float = 60.0
+
+
+class PrincipalCacheConfig(BaseModel):
+    # пользователь для get_current_user; в памяти процесса
+    enabled: bool = True
+    max_entries: int = 10_000
+    ttl_s: float = 30.0
+
+
+class HealthConfig(BaseModel):
+    ready_timeout_s: float = 2.0  # SELECT 1 в /health/ready
+
+
+class MetricsConfig(BaseModel):
+    enabled: bool = True  # middleware и /metrics в формате Prometheus
+    # число и время запросов к БД по ручкам: события SQLAlchemy на каждый
+    # запрос, порядка 10 мкс сверху (python -m benchmarks.metrics_overhead)
+    db_queries: bool = True
+
+
+class InternalConfig(BaseModel):
+    # служебные ручки (/metrics, /internal/metrics): без флага их нет (404)
+    enabled: bool = False
+    # задан — ручки требуют Authorization: Bearer <token>
+    token: str | None = None
+
+
+class SlowQueryConfig(BaseModel):
+    threshold_ms: float = 500.0  # дольше — в лог db.slow; 0 — выключено
+    # доля медленных SELECT, которые повторяются как EXPLAIN (ANALYZE, BUFFERS);
+    # запрос выполняется второй раз, поэтому по умолчанию выключено
+    explain_sample: float = 0.0
+    explain_path: str = "logs/slow_explain.log"
+    explain_max_bytes: int = 10 * 1024 * 1024
+    explain_backups: int = 5
+    explain_timeout_s: float = 30.0
+
+
+class PartitionConfig(BaseModel):
+    # помесячные партиции transactions (app/db/partitions.py)
+    maintain: bool = True  # фоновое создание и отключение партиций в воркере
+    interval_s: float = 6 * 3600
+    premake_months: int = 3  # сколько месяцев вперёд держать готовыми
+    # партиции старше стольких месяцев отключаются (DETACH) и остаются
+    # отдельными таблицами — из запросов приложения они пропадают; None — все
+    retain_months: int | None = None
+    lock_timeout_ms: int = 2000  # ATTACH/DETACH: не ждать дольше, повторить позже
+    backfill_batch: int = 10_000  # строк на транзакцию при переносе данных
+
+
+class StartupConfig(BaseModel):
+    # сверка alembic_version с head миграций: strict — не стартовать при
+    # расхождении, warn — только лог, off — не проверять
+    schema_check: Literal["strict", "warn", "off"] = "strict"
+    # соединения пула, ключи JWT и горячие запросы до первого запроса
+    warmup: bool = True
+    warmup_connections: int = 2  # на движок; не больше pool_size
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=ENV_PATH,
@@ -49,7 +171,20 @@ class Settings(BaseSettings):
     api: ApiPrefix = ApiPrefix()
     db: DataConfig
     jwt: AuthJWT = AuthJWT()
+    passwords: PasswordConfig = PasswordConfig()
     cookies: CookieSettings = CookieSettings()
+    imports: ImportConfig = ImportConfig()
+    export: ExportConfig = ExportConfig()
+    search: SearchConfig = SearchConfig()
+    ledger: LedgerConfig = LedgerConfig()
+    budget_cache: BudgetCacheConfig = BudgetCacheConfig()
+    principal_cache: PrincipalCacheConfig = PrincipalCacheConfig()
+    health: HealthConfig = HealthConfig()
+    metrics: MetricsConfig = MetricsConfig()
+    internal: InternalConfig = InternalConfig()
+    slow_queries: SlowQueryConfig = SlowQueryConfig()
+    startup: StartupConfig = StartupConfig()
+    partitions: PartitionConfig = PartitionConfig()
 
 
 settings = Settings()
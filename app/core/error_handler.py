@@ -8,7 +8,11 @@ log = logging.getLogger("errors")
 
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     log.warning("HTTP %s at %s -> %s", exc.status_code, request.url.path, exc.detail)
-    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers=getattr(exc, "headers", None),
+    )
 
 
 async def unhandled_error_handler(request: Request, exc: Exception):
@@ -0,0 +1,248 @@
+"""
+Метрики запросов в текстовом формате Prometheus: ASGI-middleware
+(латентность, размер ответа), запросы в работе по ручкам
+(track_routes) и счётчики запросов к БД за время HTTP-запроса. Всё в
+памяти процесса, без внешних зависимостей; при нескольких воркерах
+Prometheus опрашивает каждый отдельно.
+"""
+
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.routing import Route
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_
+        self.labelnames = labelnames
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), value: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + value
+
+    def render(self) -> list[str]:
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, k)} {v}"
+            for k, v in self.values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, labels: tuple, value: float) -> None:
+        self.values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [счётчики по корзинам (+Inf последней), сумма]
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        item = self.values.get(labels)
+        if item is None:
+            item = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        item[0][bisect_left(self.buckets, value)] += 1
+        item[1] += value
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        names = (*self.labelnames, "le")
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), counts):
+                cumulative += n
+                le = _labels(names, (*labels, bound))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            base = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{base} {total}")
+            lines.append(f"{self.name}_count{base} {cumulative}")
+        return lines
+
+
+in_flight = Gauge(
+    "http_requests_in_flight", "HTTP requests being served", ("method", "route")
+)
+
+
+class _RouteStats:
+    """Всё по одной ручке в одном объекте — один поиск в словаре на запрос."""
+
+    __slots__ = ("statuses", "latency", "latency_sum", "size", "size_sum", "db")
+
+    def __init__(self):
+        self.statuses: dict[int, int] = {}
+        self.latency = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.size = [0] * (len(SIZE_BUCKETS) + 1)
+        self.size_sum = 0
+        self.db = [0, 0.0]  # запросов к БД, секунд в них
+
+
+# (method, шаблон пути) -> статистика
+_routes: dict[tuple[str, str], _RouteStats] = {}
+
+
+def _route_metrics() -> list[_Metric]:
+    route = ("method", "route")
+    requests = Counter(
+        "http_requests_total", "HTTP requests", ("method", "route", "status")
+    )
+    latency = Histogram(
+        "http_request_duration_seconds", "HTTP request latency", route
+    )
+    size = Histogram(
+        "http_response_size_bytes", "HTTP response body size", route, SIZE_BUCKETS
+    )
+    db_queries = Counter("http_db_queries_total", "DB queries made by requests", route)
+    db_seconds = Counter(
+        "http_db_seconds_total", "Time spent in DB queries by requests", route
+    )
+    for labels, st in list(_routes.items()):
+        for code, n in list(st.statuses.items()):
+            requests.inc((*labels, code), n)
+        latency.values[labels] = [list(st.latency), st.latency_sum]
+        size.values[labels] = [list(st.size), st.size_sum]
+        db_queries.inc(labels, st.db[0])
+        db_seconds.inc(labels, st.db[1])
+    return [requests, latency, size, in_flight, db_queries, db_seconds]
+
+
+# метрики, которые считаются в момент опроса (пулы, кэши)
+_COLLECTORS: list[Callable[[], Iterable[_Metric]]] = [_route_metrics]
+
+
+def register_collector(collect: Callable[[], Iterable[_Metric]]) -> None:
+    _COLLECTORS.append(collect)
+
+
+def render() -> str:
+    lines: list[str] = []
+    for collect in _COLLECTORS:
+        for metric in collect():
+            lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+# [запросов, секунд] к БД текущего HTTP-запроса; None — вне HTTP (CLI, задачи)
+_request_db: ContextVar[list | None] = ContextVar("request_db", default=None)
+
+
+def listen_engine(engine: AsyncEngine) -> None:
+    target = engine.sync_engine
+
+    @event.listens_for(target, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany) -> None:
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(target, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany) -> None:
+        acc = _request_db.get()
+        if acc is not None:
+            acc[0] += 1
+            acc[1] += time.perf_counter() - context._metrics_started
+
+
+class MetricsMiddleware:
+    """Чистое ASGI-middleware: без BaseHTTPMiddleware и лишних задач."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            else:
+                size += len(message.get("body", b""))
+            await send(message)
+
+        db = [0, 0.0]
+        token = _request_db.set(db)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_db.reset(token)
+            # шаблон пути, а не сам путь: /transactions/{tx_id}, не /transactions/42
+            route = scope.get("route")
+            key = (scope["method"], route.path if route else "unmatched")
+            st = _routes.get(key)
+            if st is None:
+                st = _routes[key] = _RouteStats()
+            st.statuses[status] = st.statuses.get(status, 0) + 1
+            st.latency[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+            st.latency_sum += elapsed
+            st.size[bisect_left(SIZE_BUCKETS, size)] += 1
+            st.size_sum += size
+            st.db[0] += db[0]
+            st.db[1] += db[1]
+
+
+def _count_in_flight(app, path: str):
+    async def wrapper(scope, receive, send):
+        key = (scope["method"], path)
+        in_flight.values[key] = in_flight.values.get(key, 0) + 1
+        try:
+            await app(scope, receive, send)
+        finally:
+            in_flight.values[key] -= 1
+
+    return wrapper
+
+
+def track_routes(app) -> None:
+    """
+    in_flight по ручкам. Шаблон пути известен только после роутинга,
+    поэтому счётчик — в обёртке приложения каждой ручки, а не в
+    middleware. Вызывать после include_router.
+    """
+    for route in app.routes:
+        if isinstance(route, Route):
+            route.app = _count_in_flight(route.app, route.path)
@@ -1,7 +1,11 @@
 __all__ = [
     "Account",
+    "AccountBalanceSlot",
+    "AccountBalanceSnapshot",
     "Budget",
     "Category",
+    "CategoryMonthRollup",
+    "ImportJob",
     "Transaction",
     "Transfer",
     "User",
@@ -9,8 +13,12 @@ __all__ = [
 
 
 from .account import Account
+from .account_balance_slot import AccountBalanceSlot
+from .account_balance_snapshot import AccountBalanceSnapshot
 from .budget import Budget
 from .category import Category
+from .category_month_rollup import CategoryMonthRollup
+from .import_job import ImportJob
 from .transaction import Transaction
 from .transfer import Transfer
 from .user import User
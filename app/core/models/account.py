@@ -7,7 +7,7 @@ from sqlalchemy import (
     Numeric,
     UniqueConstraint,
 )
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, query_expression, relationship
 from decimal import Decimal
 
 from app.db import Base
@@ -24,6 +24,8 @@ class Account(UserRelationMixin, Base):
     )
     archived: Mapped[bool] = mapped_column(Boolean, default=False)
     balance: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0)
+    # несвёрнутые слоты ledger-режима, подгружается через with_expression
+    pending_delta: Mapped[Decimal | None] = query_expression()
 
     transactions: Mapped[list["Transaction"]] = relationship(
         back_populates="account", cascade="all, delete-orphan"
@@ -39,6 +41,10 @@ class Account(UserRelationMixin, Base):
         cascade="all, delete-orphan",
     )
 
+    @property
+    def current_balance(self) -> Decimal:
+        return self.balance + (self.pending_delta or 0)
+
     __table_args__ = (
         UniqueConstraint("user_id", "name", name="uq__account__user_name"),
     )
@@ -0,0 +1,38 @@
+from decimal import Decimal
+
+from sqlalchemy import (
+    Boolean,
+    ForeignKey,
+    Index,
+    Numeric,
+    SmallInteger,
+    UniqueConstraint,
+    text,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db import Base
+
+
+class AccountBalanceSlot(Base):
+    """
+    Шард баланса счёта в ledger-режиме. Текущий баланс счёта —
+    Account.balance плюс сумма delta по всем его слотам.
+    """
+
+    account_id: Mapped[int] = mapped_column(
+        ForeignKey("accounts.id", ondelete="CASCADE")
+    )
+    slot: Mapped[int] = mapped_column(SmallInteger)
+    delta: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0)
+    # слот менялся после последнего прохода компактора
+    dirty: Mapped[bool] = mapped_column(Boolean, default=True)
+
+    __table_args__ = (
+        UniqueConstraint("account_id", "slot"),
+        Index(
+            "ix__account_balance_slots__account_id_dirty",
+            "account_id",
+            postgresql_where=text("dirty"),
+        ),
+    )
@@ -0,0 +1,26 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import Date, ForeignKey, Numeric, SmallInteger, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db import Base
+
+
+class AccountBalanceSnapshot(Base):
+    """
+    Дневной оборот счёта: сумма изменений баланса по транзакциям с
+    occurred_at в этот день (UTC). Баланс на конец дня X — текущий баланс
+    минус обороты всех дней после X, поэтому задним числом правится одна
+    строка, а не все последующие дни.
+    """
+
+    account_id: Mapped[int] = mapped_column(
+        ForeignKey("accounts.id", ondelete="CASCADE")
+    )
+    day: Mapped[date] = mapped_column(Date)
+    # в ledger-режиме день горячего счёта раскладывается по слотам, как баланс
+    slot: Mapped[int] = mapped_column(SmallInteger, default=0)
+    delta: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0)
+
+    __table_args__ = (UniqueConstraint("account_id", "day", "slot"),)
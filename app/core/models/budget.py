@@ -4,6 +4,7 @@ from decimal import Decimal
 from sqlalchemy import (
     Numeric,
     ForeignKey,
+    UniqueConstraint,
 )
 from .mixins import UserRelationMixin
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -12,7 +13,7 @@ from app.db.base import Base
 
 
 class Budget(UserRelationMixin, Base):
-    """Бюджет на месяц по категории расхода (planned). Факт считаем из Transaction."""
+    """Бюджет на месяц по категории расхода (planned). Факт — из CategoryMonthRollup."""
 
     _user_back_populates = "budgets"
 
@@ -23,3 +24,9 @@ class Budget(UserRelationMixin, Base):
     amount: Mapped[Decimal] = mapped_column(Numeric(14, 2))
 
     category: Mapped["Category"] = relationship()
+
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "month", "category_id", name="uq__budget__user_month_category"
+        ),
+    )
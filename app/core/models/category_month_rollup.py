@@ -0,0 +1,60 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import (
+    Date,
+    Enum,
+    ForeignKey,
+    Integer,
+    Numeric,
+    SmallInteger,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db import Base
+from app.db.types import Direction
+from .mixins import UserRelationMixin
+
+
+class CategoryMonthRollup(UserRelationMixin, Base):
+    """
+    Сумма и число транзакций по (счёт, категория, месяц, направление).
+    Пишется в той же транзакции БД, что и сами транзакции; факт бюджетов
+    читается отсюда, а не агрегатом по transactions.
+    """
+
+    # покрывается уникальным ключом ниже
+    _user_index = False
+
+    account_id: Mapped[int] = mapped_column(
+        ForeignKey("accounts.id", ondelete="CASCADE")
+    )
+    # как transactions.category_id; до удаления категории триггер миграции
+    # 9a4f6c2e1d83 сливает её строки в строки без категории
+    category_id: Mapped[int | None] = mapped_column(
+        ForeignKey("categories.id", ondelete="SET NULL"), nullable=True
+    )
+    # первое число месяца (UTC) по occurred_at
+    month: Mapped[date] = mapped_column(Date)
+    direction: Mapped[Direction] = mapped_column(
+        Enum(Direction, name="direction", create_type=False)
+    )
+    # в ledger-режиме строка горячего счёта раскладывается по слотам
+    slot: Mapped[int] = mapped_column(SmallInteger, default=0)
+    total: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0)
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+    __table_args__ = (
+        # NULLS NOT DISTINCT — иначе ON CONFLICT не находит строки без категории
+        UniqueConstraint(
+            "user_id",
+            "month",
+            "direction",
+            "account_id",
+            "category_id",
+            "slot",
+            name="uq__category_month_rollups__key",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
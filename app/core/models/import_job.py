@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy import String, Enum, ForeignKey, Integer, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db import Base
+from app.db.types import ImportFormat, ImportStatus
+from .mixins import UserRelationMixin
+
+
+class ImportJob(UserRelationMixin, Base):
+    """Фоновый импорт выписки (CSV/OFX) в transactions."""
+
+    _user_back_populates = "import_jobs"
+
+    # счёт по умолчанию для строк без account_id (для OFX — обязателен)
+    account_id: Mapped[int | None] = mapped_column(
+        ForeignKey("accounts.id", ondelete="CASCADE"), nullable=True
+    )
+    format: Mapped[ImportFormat] = mapped_column(
+        Enum(ImportFormat, name="import_format", create_type=False)
+    )
+    filename: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    status: Mapped[ImportStatus] = mapped_column(
+        Enum(ImportStatus, name="import_status", create_type=False),
+        default=ImportStatus.pending,
+    )
+    rows_parsed: Mapped[int] = mapped_column(Integer, default=0)
+    rows_imported: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    # каждая смена состояния и heartbeat идущего импорта
+    updated_at: Mapped[datetime] = mapped_column(
+        server_default=text("CURRENT_TIMESTAMP")
+    )
@@ -2,16 +2,84 @@ from datetime import datetime
 from decimal import Decimal
 
 from app.db import Base
-from sqlalchemy import String, Enum, ForeignKey, DateTime, Numeric, text
+from sqlalchemy import (
+    DDL,
+    String,
+    Enum,
+    ForeignKey,
+    DateTime,
+    Index,
+    Numeric,
+    PrimaryKeyConstraint,
+    event,
+    func,
+    literal_column,
+    text,
+)
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from app.db.types import Direction
 from .mixins import UserRelationMixin
 
 
+# конфигурация полнотекстового поиска по note: simple — без стемминга,
+# чтобы префиксный поиск одинаково работал для русского и английского
+NOTE_FTS_CONFIG = "simple"
+
+
+def note_document(note):
+    """
+    tsvector заметки. Должен совпадать с выражением ix__transactions__note_fts,
+    иначе планировщик индекс не возьмёт; bind-параметров здесь быть не должно.
+    """
+    return func.to_tsvector(
+        literal_column(f"'{NOTE_FTS_CONFIG}'::regconfig"),
+        func.coalesce(note, literal_column("''")),
+    )
+
+
 class Transaction(UserRelationMixin, Base):
     _user_back_populates = "transactions"
+    # одиночный индекс по user_id покрывается составными ниже
+    _user_index = False
 
+    __table_args__ = (
+        # помесячные партиции по occurred_at (app/db/partitions.py): ключ
+        # партиционирования обязан входить в первичный ключ; id по-прежнему
+        # уникален — его выдаёт одна последовательность
+        PrimaryKeyConstraint("id", "occurred_at"),
+        # лента (sort=created_at) и keyset-пагинация по ней
+        Index(
+            "ix__transactions__user_id_created_at_id",
+            "user_id",
+            text("created_at DESC"),
+            text("id DESC"),
+        ),
+        # sort=occurred_at и фильтры date_from/date_to
+        Index(
+            "ix__transactions__user_id_occurred_at_id",
+            "user_id",
+            text("occurred_at DESC"),
+            text("id DESC"),
+        ),
+        Index(
+            "ix__transactions__user_id_account_id_created_at_id",
+            "user_id",
+            "account_id",
+            text("created_at DESC"),
+            text("id DESC"),
+        ),
+        # поиск по заметкам (см. note_document)
+        Index(
+            "ix__transactions__note_fts",
+            text(f"to_tsvector('{NOTE_FTS_CONFIG}'::regconfig, coalesce(note, ''))"),
+            postgresql_using="gin",
+        ),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
+
+    # ключ составной: autoincrement явно, иначе id не SERIAL
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     account_id: Mapped[int] = mapped_column(
         ForeignKey("accounts.id", ondelete="CASCADE"), index=True
     )
@@ -25,9 +93,21 @@ class Transaction(UserRelationMixin, Base):
     )
     note: Mapped[str | None] = mapped_column(String(500), nullable=True)
 
+    # в ключе и для ORM: UPDATE/DELETE по объекту идут в одну партицию
     occurred_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=text("TIMEZONE('UTC', NOW())")
+        DateTime(timezone=True),
+        primary_key=True,
+        server_default=text("TIMEZONE('UTC', NOW())"),
     )
 
     account: Mapped["Account"] = relationship(back_populates="transactions")
     category: Mapped["Category | None"] = relationship(back_populates="transactions")
+
+
+# без партиций в партиционированную таблицу ничего не вставить; месяцы
+# нарезает app.db.partitions.maintain, остальное ловит default
+event.listen(
+    Transaction.__table__,
+    "after_create",
+    DDL("CREATE TABLE transactions_default PARTITION OF transactions DEFAULT"),
+)
@@ -28,3 +28,6 @@ class User(Base):
     budgets: Mapped[list["Budget"]] = relationship(
         back_populates="user", cascade="all, delete-orphan"
     )
+    import_jobs: Mapped[list["ImportJob"]] = relationship(
+        back_populates="user", cascade="all, delete-orphan"
+    )
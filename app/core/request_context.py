@@ -0,0 +1,40 @@
+"""
+Текущий HTTP-запрос для кода, который не получает Request: хуки
+SQLAlchemy, логи. Хранится сам ASGI scope — роутер дописывает в него
+route уже после middleware, а авторизация — user_id в state.
+"""
+
+from contextvars import ContextVar
+
+_scope: ContextVar[dict | None] = ContextVar("asgi_scope", default=None)
+
+
+class RequestContextMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _scope.reset(token)
+
+
+def current_route() -> str | None:
+    """Шаблон пути ручки (/transactions/{tx_id}); None — вне запроса."""
+    scope = _scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return route.path if route else scope["path"]
+
+
+def current_user_id() -> int | None:
+    scope = _scope.get()
+    if scope is None:
+        return None
+    return scope.get("state", {}).get("user_id")
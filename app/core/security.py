@@ -1,12 +1,24 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 from functools import lru_cache
 from pathlib import Path
 
 import jwt
 from passlib.context import CryptContext
-from app.core.config import settings
+from app.core.config import PasswordConfig, settings
 
-pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache(maxsize=4)
+def _context(rounds: int) -> CryptContext:
+    # хэш с другим числом раундов needs_update -> перехэшируется при логине
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+pwd = _context(settings.passwords.bcrypt_rounds)
 
 
 def hash_password(raw: str) -> str:
@@ -17,6 +29,81 @@ def verify_password(raw: str, hashed: str) -> bool:
     return pwd.verify(raw, hashed)
 
 
+# в пуле процессов функции должны импортироваться по имени
+def _hash(raw: str, rounds: int) -> str:
+    return _context(rounds).hash(raw)
+
+
+def _verify_and_update(raw: str, hashed: str, rounds: int) -> tuple[bool, str | None]:
+    return _context(rounds).verify_and_update(raw, hashed)
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    """
+    bcrypt в пуле потоков/процессов: event loop не стоит ~0.1–0.3 с на
+    каждый хэш. Одновременно считается не больше workers хэшей, ещё
+    max_queue ждут своей очереди не дольше queue_timeout_s — остальным
+    PasswordHasherBusy (ручки отвечают 503).
+    """
+
+    def __init__(self, config: PasswordConfig):
+        self.config = config
+        self._executor: Executor | None = None
+        self._slots = asyncio.Semaphore(config.workers)
+        self._waiting = 0
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            if self.config.pool == "process":
+                self._executor = ProcessPoolExecutor(self.config.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.config.workers, thread_name_prefix="bcrypt"
+                )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self._waiting >= self.config.max_queue:
+            raise PasswordHasherBusy("password hashing queue is full")
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(
+                self._slots.acquire(), timeout=self.config.queue_timeout_s
+            )
+        except asyncio.TimeoutError:
+            raise PasswordHasherBusy("password hashing queue timeout") from None
+        finally:
+            self._waiting -= 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool(), fn, *args)
+        finally:
+            self._slots.release()
+
+    async def hash(self, raw: str) -> str:
+        return await self._run(_hash, raw, self.config.bcrypt_rounds)
+
+    async def verify_and_update(
+        self, raw: str, hashed: str
+    ) -> tuple[bool, str | None]:
+        """(совпал ли пароль, новый хэш — если сменилась стоимость bcrypt)."""
+        return await self._run(
+            _verify_and_update, raw, hashed, self.config.bcrypt_rounds
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(settings.passwords)
+
+
 @lru_cache(maxsize=1)
 def load_private_key() -> str:
     p: Path = settings.jwt.private_key_path
@@ -29,6 +116,21 @@ def load_public_key() -> str:
     return p.read_text(encoding="utf-8")
 
 
+@lru_cache(maxsize=1)
+def _signing_key():
+    # PEM разбираем один раз, а не на каждый encode/decode
+    return jwt.get_algorithm_by_name(settings.jwt.algorithm).prepare_key(
+        load_private_key()
+    )
+
+
+@lru_cache(maxsize=1)
+def _verifying_key():
+    return jwt.get_algorithm_by_name(settings.jwt.algorithm).prepare_key(
+        load_public_key()
+    )
+
+
 def _create_token(
     sub: str,
     *,
@@ -42,8 +144,7 @@ def _create_token(
         "exp": int((now + timedelta(minutes=ttl_minutes)).timestamp()),
         "type": token_type,
     }
-    private_key = load_private_key()
-    return jwt.encode(payload, private_key, algorithm=settings.jwt.algorithm)
+    return jwt.encode(payload, _signing_key(), algorithm=settings.jwt.algorithm)
 
 
 def create_access_token(sub: str) -> str:
@@ -59,6 +160,49 @@ def create_refresh_token(sub: str) -> str:
     )
 
 
+class VerifiedTokens:
+    """
+    Уже проверенные токены: sha256 токена -> payload, до его exp.
+    Подпись входит в токен, так что поддельный токен даёт другой ключ.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+
+    def get(self, digest: bytes) -> dict | None:
+        item = self._data.get(digest)
+        if item is None:
+            return None
+        exp, payload = item
+        if exp <= time.time():
+            del self._data[digest]
+            return None
+        self._data.move_to_end(digest)
+        return dict(payload)
+
+    def put(self, digest: bytes, payload: dict) -> None:
+        exp = payload.get("exp")
+        if not self.max_entries or not isinstance(exp, (int, float)):
+            return
+        self._data[digest] = (exp, dict(payload))
+        self._data.move_to_end(digest)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+verified_tokens = VerifiedTokens(settings.jwt.verified_cache_size)
+
+
 def decode_token(token: str) -> dict:
-    public_key = load_public_key()
-    return jwt.decode(token, public_key, algorithms=[settings.jwt.algorithm])
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = verified_tokens.get(digest)
+    if payload is None:
+        payload = jwt.decode(
+            token, _verifying_key(), algorithms=[settings.jwt.algorithm]
+        )
+        verified_tokens.put(digest, payload)
+    return payload
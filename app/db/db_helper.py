@@ -1,9 +1,108 @@
-from typing import AsyncGenerator
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Awaitable, Callable, Sequence
+from uuid import uuid4
 
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy import Result, make_url, text
+from sqlalchemy.exc import (
+    DataError,
+    DBAPIError,
+    IntegrityError,
+    ProgrammingError,
+    SQLAlchemyError,
+)
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
+from app.core import metrics
 from app.core.config import settings
+from app.db import pool_stats, read_routing, slow_queries
+
+
+log = logging.getLogger("db")
+
+_AFTER_COMMIT = "after_commit"
+_USER_ID = "user_id"
+# BEGIN READ ONLY: случайная запись через read-сессию упадёт и на primary
+_READONLY = {"postgresql_readonly": True}
+# ошибки самого запроса: на primary он упадёт так же, реплика ни при чём
+_STATEMENT_ERRORS = (DataError, IntegrityError, ProgrammingError)
+
+
+class Session(AsyncSession):
+    """AsyncSession с колбэками после успешного commit (инвалидация кэшей)."""
+
+    async def commit(self) -> None:
+        await super().commit()
+        user_id = self.info.get(_USER_ID)
+        if user_id is not None:
+            read_routing.note_write(user_id)
+        for hook in self.info.pop(_AFTER_COMMIT, ()):
+            await hook()
+
+    async def rollback(self) -> None:
+        self.info.pop(_AFTER_COMMIT, None)
+        await super().rollback()
+
+
+def on_commit(session: AsyncSession, hook: Callable[[], Awaitable[None]]) -> None:
+    """hook выполнится после commit сессии; rollback его отменяет."""
+    session.info.setdefault(_AFTER_COMMIT, []).append(hook)
+
+
+def bind_user(session: AsyncSession, user_id: int) -> None:
+    """Сессия пишет данные пользователя: её commit открывает ему окно
+    read-your-writes (app.db.read_routing) — чтения идут на primary."""
+    session.info[_USER_ID] = user_id
+
+
+def has_uncommitted(session: AsyncSession) -> bool:
+    """Есть ли в сессии изменения, которые ждут commit для колбэков."""
+    return bool(session.info.get(_AFTER_COMMIT))
+
+
+def as_dicts(result: Result) -> list[dict]:
+    """Строки результата как dict — pydantic-core проверяет dict вдвое
+    быстрее, чем RowMapping, а zip дешевле, чем mappings()."""
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result.all()]
+
+
+def table_columns(model, names: Sequence[str] | None = None) -> list:
+    """Колонки таблицы модели по именам; None — все (для ?fields=)."""
+    columns = model.__table__.c
+    return list(columns) if names is None else [columns[n] for n in names]
+
+
+class _Replica:
+    def __init__(self, name: str, engine: AsyncEngine, stats: pool_stats.PoolStats):
+        self.name = name
+        self.engine = engine
+        self.pool_stats = stats
+        self.session_factory = _session_factory(engine)
+        self.down_until = 0.0  # после ошибки соединения реплику пропускаем
+
+    @property
+    def down(self) -> bool:
+        return self.down_until > time.monotonic()
+
+
+def _session_factory(engine: AsyncEngine) -> async_sessionmaker[Session]:
+    return async_sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+        bind=engine,
+        class_=Session,
+    )
 
 
 class DataBaseHelper:
@@ -14,28 +113,153 @@ class DataBaseHelper:
         echo_pool: bool = False,
         max_overflow: int = 10,
         pool_size: int = 5,
+        pool_timeout: float = 30.0,
+        pgbouncer: bool = False,
+        replica_urls: Sequence[str] = (),
+        read_your_writes_s: float = 5.0,
+        replica_retry_s: float = 10.0,
     ):
-        self.engine = create_async_engine(
-            url=url,
+        self._engine_kwargs = dict(
             echo=echo,
             echo_pool=echo_pool,
             max_overflow=max_overflow,
             pool_size=pool_size,
+            pool_timeout=pool_timeout,
+            pgbouncer=pgbouncer,
         )
-        self.session_factory = async_sessionmaker(
-            autocommit=False,
-            autoflush=False,
-            expire_on_commit=False,
-            bind=self.engine,
+        self.engine, self.pool_stats = self._create_engine(url, **self._engine_kwargs)
+        self.session_factory = _session_factory(self.engine)
+
+        self.replicas = [
+            _Replica(
+                f"replica{i}", *self._create_engine(replica_url, **self._engine_kwargs)
+            )
+            for i, replica_url in enumerate(replica_urls)
+        ]
+        self._next_replica = itertools.count()
+        self.read_your_writes_s = read_your_writes_s
+        self.replica_retry_s = replica_retry_s
+
+    def _create_engine(
+        self,
+        url: str,
+        *,
+        echo: bool,
+        echo_pool: bool,
+        max_overflow: int,
+        pool_size: int,
+        pool_timeout: float,
+        pgbouncer: bool,
+    ) -> tuple[AsyncEngine, pool_stats.PoolStats]:
+        connect_args = {}
+        if pgbouncer:
+            # transaction pooling: соседние транзакции клиента попадают на
+            # разные серверные соединения, где нет наших prepared statements.
+            # Кэши выключаем, имена делаем уникальными — без коллизий между
+            # клиентами на одном серверном соединении
+            url = make_url(url).update_query_dict(
+                {"prepared_statement_cache_size": "0"}
+            )
+            connect_args = {
+                "statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        stats = pool_stats.PoolStats()
+        engine = create_async_engine(
+            url=url,
+            echo=echo,
+            echo_pool=echo_pool,
+            max_overflow=max_overflow,
+            pool_size=pool_size,
+            pool_timeout=pool_timeout,
+            poolclass=pool_stats.instrumented_pool(stats),
+            connect_args=connect_args,
         )
+        pool_stats.listen(engine, stats)
+        if settings.metrics.enabled and settings.metrics.db_queries:
+            metrics.listen_engine(engine)
+        if settings.slow_queries.threshold_ms > 0:
+            slow_queries.listen(engine, settings.slow_queries)
+        return engine, stats
 
     async def dispose(self) -> None:
         await self.engine.dispose()
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def ping(self, timeout: float) -> None:
+        """SELECT 1 с ограничением по времени — для readiness."""
+
+        async def select_one() -> None:
+            async with self.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        await asyncio.wait_for(select_one(), timeout)
 
     async def session_getter(self) -> AsyncGenerator[AsyncSession, None]:
         async with self.session_factory() as session:
             yield session
 
+    # --- чтение с реплик ---
+    async def _replica_session(self) -> tuple[_Replica, AsyncSession] | None:
+        """Сессия на первой живой реплике по кругу; None — все недоступны."""
+        now = time.monotonic()
+        start = next(self._next_replica)
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(start + i) % len(self.replicas)]
+            if replica.down:
+                continue
+            session = replica.session_factory()
+            try:
+                # соединение берём сразу: недоступную реплику видно здесь,
+                # а не посреди запроса ручки
+                await session.connection(execution_options=_READONLY)
+            except (OSError, SQLAlchemyError, asyncio.TimeoutError):
+                log.warning("replica %s unavailable, skipping", replica.name)
+                replica.down_until = now + self.replica_retry_s
+                await session.close()
+                continue
+            return replica, session
+        return None
+
+    @asynccontextmanager
+    async def read_session(
+        self, user_id: int | None = None
+    ) -> AsyncIterator[AsyncSession]:
+        """
+        Сессия только для чтения: на реплике, кроме окна read-your-writes
+        пользователя — тогда, как и при недоступности реплик, на primary.
+        Ошибка реплики посреди запроса помечает её недоступной и выходит
+        как ReplicaFailed: ReadRoutingMiddleware повторит запрос на primary.
+        """
+        picked = None
+        if (
+            self.replicas
+            and not read_routing.primary_only()
+            and not read_routing.wrote_recently(user_id, self.read_your_writes_s)
+        ):
+            picked = await self._replica_session()
+        if picked is None:
+            session = self.session_factory()
+            await session.connection(execution_options=_READONLY)
+            async with session:
+                yield session
+            return
+        replica, session = picked
+        async with session:
+            try:
+                yield session
+            except (OSError, DBAPIError) as e:
+                if isinstance(e, _STATEMENT_ERRORS):
+                    raise
+                log.warning(
+                    "replica %s failed, retry on primary: %r",
+                    replica.name,
+                    getattr(e, "orig", e),
+                )
+                replica.down_until = time.monotonic() + self.replica_retry_s
+                raise read_routing.ReplicaFailed(replica.name) from e
+
 
 async def get_session() -> AsyncSession:
     async for s in db_helper.session_getter():
@@ -52,4 +276,9 @@ db_helper = DataBaseHelper(
     echo_pool=settings.db.echo_pool,
     max_overflow=settings.db.max_overflow,
     pool_size=settings.db.pool_size,
+    pool_timeout=settings.db.pool_timeout,
+    pgbouncer=settings.db.pgbouncer,
+    replica_urls=[str(u) for u in settings.db.replica_urls],
+    read_your_writes_s=settings.db.read_your_writes_s,
+    replica_retry_s=settings.db.replica_retry_s,
 )
@@ -0,0 +1,354 @@
+"""
+Помесячные партиции transactions: RANGE по occurred_at, границы — месяцы
+UTC, те же, что у rollup_month, поэтому запрос за месяц читает одну
+партицию (см. in_months). Строки вне нарезанных месяцев (давняя выписка,
+дата из будущего) попадают в transactions_default; maintain заводит для
+них партиции и переносит строки туда.
+
+Партиция создаётся отдельной таблицей и подключается ATTACH PARTITION:
+родителю хватает SHARE UPDATE EXCLUSIVE, запись в другие месяцы не ждёт
+(CREATE TABLE ... PARTITION OF взял бы ACCESS EXCLUSIVE). Старые
+партиции отключаются DETACH PARTITION и остаются отдельными таблицами.
+DETACH ... CONCURRENTLY при default-партиции нельзя, поэтому короткий
+ACCESS EXCLUSIVE под lock_timeout: не дождались — повторим в следующий раз.
+
+Пока данные переносятся в партиционированную таблицу (миграции
+4c8e2a6f9b13 и 9e5b7d3c1a64, `python -m app.cli partitions-backfill`),
+партиционирована теневая transactions_p; всё здесь работает с той
+таблицей, что партиционирована сейчас.
+"""
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timezone
+from typing import Callable, Iterator
+
+from sqlalchemy import and_, func, select, text, true
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import PartitionConfig
+from app.core.models import Transaction
+
+log = logging.getLogger("db")
+
+PARENT = "transactions"
+SHADOW = "transactions_p"
+DEFAULT = "transactions_default"
+
+_MONTHLY = re.compile(rf"^{PARENT}_(\d{{4}})_(\d{{2}})$")
+_COLUMNS = ", ".join(c.name for c in Transaction.__table__.c)
+_MONTH = "date_trunc('month', occurred_at AT TIME ZONE 'UTC')::date"
+# одна обслуживающая транзакция на базу, сколько бы ни было воркеров
+_LOCK_KEY = 0x7472616E73
+
+
+def add_months(month: date, n: int) -> date:
+    y, m = divmod(month.year * 12 + month.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def months(first: date, last: date) -> Iterator[date]:
+    """Первые числа месяцев от first до last включительно."""
+    month = first.replace(day=1)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def month_start(month: date) -> datetime:
+    """Начало месяца в UTC — граница партиции."""
+    return datetime.combine(month.replace(day=1), time(), timezone.utc)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_{month:%Y_%m}"
+
+
+def in_months(
+    month_from: date | None = None,
+    month_to: date | None = None,
+    occurred_at=Transaction.occurred_at,
+):
+    """
+    occurred_at в месяцах [month_from, month_to] (None — без границы).
+    Диапазон по самой колонке: по нему Postgres отсекает партиции, а по
+    date_trunc('month', occurred_at) = :month — нет.
+    """
+    conds = []
+    if month_from is not None:
+        conds.append(occurred_at >= month_start(month_from))
+    if month_to is not None:
+        conds.append(occurred_at < month_start(add_months(month_to, 1)))
+    return and_(true(), *conds)
+
+
+def _literal(month: date) -> str:
+    # границы в DDL — только литералами
+    return f"'{month_start(month):%Y-%m-%d %H:%M:%S}+00'"
+
+
+async def partitioned_table(conn: AsyncConnection) -> str | None:
+    """transactions после переноса, transactions_p во время, None — до миграции."""
+    names = set(
+        await conn.scalars(
+            text(
+                """
+                SELECT c.relname
+                FROM pg_partitioned_table p
+                JOIN pg_class c ON c.oid = p.partrelid
+                WHERE c.relnamespace = current_schema()::regnamespace
+                  AND c.relname IN (:parent, :shadow)
+                """
+            ),
+            {"parent": PARENT, "shadow": SHADOW},
+        )
+    )
+    for name in (PARENT, SHADOW):
+        if name in names:
+            return name
+    return None
+
+
+async def attached_months(conn: AsyncConnection, parent: str) -> list[date]:
+    names = await conn.scalars(
+        text(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST(:parent AS regclass)
+            """
+        ),
+        {"parent": parent},
+    )
+    return sorted(
+        date(int(m[1]), int(m[2]), 1) for m in map(_MONTHLY.match, names) if m
+    )
+
+
+async def default_months(conn: AsyncConnection) -> list[date]:
+    """Месяцы строк, осевших в default-партиции."""
+    return list(
+        await conn.scalars(text(f"SELECT DISTINCT {_MONTH} FROM {DEFAULT} ORDER BY 1"))
+    )
+
+
+async def _exclusive(conn: AsyncConnection, *, wait: bool = False) -> bool:
+    """
+    Блокировка обслуживания до конца транзакции. Сессионная за pgbouncer
+    (transaction pooling) бралась бы и снималась на разных соединениях
+    сервера. wait=False — не ждать, False, если занято.
+    """
+    if wait:
+        await conn.execute(select(func.pg_advisory_xact_lock(_LOCK_KEY)))
+        return True
+    return await conn.scalar(select(func.pg_try_advisory_xact_lock(_LOCK_KEY)))
+
+
+async def _lock_timeout(conn: AsyncConnection, ms: int) -> None:
+    await conn.execute(text(f"SET LOCAL lock_timeout = {int(ms)}"))
+
+
+async def create_partition(
+    conn: AsyncConnection, parent: str, month: date, lock_timeout_ms: int
+) -> int:
+    """
+    Партиция месяца month; строки этого месяца из default переезжают в
+    неё. Вызывать в транзакции; возвращает число перенесённых строк.
+    """
+    name = partition_name(month)
+    lo, hi = _literal(month), _literal(add_months(month, 1))
+    await _lock_timeout(conn, lock_timeout_ms)
+    # вставки в default ждут до конца: строка этого месяца, пришедшая
+    # между переносом и ATTACH, провалила бы проверку default-партиции
+    await conn.execute(text(f"LOCK TABLE {DEFAULT} IN SHARE ROW EXCLUSIVE MODE"))
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS)"))
+    # CHECK по границам — ATTACH не сканирует новую таблицу
+    await conn.execute(
+        text(
+            f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds"
+            f" CHECK (occurred_at >= {lo} AND occurred_at < {hi})"
+        )
+    )
+    moved = await conn.execute(
+        text(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT}
+                WHERE occurred_at >= {lo} AND occurred_at < {hi}
+                RETURNING {_COLUMNS}
+            )
+            INSERT INTO {name} ({_COLUMNS}) SELECT {_COLUMNS} FROM moved
+            """
+        )
+    )
+    await conn.execute(
+        text(
+            f"ALTER TABLE {parent} ATTACH PARTITION {name}"
+            f" FOR VALUES FROM ({lo}) TO ({hi})"
+        )
+    )
+    await conn.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds"))
+    return moved.rowcount
+
+
+async def detach_partition(
+    conn: AsyncConnection, parent: str, month: date, lock_timeout_ms: int
+) -> None:
+    await _lock_timeout(conn, lock_timeout_ms)
+    await conn.execute(
+        text(f"ALTER TABLE {parent} DETACH PARTITION {partition_name(month)}")
+    )
+
+
+@dataclass
+class Maintenance:
+    created: list[date] = field(default_factory=list)
+    moved: int = 0  # строк из default в новые партиции
+    detached: list[date] = field(default_factory=list)
+
+
+async def maintain(
+    engine: AsyncEngine,
+    cfg: PartitionConfig,
+    *,
+    since: date | None = None,
+    today: date | None = None,
+) -> Maintenance:
+    """
+    Партиции с since (по умолчанию с текущего месяца) на premake_months
+    вперёд и для строк из default; старше retain_months — DETACH. Каждая
+    партиция — своя транзакция под блокировкой обслуживания; если её
+    держит другая сессия, maintain заканчивает проход.
+    """
+    report = Maintenance()
+    current = (today or datetime.now(timezone.utc).date()).replace(day=1)
+    first = current if since is None else min(current, since.replace(day=1))
+    async with engine.connect() as conn:
+        async with conn.begin():
+            if not await _exclusive(conn):
+                return report
+            parent = await partitioned_table(conn)
+            if parent is None:
+                return report
+            attached = set(await attached_months(conn, parent))
+            wanted = set(months(first, add_months(current, cfg.premake_months)))
+            wanted.update(await default_months(conn))
+        for month in sorted(wanted - attached):
+            async with conn.begin():
+                if not await _exclusive(conn):
+                    return report
+                # между транзакциями партицию мог завести другой воркер
+                if month in await attached_months(conn, parent):
+                    continue
+                report.moved += await create_partition(
+                    conn, parent, month, cfg.lock_timeout_ms
+                )
+            report.created.append(month)
+        if cfg.retain_months is not None:
+            oldest = add_months(current, -cfg.retain_months)
+            for month in sorted(attached.union(report.created)):
+                if month >= oldest:
+                    break
+                async with conn.begin():
+                    if not await _exclusive(conn):
+                        return report
+                    if month not in await attached_months(conn, parent):
+                        continue
+                    await detach_partition(conn, parent, month, cfg.lock_timeout_ms)
+                report.detached.append(month)
+    return report
+
+
+async def run_maintainer(engine: AsyncEngine, cfg: PartitionConfig) -> None:
+    while True:
+        try:
+            report = await maintain(engine, cfg)
+            if report.created or report.detached:
+                log.info(
+                    "partitions: created %s (moved %d rows), detached %s",
+                    [f"{m:%Y-%m}" for m in report.created],
+                    report.moved,
+                    [f"{m:%Y-%m}" for m in report.detached],
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception("partition maintenance failed")
+        await asyncio.sleep(cfg.interval_s)
+
+
+async def backfill(
+    engine: AsyncEngine,
+    cfg: PartitionConfig,
+    *,
+    from_id: int = 0,
+    pause_s: float = 0.0,
+    progress: Callable[[int, int, int], None] | None = None,
+) -> int:
+    """
+    Переносит строки transactions в теневую transactions_p пачками по
+    cfg.backfill_batch id, каждая пачка — своя короткая транзакция.
+    Новые и изменённые строки туда уже пишет триггер миграции, поэтому
+    хватает пройти id до max(id) на момент старта; повтор безопасен
+    (ON CONFLICT DO NOTHING), from_id — продолжить с места обрыва.
+
+    FOR SHARE держит строки пачки до её коммита: параллельный UPDATE или
+    DELETE ждёт, и его триггер уже видит скопированную строку; а пачка,
+    дождавшись чужого UPDATE, копирует новую версию.
+    progress(id, последний id, скопировано строк) — после каждой пачки.
+    """
+    async with engine.connect() as conn:
+        if await partitioned_table(conn) != SHADOW:
+            raise RuntimeError(
+                f"{SHADOW} is not there: nothing to backfill"
+                " (migration not applied yet, or already switched over)"
+            )
+        last = await conn.scalar(text(f"SELECT max(id) FROM {PARENT}")) or 0
+
+    copied, lo = 0, from_id
+    while lo < last:
+        hi = min(lo + cfg.backfill_batch, last)
+        bounds = {"lo": lo, "hi": hi}
+        async with engine.begin() as conn:
+            needed = set(
+                await conn.scalars(
+                    text(
+                        f"SELECT DISTINCT {_MONTH} FROM {PARENT}"
+                        " WHERE id > :lo AND id <= :hi"
+                    ),
+                    bounds,
+                )
+            )
+            needed.difference_update(await attached_months(conn, SHADOW))
+        for month in sorted(needed):
+            async with engine.begin() as conn:
+                # фоновый maintain тоже заводит партиции transactions_p
+                await _exclusive(conn, wait=True)
+                if month not in await attached_months(conn, SHADOW):
+                    await create_partition(conn, SHADOW, month, cfg.lock_timeout_ms)
+        async with engine.begin() as conn:
+            res = await conn.execute(
+                text(
+                    f"""
+                    INSERT INTO {SHADOW} ({_COLUMNS})
+                    SELECT {_COLUMNS} FROM {PARENT}
+                    WHERE id > :lo AND id <= :hi
+                    FOR SHARE
+                    ON CONFLICT DO NOTHING
+                    """
+                ),
+                bounds,
+            )
+        copied += res.rowcount
+        lo = hi
+        if progress is not None:
+            progress(lo, last, copied)
+        if pause_s:
+            await asyncio.sleep(pause_s)
+    # родителя партиций autovacuum не анализирует, а планировщику нужна его статистика
+    async with engine.begin() as conn:
+        await conn.execute(text(f"ANALYZE {SHADOW}"))
+    return copied
@@ -0,0 +1,82 @@
+"""
+Метрики пула соединений: ожидание checkout, занятые соединения,
+overflow и возраст соединений. Снимок — PoolStats.snapshot().
+"""
+
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+
+@dataclass
+class PoolStats:
+    checkouts: int = 0
+    timeouts: int = 0  # не дождались соединения за pool_timeout
+    connects: int = 0  # открыто новых соединений к БД
+    wait_total_s: float = 0.0
+    wait_max_s: float = 0.0
+    _born: dict[int, float] = field(default_factory=dict, repr=False)
+    _pool: Pool | None = field(default=None, repr=False)
+
+    def observe_checkout(self, wait_s: float) -> None:
+        self.checkouts += 1
+        self.wait_total_s += wait_s
+        self.wait_max_s = max(self.wait_max_s, wait_s)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        ages = [now - born for born in self._born.values()]
+        pool = self._pool
+        return {
+            "size": pool.size() if pool else 0,
+            "checked_out": pool.checkedout() if pool else 0,
+            "checked_in": pool.checkedin() if pool else 0,
+            "overflow": max(pool.overflow(), 0) if pool else 0,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "wait_avg_ms": (
+                self.wait_total_s / self.checkouts * 1000 if self.checkouts else 0.0
+            ),
+            "wait_max_ms": self.wait_max_s * 1000,
+            "connections": len(ages),
+            "age_max_s": max(ages, default=0.0),
+            "age_avg_s": sum(ages) / len(ages) if ages else 0.0,
+        }
+
+
+def instrumented_pool(stats: PoolStats) -> type[AsyncAdaptedQueuePool]:
+    """Класс пула, который меряет ожидание соединения в connect()."""
+
+    # recreate() при dispose создаёт пул через self.__class__ — stats сохранятся
+    class InstrumentedPool(AsyncAdaptedQueuePool):
+        def connect(self):
+            stats._pool = self
+            t0 = time.perf_counter()
+            try:
+                return super().connect()
+            except PoolTimeout:
+                stats.timeouts += 1
+                raise
+            finally:
+                stats.observe_checkout(time.perf_counter() - t0)
+
+    return InstrumentedPool
+
+
+def listen(engine: AsyncEngine, stats: PoolStats) -> None:
+    """Возраст соединений: connect/close событий пула."""
+    target = engine.sync_engine
+
+    @event.listens_for(target, "connect")
+    def on_connect(dbapi_connection, record) -> None:
+        stats.connects += 1
+        stats._born[id(record)] = time.monotonic()
+
+    @event.listens_for(target, "close")
+    def on_close(dbapi_connection, record) -> None:
+        stats._born.pop(id(record), None)
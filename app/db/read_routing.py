@@ -0,0 +1,150 @@
+"""
+Окно read-your-writes, общее для всех воркеров: commit с данными
+пользователя кладёт в ответ подписанную cookie с временем записи, и
+следующие запросы к любому воркеру по ней читают с primary, пока
+реплики догоняют. Время — настенные часы: у воркеров одной машины (или
+под NTP) они общие. Клиент, который не хранит cookie, окна не получает.
+
+Если реплика падает посреди запроса (обрыв соединения, конфликт с
+восстановлением), read-сессия поднимает ReplicaFailed, и middleware
+повторяет GET/HEAD на primary, пока ответ ещё не начат.
+"""
+
+import base64
+import hashlib
+import hmac
+import math
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+
+from starlette.requests import cookie_parser
+
+from app.core.security import load_private_key
+
+COOKIE_NAME = "ryw"
+_RETRY_METHODS = ("GET", "HEAD")
+
+# состояние текущего запроса: метка из cookie, запись в этом запросе и
+# повтор на primary
+_request: ContextVar[dict | None] = ContextVar("read_routing", default=None)
+
+
+@lru_cache(maxsize=1)
+def _key() -> bytes:
+    # общий у воркеров без отдельной настройки: выводится из ключа JWT
+    return hashlib.sha256(b"read-your-writes:" + load_private_key().encode()).digest()
+
+
+def _sign(payload: str) -> str:
+    mac = hmac.new(_key(), payload.encode(), hashlib.sha256).digest()[:16]
+    return base64.urlsafe_b64encode(mac).rstrip(b"=").decode()
+
+
+def encode_mark(user_id: int, written_at: float) -> str:
+    payload = f"{user_id}.{int(written_at * 1000)}"
+    return f"{payload}.{_sign(payload)}"
+
+
+def decode_mark(value: str) -> tuple[int, float] | None:
+    """(user_id, время записи); None — метка чужая или испорчена."""
+    payload, _, sig = value.rpartition(".")
+    if not payload or not hmac.compare_digest(sig, _sign(payload)):
+        return None
+    user_id, _, ms = payload.partition(".")
+    try:
+        return int(user_id), int(ms) / 1000
+    except ValueError:
+        return None
+
+
+class ReplicaFailed(Exception):
+    """Запрос к реплике упал; исходная ошибка — в __cause__."""
+
+
+def note_write(user_id: int) -> None:
+    """Commit с данными пользователя: ответ унесёт метку в cookie."""
+    state = _request.get()
+    if state is not None:
+        state["wrote"] = (user_id, time.time())
+
+
+def wrote_recently(user_id: int | None, window_s: float) -> bool:
+    state = _request.get()
+    if state is None or user_id is None:
+        return False
+    for mark in (state["wrote"], state["mark"]):
+        if mark is not None and mark[0] == user_id:
+            if time.time() - mark[1] < window_s:
+                return True
+    return False
+
+
+def primary_only() -> bool:
+    state = _request.get()
+    return state is not None and state["primary_only"]
+
+
+class ReadRoutingMiddleware:
+    def __init__(self, app, window_s: float, secure: bool, samesite: str):
+        self.app = app
+        self.cookie_attrs = (
+            f"Max-Age={math.ceil(window_s)}; Path=/; HttpOnly; SameSite={samesite}"
+            + ("; Secure" if secure else "")
+        )
+
+    def _mark(self, scope) -> tuple[int, float] | None:
+        for name, value in scope["headers"]:
+            if name == b"cookie":
+                mark = cookie_parser(value.decode("latin-1")).get(COOKIE_NAME)
+                return decode_mark(mark) if mark else None
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        state = {"mark": self._mark(scope), "wrote": None, "primary_only": False}
+        started = False
+        received = []
+
+        async def recording_receive():
+            message = await receive()
+            received.append(message)
+            return message
+
+        async def send_with_mark(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                if state["wrote"]:
+                    cookie = f"{COOKIE_NAME}={encode_mark(*state['wrote'])}; "
+                    message = {
+                        **message,
+                        "headers": [
+                            *message.get("headers", ()),
+                            (b"set-cookie", (cookie + self.cookie_attrs).encode()),
+                        ],
+                    }
+            await send(message)
+
+        token = _request.set(state)
+        try:
+            if scope["method"] not in _RETRY_METHODS:
+                await self.app(scope, receive, send_with_mark)
+                return
+            try:
+                await self.app(scope, recording_receive, send_with_mark)
+            except ReplicaFailed:
+                if started:
+                    raise
+                state["primary_only"] = True
+                # тело запроса уже прочитано — отдаём его повтору ещё раз
+                replay = iter(received)
+
+                async def replay_receive():
+                    return next(replay, None) or await receive()
+
+                await self.app(scope, replay_receive, send_with_mark)
+        finally:
+            _request.reset(token)
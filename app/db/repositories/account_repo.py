@@ -1,38 +1,107 @@
+from datetime import date, timedelta
 from decimal import Decimal
+from typing import Sequence
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import Select, select, update
+from sqlalchemy.orm import with_expression
 from app.core.models import Account, User
-from app.db.types import AccountType
+from app.db.db_helper import as_dicts, table_columns
+from app.db.repositories import balance_snapshots
+from app.db.repositories.ledger import pending_delta
+from app.db.types import AccountType, BalanceStep
+
+
+def _select_accounts():
+    return select(Account).options(
+        with_expression(Account.pending_delta, pending_delta())
+    )
+
+
+def _row_columns(names: Sequence[str] | None = None) -> list:
+    """Колонки для строк Core; balance — вместе с несвёрнутыми слотами."""
+    balance = (Account.balance + pending_delta()).label("balance")
+    return [
+        balance if c.key == "balance" else c
+        for c in table_columns(Account, names)
+    ]
+
+
+def _period_ends(date_from: date, date_to: date, step: BalanceStep) -> list[date]:
+    """Последние дни периодов (недели — ISO, пн–вс), крайние обрезаны по диапазону."""
+    ends = []
+    d = date_from
+    while d <= date_to:
+        if step == BalanceStep.week:
+            end = d + timedelta(days=6 - d.weekday())
+        elif step == BalanceStep.month:
+            end = (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+            end -= timedelta(days=1)
+        else:
+            end = d
+        end = min(end, date_to)
+        ends.append(end)
+        d = end + timedelta(days=1)
+    return ends
 
 
 class AccountRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def list_for_user(
-        self,
+    @staticmethod
+    def _list_query(
+        stmt: Select,
         user_id: int,
         include_archived: bool = False,
         limit: int = 100,
         offset: int = 0,
-    ) -> list[Account]:
+    ) -> Select:
         stmt = (
-            select(Account)
-            .where(Account.user_id == user_id)
+            stmt.where(Account.user_id == user_id)
             .order_by(Account.created_at.desc())
             .limit(limit)
             .offset(offset)
         )
         if not include_archived:
             stmt = stmt.where(Account.archived == False)
+        return stmt
+
+    async def list_for_user(self, user_id: int, **params) -> list[Account]:
+        stmt = self._list_query(_select_accounts(), user_id, **params)
         res = await self.session.execute(stmt)
         return list(res.scalars().all())
 
+    async def list_rows_for_user(
+        self, user_id: int, columns: Sequence[str] | None = None, **params
+    ) -> list[dict]:
+        """
+        Как list_for_user, но строками Core в dict; balance — уже с несвёрнутыми
+        слотами ledger (то же, что Account.current_balance). columns — только
+        эти колонки (None — все).
+        """
+        stmt = self._list_query(select(*_row_columns(columns)), user_id, **params)
+        return as_dicts(await self.session.execute(stmt))
+
+    async def get_row_owned(
+        self,
+        user_id: int,
+        account_id: int,
+        archived: bool = False,
+        columns: Sequence[str] | None = None,
+    ) -> dict | None:
+        stmt = select(*_row_columns(columns)).where(
+            Account.user_id == user_id,
+            Account.id == account_id,
+            Account.archived == archived,
+        )
+        rows = as_dicts(await self.session.execute(stmt))
+        return rows[0] if rows else None
+
     async def get_owned(
         self, user_id: int, account_id: int, archived: bool = False
     ) -> Account | None:
-        stmt = select(Account).where(
+        stmt = _select_accounts().where(
             Account.user_id == user_id,
             Account.id == account_id,
             Account.archived == archived,
@@ -40,6 +109,40 @@ class AccountRepository:
         res = await self.session.execute(stmt)
         return res.scalar_one_or_none()
 
+    async def balance_history(
+        self,
+        user_id: int,
+        account_id: int,
+        *,
+        date_from: date,
+        date_to: date,
+        step: BalanceStep,
+    ) -> tuple[Account, list[tuple[date, Decimal]]] | None:
+        """
+        Баланс на конец каждого периода: текущий баланс минус дневные
+        обороты после этого дня — O(дней после date_from), не O(транзакций).
+        """
+        stmt = _select_accounts().where(
+            Account.user_id == user_id, Account.id == account_id
+        )
+        acc = (await self.session.execute(stmt)).scalar_one_or_none()
+        if not acc:
+            return None
+        days = await balance_snapshots.day_deltas(
+            self.session, account_id, after=date_from
+        )
+
+        points = []
+        balance = acc.current_balance
+        i = 0
+        for end in reversed(_period_ends(date_from, date_to, step)):
+            while i < len(days) and days[i][0] > end:
+                balance -= days[i][1]
+                i += 1
+            points.append((end, balance))
+        points.reverse()
+        return acc, points
+
     async def create(
         self,
         *,
@@ -1,13 +1,16 @@
-from datetime import date, timedelta
+from datetime import date
 from decimal import Decimal
-from typing import Iterable
+from typing import Iterable, Sequence
 
 from pydantic.dataclasses import dataclass
 from sqlalchemy import select, delete, literal_column, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-from app.core.models import Budget, User, Transaction, Category
+from app.core.cache import VersionedCache, load_backend
+from app.core.config import settings
+from app.core.models import Budget, User, Category, CategoryMonthRollup
+from app.db.db_helper import as_dicts, has_uncommitted, on_commit, table_columns
 
 
 try:
@@ -18,6 +21,26 @@ except Exception:
     OUT = "out"
 
 
+# ответы GET /budgets/{month}: scope — user_id, ключ — (month, account_id)
+month_cache = VersionedCache(
+    load_backend(
+        settings.budget_cache.backend,
+        max_entries=settings.budget_cache.max_entries,
+        ttl_s=settings.budget_cache.ttl_s,
+    ),
+    enabled=settings.budget_cache.enabled,
+)
+
+
+def invalidate_month_cache(session: AsyncSession, user_id: int) -> None:
+    """Вызывают все, кто меняет бюджеты или транзакции пользователя."""
+
+    async def hook() -> None:
+        await month_cache.invalidate([user_id])
+
+    on_commit(session, hook)
+
+
 @dataclass
 class BudgetUpsertItem:
     category_id: int
@@ -38,6 +61,15 @@ class BudgetRepository:
         res = await self.session.execute(stmt)
         return res.scalar_one_or_none()
 
+    async def get_row_owned(
+        self, *, user_id: int, budget_id: int, columns: Sequence[str] | None = None
+    ) -> dict | None:
+        stmt = select(*table_columns(Budget, columns)).where(
+            Budget.id == budget_id, Budget.user_id == user_id
+        )
+        rows = as_dicts(await self.session.execute(stmt))
+        return rows[0] if rows else None
+
     async def create(
         self, *, user_id: int, category_id: int, amount: Decimal, month: date
     ) -> Budget:
@@ -49,6 +81,7 @@ class BudgetRepository:
         )
         self.session.add(obj)
         await self.session.flush()
+        invalidate_month_cache(self.session, user_id)
         return obj
 
     async def patch_owned(
@@ -70,6 +103,7 @@ class BudgetRepository:
         if month is not None:
             obj.month = self._first_of_month(month)
         await self.session.flush()
+        invalidate_month_cache(self.session, user_id)
         return obj
 
     async def delete_owned(self, *, user_id: int, budget_id: int) -> int:
@@ -79,7 +113,10 @@ class BudgetRepository:
             .returning(Budget.id)
         )
         res = await self.session.execute(stmt)
-        return len(res.fetchall())
+        deleted = len(res.fetchall())
+        if deleted:
+            invalidate_month_cache(self.session, user_id)
+        return deleted
 
     async def list_month_plans(self, *, user_id: int, month: date) -> list[Budget]:
         m = self._first_of_month(month)
@@ -138,27 +175,34 @@ class BudgetRepository:
             )
         )
         await self.session.execute(stmt)
+        invalidate_month_cache(self.session, user_id)
 
-    async def month_actuals_by_category(
+    def _month_actuals_stmt(
         self, *, user_id: int, month: date, account_id: int | None = None
-    ) -> dict[int, Decimal]:
-        m = self._first_of_month(month)
-        m_next = (m.replace(day=28) + timedelta(days=4)).replace(day=1)
+    ):
+        # факт — из месячных оборотов, без агрегата по транзакциям месяца
         conds = [
-            Transaction.user_id == user_id,
-            Transaction.direction == OUT,
-            Transaction.occurred_at >= m,
-            Transaction.occurred_at < m_next,
+            CategoryMonthRollup.user_id == user_id,
+            CategoryMonthRollup.month == self._first_of_month(month),
+            CategoryMonthRollup.direction == OUT,
         ]
         if account_id is not None:
-            conds.append(Transaction.account_id == account_id)
+            conds.append(CategoryMonthRollup.account_id == account_id)
 
-        stmt = (
+        return (
             select(
-                Transaction.category_id, func.coalesce(func.sum(Transaction.amount), 0)
+                CategoryMonthRollup.category_id,
+                func.coalesce(func.sum(CategoryMonthRollup.total), 0),
             )
             .where(and_(*conds))
-            .group_by(Transaction.category_id)
+            .group_by(CategoryMonthRollup.category_id)
+        )
+
+    async def month_actuals_by_category(
+        self, *, user_id: int, month: date, account_id: int | None = None
+    ) -> dict[int, Decimal]:
+        stmt = self._month_actuals_stmt(
+            user_id=user_id, month=month, account_id=account_id
         )
         res = await self.session.execute(stmt)
         data: dict[int, Decimal] = {}
@@ -169,6 +213,21 @@ class BudgetRepository:
 
     async def build_month_response(
         self, *, user_id: int, month: date, account_id: int | None = None
+    ) -> dict:
+        async def build() -> dict:
+            return await self._build_month_response(
+                user_id=user_id, month=month, account_id=account_id
+            )
+
+        # незакоммиченные изменения этой сессии в кэш попасть не должны
+        if has_uncommitted(self.session):
+            return await build()
+        return await month_cache.get_or_build(
+            user_id, (self._first_of_month(month), account_id), build
+        )
+
+    async def _build_month_response(
+        self, *, user_id: int, month: date, account_id: int | None = None
     ) -> dict:
         plans = await self.list_month_plans(user_id=user_id, month=month)
         actuals = await self.month_actuals_by_category(
@@ -203,3 +262,122 @@ class BudgetRepository:
                 "delta": total_planned - total_actual,
             },
         }
+
+    # --- Несколько месяцев сразу: план/факт по месяцам + год к году ---
+    @staticmethod
+    def _add_months(m: date, n: int) -> date:
+        y, mo = divmod(m.year * 12 + m.month - 1 + n, 12)
+        return date(y, mo + 1, 1)
+
+    async def list_range_plans(
+        self, *, user_id: int, month_from: date, month_to: date
+    ) -> list[Budget]:
+        stmt = (
+            select(Budget)
+            .where(
+                Budget.user_id == user_id,
+                Budget.month.between(month_from, month_to),
+            )
+            .order_by(Budget.month, Budget.category_id)
+        )
+        res = await self.session.execute(stmt)
+        return list(res.scalars())
+
+    async def range_actuals_by_category(
+        self,
+        *,
+        user_id: int,
+        month_from: date,
+        month_to: date,
+        account_id: int | None = None,
+    ) -> dict[tuple[date, int], Decimal]:
+        """(месяц, категория) -> факт; один запрос на весь диапазон."""
+        R = CategoryMonthRollup
+        conds = [
+            R.user_id == user_id,
+            R.month.between(month_from, month_to),
+            R.direction == OUT,
+            R.category_id.is_not(None),
+        ]
+        if account_id is not None:
+            conds.append(R.account_id == account_id)
+        # month у оборотов — date_trunc('month', occurred_at) в UTC
+        stmt = (
+            select(R.month, R.category_id, func.sum(R.total))
+            .where(and_(*conds))
+            .group_by(R.month, R.category_id)
+        )
+        res = await self.session.execute(stmt)
+        return {(m, int(cat_id)): Decimal(total) for m, cat_id, total in res.all()}
+
+    async def build_range_response(
+        self,
+        *,
+        user_id: int,
+        month_from: date,
+        month_to: date,
+        account_id: int | None = None,
+    ) -> dict:
+        month_from = self._first_of_month(month_from)
+        month_to = self._first_of_month(month_to)
+
+        async def build() -> dict:
+            return await self._build_range_response(
+                user_id=user_id,
+                month_from=month_from,
+                month_to=month_to,
+                account_id=account_id,
+            )
+
+        if has_uncommitted(self.session):
+            return await build()
+        return await month_cache.get_or_build(
+            user_id, ("range", month_from, month_to, account_id), build
+        )
+
+    async def _build_range_response(
+        self, *, user_id: int, month_from: date, month_to: date, account_id: int | None
+    ) -> dict:
+        plans = await self.list_range_plans(
+            user_id=user_id, month_from=month_from, month_to=month_to
+        )
+        # факт берём и за те же месяцы год назад — для сравнения год к году
+        actuals = await self.range_actuals_by_category(
+            user_id=user_id,
+            month_from=self._add_months(month_from, -12),
+            month_to=month_to,
+            account_id=account_id,
+        )
+
+        by_month: dict[date, list[Budget]] = {}
+        for p in plans:
+            by_month.setdefault(p.month, []).append(p)
+
+        zero = Decimal("0.00")
+        months: list[dict] = []
+        m = month_from
+        while m <= month_to:
+            prev = self._add_months(m, -12)
+            items: list[dict] = []
+            totals = dict.fromkeys(
+                ("planned", "actual", "delta", "actual_prev_year", "yoy_delta"), zero
+            )
+            for p in by_month.get(m, []):
+                planned = Decimal(p.amount)
+                actual = actuals.get((m, p.category_id), zero)
+                actual_prev = actuals.get((prev, p.category_id), zero)
+                item = {
+                    "category_id": p.category_id,
+                    "planned": planned,
+                    "actual": actual,
+                    "delta": planned - actual,
+                    "actual_prev_year": actual_prev,
+                    "yoy_delta": actual - actual_prev,
+                }
+                items.append(item)
+                for k in totals:
+                    totals[k] += item[k]
+            months.append({"month": m, "items": items, "totals": totals})
+            m = self._add_months(m, 1)
+
+        return {"month_from": month_from, "month_to": month_to, "months": months}
@@ -1,7 +1,10 @@
-from sqlalchemy import select, update, func, and_
+from typing import Sequence
+
+from sqlalchemy import Select, select, update, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.models import Category
+from app.db.db_helper import as_dicts, table_columns
 from app.db.types import CategoryKind
 
 
@@ -17,6 +20,16 @@ class CategoryRepository:
         res = await self.session.execute(stmt)
         return res.scalar_one_or_none()
 
+    async def get_row(
+        self, user_id: int, category_id: int, columns: Sequence[str] | None = None
+    ) -> dict | None:
+        stmt = select(*table_columns(Category, columns)).where(
+            Category.id == category_id,
+            Category.user_id == user_id,
+        )
+        rows = as_dicts(await self.session.execute(stmt))
+        return rows[0] if rows else None
+
     async def get_by_name_kind(
         self, user_id: int, name: str, kind: CategoryKind
     ) -> Category | None:
@@ -29,7 +42,7 @@ class CategoryRepository:
         res = await self.session.execute(stmt)
         return res.scalar_one_or_none()
 
-    async def list(
+    def _list_query(
         self,
         user_id: int,
         *,
@@ -39,7 +52,7 @@ class CategoryRepository:
         parent_id: str | None = None,
         limit: int = 50,
         offset: int = 0,
-    ) -> list[Category]:
+    ) -> Select:
         cond = [Category.user_id == user_id]
         if not include_archived:
             cond.append(Category.archived.is_(False))
@@ -52,16 +65,29 @@ class CategoryRepository:
             pattern = f"%{s}%"
             cond.append(Category.name.ilike(pattern, escape="\\"))
 
-        stmt = (
+        return (
             select(Category)
             .where(and_(*cond))
             .order_by(Category.created_at.desc(), Category.id.desc())
             .limit(limit)
             .offset(offset)
         )
-        res = await self.session.execute(stmt)
+
+    async def list(self, user_id: int, **params) -> list[Category]:
+        res = await self.session.execute(self._list_query(user_id, **params))
         return list(res.scalars().all())
 
+    async def list_rows(
+        self, user_id: int, columns: Sequence[str] | None = None, **params
+    ) -> "list[dict]":
+        """
+        Как list, но строками Core в dict, без ORM-объектов; columns —
+        только эти колонки (None — все).
+        """
+        stmt = self._list_query(user_id, **params)
+        stmt = stmt.with_only_columns(*table_columns(Category, columns))
+        return as_dicts(await self.session.execute(stmt))
+
     async def create(
         self,
         *,
@@ -0,0 +1,332 @@
+import asyncio
+from datetime import timedelta
+from itertools import islice
+from typing import Awaitable, Callable, Iterable
+
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    Numeric,
+    SmallInteger,
+    String,
+    DateTime,
+    Table,
+    and_,
+    case,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ENUM
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.models import Account, Category, ImportJob, Transaction
+from app.db.repositories import balance_snapshots, ledger, rollups
+from app.db.repositories.budget import invalidate_month_cache
+from app.db.repositories.transaction_repo import (
+    InsufficientFunds,
+    NotFound,
+    ValidationError,
+)
+from app.db.types import CategoryKind, Direction, ImportFormat, ImportStatus
+from app.utils.statement_parser import ImportRecord
+
+# временная таблица живёт до конца транзакции импорта (ON COMMIT DROP),
+# поэтому держим её в отдельной MetaData — ни create_all, ни alembic её не видят
+_stage = Table(
+    "tx_import_stage",
+    MetaData(),
+    Column("line_no", Integer),
+    Column("account_id", Integer),
+    Column("category_id", Integer),
+    Column("direction", ENUM(Direction, name="direction", create_type=False)),
+    Column("amount", Numeric(14, 2)),
+    Column("note", String(500)),
+    Column("occurred_at", DateTime(timezone=True)),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+_STAGE_COLUMNS = list(ImportRecord._fields)
+
+
+class ImportJobRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create(
+        self,
+        *,
+        user_id: int,
+        account_id: int | None,
+        format_: ImportFormat,
+        filename: str | None,
+    ) -> ImportJob:
+        job = ImportJob(
+            user_id=user_id,
+            account_id=account_id,
+            format=format_,
+            filename=filename,
+            status=ImportStatus.pending,
+            rows_parsed=0,
+            rows_imported=0,
+        )
+        self.session.add(job)
+        await self.session.flush()
+        return job
+
+    async def get_owned(self, user_id: int, job_id: int) -> ImportJob | None:
+        stmt = select(ImportJob).where(
+            ImportJob.id == job_id, ImportJob.user_id == user_id
+        )
+        res = await self.session.execute(stmt)
+        return res.scalar_one_or_none()
+
+    async def set_state(
+        self,
+        job_id: int,
+        *,
+        status: ImportStatus | None = None,
+        rows_parsed: int | None = None,
+        rows_imported: int | None = None,
+        error: str | None = None,
+    ) -> None:
+        values: dict = {"updated_at": func.now()}
+        if status is not None:
+            values["status"] = status
+            if status in (ImportStatus.done, ImportStatus.failed):
+                values["finished_at"] = func.now()
+        if rows_parsed is not None:
+            values["rows_parsed"] = rows_parsed
+        if rows_imported is not None:
+            values["rows_imported"] = rows_imported
+        if error is not None:
+            values["error"] = error[:500]
+        await self.session.execute(
+            update(ImportJob).where(ImportJob.id == job_id).values(**values)
+        )
+
+    async def fail_stale(self, user_id: int, stale_after_s: float) -> int:
+        """
+        pending/running без heartbeat дольше stale_after_s — воркер умер
+        (рестарт, OOM) и задачу уже никто не доведёт: помечаем failed.
+        """
+        res = await self.session.execute(
+            update(ImportJob)
+            .where(
+                ImportJob.user_id == user_id,
+                ImportJob.status.in_((ImportStatus.pending, ImportStatus.running)),
+                ImportJob.updated_at < func.now() - timedelta(seconds=stale_after_s),
+            )
+            .values(
+                status=ImportStatus.failed,
+                error="import worker stopped",
+                finished_at=func.now(),
+                updated_at=func.now(),
+            )
+        )
+        return res.rowcount
+
+
+class TransactionImporter:
+    """
+    Массовая загрузка выписки: COPY пачками во временную таблицу,
+    затем set-based проверки, один INSERT ... SELECT и одно обновление
+    баланса на каждый затронутый счёт. Всё — в одной транзакции сессии.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        *,
+        chunk_size: int = 10_000,
+        enforce_non_negative: bool = True,
+    ):
+        self.session = session
+        self.user_id = user_id
+        self.chunk_size = chunk_size
+        self.enforce_non_negative = enforce_non_negative
+
+    async def run(
+        self,
+        records: Iterable[ImportRecord],
+        on_progress: Callable[[int], Awaitable[None]] | None = None,
+    ) -> int:
+        conn = await self.session.connection()
+        await conn.run_sync(_stage.create)
+        raw = (await conn.get_raw_connection()).driver_connection
+
+        it = iter(records)
+        parsed = 0
+        while True:
+            # разбор файла — синхронный CPU, не держим на нём event loop
+            chunk = await asyncio.to_thread(list, islice(it, self.chunk_size))
+            if not chunk:
+                break
+            await raw.copy_records_to_table(
+                _stage.name, records=chunk, columns=_STAGE_COLUMNS
+            )
+            parsed += len(chunk)
+            if on_progress:
+                await on_progress(parsed)
+
+        if not parsed:
+            return 0
+        await self._validate()
+        inserted = await self._insert()
+        await self._apply_balances()
+        await self._record_totals()
+        return inserted
+
+    async def _first_bad_line(self, stmt) -> tuple[int, int] | None:
+        stmt = stmt.order_by(_stage.c.line_no).limit(1)
+        row = (await self.session.execute(stmt)).first()
+        return tuple(row) if row else None
+
+    async def _validate(self) -> None:
+        bad = await self._first_bad_line(
+            select(_stage.c.line_no, _stage.c.account_id)
+            .outerjoin(
+                Account,
+                and_(
+                    Account.id == _stage.c.account_id,
+                    Account.user_id == self.user_id,
+                    Account.archived == False,
+                ),
+            )
+            .where(Account.id.is_(None))
+        )
+        if bad:
+            raise NotFound(f"line {bad[0]}: account {bad[1]}")
+
+        bad = await self._first_bad_line(
+            select(_stage.c.line_no, _stage.c.category_id)
+            .outerjoin(
+                Category,
+                and_(
+                    Category.id == _stage.c.category_id,
+                    Category.user_id == self.user_id,
+                    Category.archived == False,
+                ),
+            )
+            .where(_stage.c.category_id.is_not(None), Category.id.is_(None))
+        )
+        if bad:
+            raise NotFound(f"line {bad[0]}: category {bad[1]}")
+
+        bad = await self._first_bad_line(
+            select(_stage.c.line_no, _stage.c.category_id)
+            .join(Category, Category.id == _stage.c.category_id)
+            .where(
+                or_(
+                    and_(
+                        _stage.c.direction == Direction.outgoing,
+                        Category.kind != CategoryKind.expense,
+                    ),
+                    and_(
+                        _stage.c.direction == Direction.incoming,
+                        Category.kind != CategoryKind.income,
+                    ),
+                )
+            )
+        )
+        if bad:
+            raise ValidationError(f"line {bad[0]}: category {bad[1]} kind mismatch")
+
+    async def _insert(self) -> int:
+        cols = [
+            "account_id",
+            "category_id",
+            "direction",
+            "amount",
+            "note",
+            "occurred_at",
+        ]
+        stmt = insert(Transaction).from_select(
+            ["user_id", *cols],
+            select(literal(self.user_id), *(_stage.c[c] for c in cols)),
+        )
+        res = await self.session.execute(stmt)
+        return res.rowcount
+
+    async def _apply_balances(self) -> None:
+        if self.enforce_non_negative:
+            # несвёрнутые слоты ledger-режима — в баланс, проверка ниже по полному
+            account_ids = await self.session.scalars(
+                select(_stage.c.account_id).distinct()
+            )
+            await ledger.fold(self.session, list(account_ids), self.user_id)
+
+        deltas = (
+            select(
+                _stage.c.account_id,
+                func.sum(
+                    case(
+                        (_stage.c.direction == Direction.incoming, _stage.c.amount),
+                        else_=-_stage.c.amount,
+                    )
+                ).label("delta"),
+            )
+            .group_by(_stage.c.account_id)
+            .subquery()
+        )
+        stmt = (
+            update(Account)
+            .where(Account.id == deltas.c.account_id, Account.user_id == self.user_id)
+            .values(balance=Account.balance + deltas.c.delta)
+        )
+        if self.enforce_non_negative:
+            # проверяем итоговый баланс счёта после всей выписки, а не каждую строку
+            stmt = stmt.where(Account.balance + deltas.c.delta >= 0)
+        res = await self.session.execute(stmt)
+
+        accounts = await self.session.scalar(
+            select(func.count(func.distinct(_stage.c.account_id)))
+        )
+        if res.rowcount != accounts:
+            raise InsufficientFunds()
+
+    async def _record_totals(self) -> None:
+        day = balance_snapshots.snapshot_day(_stage.c.occurred_at)
+        await self.session.execute(
+            balance_snapshots.upsert_stmt(
+                select(
+                    _stage.c.account_id,
+                    day,
+                    literal(0, SmallInteger),
+                    func.sum(
+                        balance_snapshots.signed_amount(
+                            _stage.c.direction, _stage.c.amount
+                        )
+                    ),
+                )
+                .group_by(_stage.c.account_id, day)
+                .order_by(_stage.c.account_id, day)
+            )
+        )
+        month = rollups.rollup_month(_stage.c.occurred_at)
+        key = (_stage.c.account_id, _stage.c.category_id, month, _stage.c.direction)
+        await self.session.execute(
+            rollups.upsert_stmt(
+                select(
+                    literal(self.user_id),
+                    *key,
+                    literal(0, SmallInteger),
+                    func.sum(_stage.c.amount),
+                    func.count(),
+                )
+                .group_by(*key)
+                # порядок ключей — как в rollups.record
+                .order_by(
+                    _stage.c.account_id,
+                    func.coalesce(_stage.c.category_id, 0),
+                    month,
+                    _stage.c.direction,
+                )
+            )
+        )
+        invalidate_month_cache(self.session, self.user_id)
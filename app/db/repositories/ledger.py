@@ -0,0 +1,290 @@
+"""
+Ledger-режим баланса: вместо UPDATE одной строки accounts изменения
+раскладываются по N слотам счёта (account_balance_slots).
+
+- пополнение — upsert в случайный слот, строка счёта не блокируется;
+- списание — из слота, где хватает средств: сначала любой незанятый
+  (SKIP LOCKED), потом с ожиданием; если не хватает ни в одном —
+  fold и условный UPDATE счёта, как без ledger-режима;
+- компактор периодически сворачивает слоты в Account.balance и снова
+  раскладывает часть остатка по слотам — резерв под списания.
+
+Все слоты держатся неотрицательными: отрицательные изменения в слот
+не пишутся, а списание из слота идёт только при delta >= amount.
+Поэтому balance + sum(slots) >= 0, пока balance >= 0 — проверка
+«не уйти в минус» остаётся честной.
+
+Блокировки всегда берутся в порядке: слоты (по account_id, slot),
+потом строка счёта.
+"""
+
+import asyncio
+import logging
+import random
+from collections import defaultdict
+from decimal import ROUND_DOWN, Decimal
+from typing import Collection
+
+from sqlalchemy import (
+    Integer,
+    Numeric,
+    SmallInteger,
+    Select,
+    column,
+    func,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import LedgerConfig
+from app.core.models import Account, AccountBalanceSlot
+
+log = logging.getLogger("ledger")
+
+Slot = AccountBalanceSlot
+_CENT = Decimal("0.01")
+
+
+def pending_delta(account_id=Account.id):
+    """Сумма ещё не свёрнутых изменений — коррелированный подзапрос для чтения."""
+    return (
+        select(func.coalesce(func.sum(Slot.delta), 0))
+        .where(Slot.account_id == account_id)
+        .scalar_subquery()
+    )
+
+
+def put_stmt(rows: Select):
+    """rows: (account_id, slot, delta). Возвращает account_id как id."""
+    stmt = pg_insert(Slot).from_select(["account_id", "slot", "delta"], rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[Slot.account_id, Slot.slot],
+        set_={"delta": Slot.delta + stmt.excluded.delta, "dirty": True},
+    ).returning(Slot.account_id.label("id"))
+
+
+def take_stmt(
+    account_id: int, amount: Decimal, slots: int, *where, skip_locked: bool = True
+):
+    """
+    Списание из слота с достаточной суммой. Старт перебора случайный,
+    чтобы конкурирующие писатели расходились по разным слотам.
+    Без skip_locked слот выбирается без блокировки, и UPDATE ждёт только
+    его: FOR UPDATE с LIMIT держал бы и строки, не прошедшие перепроверку.
+    """
+    start = random.randrange(slots)
+    pick = (
+        select(Slot.id)
+        .join(Account, Account.id == Slot.account_id)
+        .where(
+            Slot.account_id == account_id,
+            Slot.delta >= amount,
+            # счёт сам в минусе (после списаний без проверки) — только через fold
+            Account.balance >= 0,
+            *where,
+        )
+        .order_by((Slot.slot + slots - start) % slots)
+        .limit(1)
+    )
+    if skip_locked:
+        pick = pick.with_for_update(of=Slot, skip_locked=True)
+    pick = pick.scalar_subquery()
+    return (
+        update(Slot)
+        .where(Slot.id == pick, Slot.delta >= amount)
+        .values(delta=Slot.delta - amount, dirty=True)
+        .returning(Slot.account_id.label("id"))
+    )
+
+
+async def put(session: AsyncSession, deltas: dict[int, Decimal], slots: int) -> None:
+    # по порядку счетов — как вставляет недостающие слоты компактор
+    data = [(a, random.randrange(slots), deltas[a]) for a in sorted(deltas)]
+    if not data:
+        return
+    v = values(
+        column("account_id", Integer),
+        column("slot", SmallInteger),
+        column("delta", Numeric(14, 2)),
+        name="d",
+    ).data(data)
+    await session.execute(put_stmt(select(v.c.account_id, v.c.slot, v.c.delta)))
+
+
+async def try_locked(session: AsyncSession, stmt, ok=lambda row: row is not None):
+    """
+    Запрос, который может ждать блокировку слота или счёта, — в savepoint'е.
+    Если UPDATE дождался строки, но она не прошла перепроверку, блокировка
+    на ней остаётся; откат savepoint'а её снимает, иначе следующий fold
+    возьмёт блокировки не по порядку. Возвращает первую строку результата.
+    """
+    sp = await session.begin_nested()
+    row = (await session.execute(stmt)).first()
+    if ok(row):
+        await sp.commit()
+    else:
+        await sp.rollback()
+    return row
+
+
+async def take(
+    session: AsyncSession, account_id: int, amount: Decimal, slots: int, *where
+) -> bool:
+    stmt = take_stmt(account_id, amount, slots, *where)
+    if (await session.execute(stmt)).first() is not None:
+        return True
+    stmt = take_stmt(account_id, amount, slots, *where, skip_locked=False)
+    return await try_locked(session, stmt) is not None
+
+
+def _lock_slots(account_ids):
+    # один порядок блокировок для всех, кто берёт несколько слотов сразу;
+    # FOR UPDATE только на слоты — на accounts он конфликтовал бы с FK-проверками
+    return (
+        select(Slot.id, Slot.account_id, Slot.slot, Slot.delta)
+        .where(Slot.account_id.in_(account_ids))
+        .order_by(Slot.account_id, Slot.slot)
+        .with_for_update(of=Slot)
+    )
+
+
+async def fold(
+    session: AsyncSession, account_ids: Collection[int], user_id: int | None = None
+) -> None:
+    """Сворачивает слоты счетов в Account.balance; строки счетов остаются заблокированы."""
+    if not account_ids:
+        return
+    owned = select(Account.id).where(Account.id.in_(account_ids))
+    if user_id is not None:
+        owned = owned.where(Account.user_id == user_id)
+    # блокировки — отдельным запросом: в одном statement'е с UPDATE
+    # порядок обхода строк выбирает планировщик
+    rows = (await session.execute(_lock_slots(owned))).all()
+    sums: dict[int, Decimal] = defaultdict(Decimal)
+    for _, account_id, _, delta in rows:
+        sums[account_id] += delta
+    ids = [slot_id for slot_id, *_, delta in rows if delta]
+    if not ids:
+        return
+    await session.execute(
+        update(Slot).where(Slot.id.in_(ids)).values(delta=0, dirty=True)
+    )
+    v = values(
+        column("id", Integer), column("delta", Numeric(14, 2)), name="f"
+    ).data([(a, d) for a, d in sums.items() if d])
+    await session.execute(
+        update(Account)
+        .where(Account.id == v.c.id)
+        .values(balance=Account.balance + v.c.delta)
+    )
+
+
+async def compact(
+    session: AsyncSession, cfg: LedgerConfig, *, dirty_only: bool = True
+) -> int:
+    """
+    Один проход компактора: слоты изменившихся счетов сворачиваются
+    в Account.balance, и reserve_ratio остатка снова раскладывается
+    по слотам поровну. Возвращает число счетов.
+
+    Компактор ничего не ждёт: занятые писателями слоты и счета (SKIP LOCKED)
+    остаются dirty до следующего прохода. Иначе, ожидая слоты по очереди,
+    он держал бы уже взятые — и останавливал все списания горячего счёта.
+    """
+    q = select(Slot.account_id).distinct().limit(cfg.compact_batch)
+    # без dirty_only — все счета с ненулевыми слотами (свернуть всё при reserve_ratio=0)
+    q = q.where(Slot.dirty if dirty_only else Slot.delta != 0)
+    ids = sorted(await session.scalars(q))
+    if not ids:
+        return 0
+
+    # недостающие слоты — заранее, пока ничего не заблокировано; только
+    # отсутствующие: ON CONFLICT ждёт и строки, которые сейчас обновляют
+    q = select(Slot.account_id, Slot.slot).where(Slot.account_id.in_(ids))
+    exist = set((await session.execute(q)).all())
+    missing = [
+        {"account_id": a, "slot": s, "delta": 0, "dirty": False}
+        for a in ids
+        for s in range(cfg.slots)
+        if (a, s) not in exist
+    ]
+    if missing:
+        await session.execute(
+            pg_insert(Slot)
+            .values(missing)
+            .on_conflict_do_nothing(index_elements=[Slot.account_id, Slot.slot])
+        )
+
+    pending: dict[int, Decimal] = defaultdict(Decimal)
+    have: dict[int, list[int]] = defaultdict(list)
+    locked = _lock_slots(ids).with_for_update(of=Slot, skip_locked=True)
+    for _, account_id, slot, delta in await session.execute(locked):
+        pending[account_id] += delta
+        have[account_id].append(slot)
+    if not pending:
+        return len(ids)
+
+    # баланс ниже пишется абсолютным значением — строку держим до конца.
+    # key_share без read — это FOR NO KEY UPDATE: конфликтует с прямыми
+    # списаниями (UPDATE accounts), но не с FK-проверками (KEY SHARE)
+    balances = await session.execute(
+        select(Account.id, Account.balance)
+        .where(Account.id.in_(pending))
+        .with_for_update(key_share=True, skip_locked=True)
+    )
+    ratio = Decimal(str(cfg.reserve_ratio))
+    new_balances, new_slots = [], []
+    for account_id, balance in balances:
+        total = balance + pending[account_id]
+        # резерв делится только между слотами, которые удалось взять
+        reserved = [s for s in have[account_id] if s < cfg.slots]
+        share = Decimal(0)
+        if total > 0 and reserved:
+            share = (total * ratio / cfg.slots).quantize(_CENT, rounding=ROUND_DOWN)
+        new_balances.append((account_id, total - share * len(reserved)))
+        # слоты сверх cfg.slots (после его уменьшения) обнуляются
+        new_slots += [
+            (account_id, s, share if s < cfg.slots else 0) for s in have[account_id]
+        ]
+    if not new_balances:
+        return len(ids)
+
+    v = values(
+        column("id", Integer), column("balance", Numeric(14, 2)), name="b"
+    ).data(new_balances)
+    await session.execute(
+        update(Account).where(Account.id == v.c.id).values(balance=v.c.balance)
+    )
+    v = values(
+        column("account_id", Integer),
+        column("slot", SmallInteger),
+        column("delta", Numeric(14, 2)),
+        name="s",
+    ).data(new_slots)
+    await session.execute(
+        update(Slot)
+        .where(Slot.account_id == v.c.account_id, Slot.slot == v.c.slot)
+        .values(delta=v.c.delta, dirty=False)
+    )
+    return len(ids)
+
+
+async def run_compactor(
+    session_factory: async_sessionmaker[AsyncSession], cfg: LedgerConfig
+) -> None:
+    while True:
+        try:
+            while True:
+                async with session_factory() as session:
+                    n = await compact(session, cfg)
+                    await session.commit()
+                if n < cfg.compact_batch:
+                    break
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception("ledger compaction failed")
+        await asyncio.sleep(cfg.compact_interval_s)
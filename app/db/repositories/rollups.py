@@ -0,0 +1,216 @@
+"""
+Месячные обороты по категориям (category_month_rollups): сумма и число
+транзакций на (пользователь, счёт, категория, месяц, направление).
+Пишутся в той же транзакции, что и сами транзакции; изменение транзакции —
+минус её старый ключ, плюс новый. Для расхождений — check и rebuild.
+"""
+
+import random
+from collections.abc import Collection
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import (
+    Date,
+    Integer,
+    Numeric,
+    Row,
+    Select,
+    SmallInteger,
+    and_,
+    cast,
+    column,
+    delete,
+    func,
+    literal,
+    or_,
+    select,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ENUM
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.models import Account, CategoryMonthRollup, Transaction
+from app.db.partitions import in_months
+from app.db.repositories.balance_snapshots import day_of
+from app.db.types import Direction
+
+Rollup = CategoryMonthRollup
+
+# (account_id, category_id, month, direction)
+RollupKey = tuple[int, int | None, date, Direction]
+
+_KEY = ("user_id", "account_id", "category_id", "month", "direction")
+
+
+def rollup_month(occurred_at=Transaction.occurred_at):
+    """Месяц транзакции (UTC) — SQL-вариант month_of."""
+    return cast(func.date_trunc("month", func.timezone("UTC", occurred_at)), Date)
+
+
+def month_of(occurred_at: datetime) -> date:
+    return day_of(occurred_at).replace(day=1)
+
+
+def upsert_stmt(rows: Select):
+    """rows: поля _KEY, slot, total, count."""
+    stmt = pg_insert(Rollup).from_select([*_KEY, "slot", "total", "count"], rows)
+    return stmt.on_conflict_do_update(
+        constraint="uq__category_month_rollups__key",
+        set_={
+            "total": Rollup.total + stmt.excluded.total,
+            "count": Rollup.count + stmt.excluded.count,
+        },
+    )
+
+
+def _from_transactions(*where) -> Select:
+    month = rollup_month()
+    return (
+        select(
+            Transaction.user_id,
+            Transaction.account_id,
+            Transaction.category_id,
+            month.label("month"),
+            Transaction.direction,
+            func.sum(Transaction.amount).label("total"),
+            func.count().label("count"),
+        )
+        .where(*where)
+        .group_by(
+            Transaction.user_id,
+            Transaction.account_id,
+            Transaction.category_id,
+            month,
+            Transaction.direction,
+        )
+    )
+
+
+def _order(item):
+    (account_id, category_id, month, direction), _ = item
+    return account_id, category_id or 0, month, direction
+
+
+async def record(
+    session: AsyncSession,
+    user_id: int,
+    changes: dict[RollupKey, tuple[Decimal, int]],
+    slots: int = 0,
+) -> None:
+    """changes: ключ -> (изменение суммы, изменение числа транзакций)."""
+    # по порядку ключей — один порядок блокировок для всех писателей
+    data = [
+        (user_id, *key, random.randrange(slots) if slots else 0, total, count)
+        for key, (total, count) in sorted(changes.items(), key=_order)
+        if total or count
+    ]
+    if not data:
+        return
+    v = values(
+        column("user_id", Integer),
+        column("account_id", Integer),
+        column("category_id", Integer),
+        column("month", Date),
+        column("direction", ENUM(Direction, name="direction", create_type=False)),
+        column("slot", SmallInteger),
+        column("total", Numeric(14, 2)),
+        column("count", Integer),
+        name="r",
+    ).data(data)
+    # VALUES из одних NULL Postgres считает text — категорию приводим явно
+    rows = select(*(cast(c, Integer) if c.key == "category_id" else c for c in v.c))
+    await session.execute(upsert_stmt(rows))
+
+
+def check_stmt(
+    user_ids: Collection[int] | None = None, since: date | None = None
+) -> Select:
+    """
+    Ключи, где обороты расходятся с агрегатом по transactions; since —
+    только месяцы с этого (транзакции читаются из их партиций).
+    """
+    r = select(
+        *(Rollup.__table__.c[k] for k in _KEY),
+        func.sum(Rollup.total).label("total"),
+        func.sum(Rollup.count).label("count"),
+    ).group_by(*(Rollup.__table__.c[k] for k in _KEY))
+    t = _from_transactions()
+    if user_ids is not None:
+        r = r.where(Rollup.user_id.in_(user_ids))
+        t = t.where(Transaction.user_id.in_(user_ids))
+    if since is not None:
+        r = r.where(Rollup.month >= since)
+        t = t.where(in_months(since))
+    r, t = r.subquery("r"), t.subquery("t")
+
+    # FULL JOIN умеет только равенство (hash/merge): NULL-категорию — в 0
+    on = and_(
+        *(
+            func.coalesce(r.c[k], 0) == func.coalesce(t.c[k], 0)
+            if k == "category_id"
+            else r.c[k] == t.c[k]
+            for k in _KEY
+        )
+    )
+    return (
+        select(
+            *(func.coalesce(r.c[k], t.c[k]).label(k) for k in _KEY),
+            func.coalesce(r.c.total, 0).label("rollup_total"),
+            func.coalesce(t.c.total, 0).label("actual_total"),
+            func.coalesce(r.c.count, 0).label("rollup_count"),
+            func.coalesce(t.c.count, 0).label("actual_count"),
+        )
+        .select_from(r.join(t, on, full=True))
+        .where(
+            or_(
+                func.coalesce(r.c.total, 0) != func.coalesce(t.c.total, 0),
+                func.coalesce(r.c.count, 0) != func.coalesce(t.c.count, 0),
+            )
+        )
+        .order_by(*_KEY)
+    )
+
+
+async def check(
+    session: AsyncSession,
+    user_ids: Collection[int] | None = None,
+    since: date | None = None,
+) -> list[Row]:
+    return list((await session.execute(check_stmt(user_ids, since))).all())
+
+
+async def rebuild(
+    session: AsyncSession, user_ids: Collection[int], since: date | None = None
+) -> int:
+    """
+    Пересчитывает обороты пользователей из транзакций (since — только
+    месяцы с этого); возвращает число строк. Счета берутся FOR UPDATE —
+    как в balance_snapshots.backfill, параллельная запись транзакций по
+    ним ждёт конца пересчёта.
+    """
+    await session.execute(
+        select(Account.id)
+        .where(Account.user_id.in_(user_ids))
+        .order_by(Account.id)
+        .with_for_update()
+    )
+    stale = delete(Rollup).where(Rollup.user_id.in_(user_ids))
+    if since is not None:
+        stale = stale.where(Rollup.month >= since)
+    await session.execute(stale)
+    t = _from_transactions(
+        Transaction.user_id.in_(user_ids), in_months(since)
+    ).subquery()
+    res = await session.execute(
+        upsert_stmt(
+            select(
+                *(t.c[k] for k in _KEY),
+                literal(0, SmallInteger),
+                t.c.total,
+                t.c.count,
+            )
+        )
+    )
+    return res.rowcount
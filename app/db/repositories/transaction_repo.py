@@ -1,11 +1,42 @@
-from datetime import datetime
+import random
+import re
+from collections import defaultdict
+from dataclasses import asdict
+from datetime import date, datetime
 from decimal import Decimal
-
-from sqlalchemy import select, or_, and_, desc, update
+from typing import AsyncIterator, Iterable, Sequence
+
+from pydantic.dataclasses import dataclass
+from sqlalchemy import (
+    Integer,
+    Row,
+    Select,
+    Numeric,
+    SmallInteger,
+    column,
+    select,
+    or_,
+    and_,
+    desc,
+    exists,
+    func,
+    insert,
+    literal,
+    literal_column,
+    true,
+    union_all,
+    update,
+    values,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.models import Account, Category, Transaction
-from app.db.types import Direction, CategoryKind
+from app.core.models.transaction import NOTE_FTS_CONFIG, note_document
+from app.db.db_helper import as_dicts, table_columns
+from app.db.repositories import balance_snapshots, ledger, rollups
+from app.db.repositories.budget import invalidate_month_cache
+from app.db.types import Direction, CategoryKind, TransactionSort
 from app.utils.cursor import decode_cursor, encode_cursor
 
 
@@ -24,10 +55,56 @@ class Conflict(Exception): ...
 class ValidationError(Exception): ...
 
 
+_WORD = re.compile(r"\w+")
+_FTS_CONFIG = literal_column(f"'{NOTE_FTS_CONFIG}'::regconfig")
+# сколько строк в порядке сортировки просматривает первая (дешёвая) попытка поиска
+SEARCH_PROBE_ROWS = 5000
+
+
+def _escape_like(s: str) -> str:
+    return s.replace("%", r"\%").replace("_", r"\_")
+
+
+def _search_condition(search: str, note=Transaction.note):
+    """
+    Совпадение по префиксам слов: 'кофе мол' -> 'кофе:* & мол:*'.
+    В слова попадают только \\w, поэтому операторы tsquery из ввода не пролезут.
+    """
+    words = _WORD.findall(search.lower())
+    if not words:
+        # в строке нет ни одного слова (одни знаки) — ищем подстрокой
+        return note.ilike(f"%{_escape_like(search.strip())}%", escape="\\")
+    tsq = func.to_tsquery(_FTS_CONFIG, " & ".join(f"{w}:*" for w in words))
+    # ILIKE — дешёвый предфильтр, to_tsvector считается только для прошедших
+    return and_(
+        *(note.ilike(f"%{_escape_like(w)}%", escape="\\") for w in words),
+        note_document(note).op("@@")(tsq),
+    )
+
+
+@dataclass
+class TransactionCreateItem:
+    account_id: int
+    category_id: int | None
+    direction: Direction
+    amount: Decimal
+    note: str | None
+    occurred_at: datetime
+
+
 class TransactionRepository:
-    def __init__(self, session: AsyncSession, enforce_non_negative: bool = False):
+    def __init__(
+        self,
+        session: AsyncSession,
+        enforce_non_negative: bool = False,
+        ledger_slots: int | None = None,
+    ):
         self.session = session
         self.enforce_non_negative = enforce_non_negative
+        # 0 — балансы пишутся прямо в accounts
+        if ledger_slots is None:
+            ledger_slots = settings.ledger.slots if settings.ledger.enabled else 0
+        self.ledger_slots = ledger_slots
 
     async def _ensure_account(self, user_id: int, account_id: int) -> Account:
         q = select(Account).where(
@@ -55,7 +132,49 @@ class TransactionRepository:
             raise NotFound("category")
         return cat
 
+    @staticmethod
+    def _check_category_kind(direction: Direction, kind: CategoryKind) -> None:
+        if direction == Direction.outgoing and kind != CategoryKind.expense:
+            raise ValidationError("expense category required for outgoing tx")
+        if direction == Direction.incoming and kind != CategoryKind.income:
+            raise ValidationError("income category required for incoming tx")
+
+    async def _apply_balance_deltas(
+        self, user_id: int, deltas: dict[int, Decimal]
+    ) -> None:
+        """Один UPDATE ... FROM (VALUES ...) на все затронутые счета."""
+        data = [(acc_id, d) for acc_id, d in deltas.items() if d]
+        if self.ledger_slots:
+            # пополнения — в слоты, списания (уже проверенные) — в сам счёт
+            await ledger.put(
+                self.session, {a: d for a, d in data if d > 0}, self.ledger_slots
+            )
+            data = [(a, d) for a, d in data if d < 0]
+        if not data:
+            return
+        v = values(
+            column("account_id", Integer), column("delta", Numeric(14, 2)), name="d"
+        ).data(data)
+        stmt = (
+            update(Account)
+            .where(Account.id == v.c.account_id, Account.user_id == user_id)
+            .values(balance=Account.balance + v.c.delta)
+        )
+        await self.session.execute(stmt)
+
     async def _apply_balance_delta(self, user_id: int, account_id: int, delta: Decimal):
+        if self.ledger_slots:
+            if delta > 0:
+                await ledger.put(self.session, {account_id: delta}, self.ledger_slots)
+                return
+            if delta < 0 and await ledger.take(
+                self.session,
+                account_id,
+                -delta,
+                self.ledger_slots,
+                Account.user_id == user_id,
+            ):
+                return
 
         stmt = (
             update(Account)
@@ -65,10 +184,44 @@ class TransactionRepository:
         if self.enforce_non_negative and delta < 0:
             stmt = stmt.where(Account.balance >= -delta)
 
+        if self.ledger_slots and self.enforce_non_negative and delta < 0:
+            if await ledger.try_locked(self.session, stmt.returning(Account.id)):
+                return
+            # ни в слотах, ни на счёте не хватило — сворачиваем слоты
+            # и проверяем по полному балансу под блокировкой
+            await ledger.fold(self.session, [account_id], user_id)
+
         result = await self.session.execute(stmt)
         if result.rowcount != 1:
             raise InsufficientFunds()
 
+    async def _record_totals(
+        self,
+        user_id: int,
+        changes: Iterable[tuple[int, int, int | None, Direction, Decimal, datetime]],
+    ):
+        """
+        Дневные обороты счетов и месячные по категориям — после баланса:
+        их строки блокируются последними. changes: (знак, счёт, категория,
+        направление, сумма, occurred_at); -1 — транзакция ушла из ключа.
+        """
+        days: dict[tuple[int, date], Decimal] = defaultdict(Decimal)
+        months: dict[rollups.RollupKey, list] = defaultdict(lambda: [Decimal(0), 0])
+        for sign, account_id, category_id, direction, amount, occurred_at in changes:
+            delta = amount if direction == Direction.incoming else -amount
+            days[account_id, balance_snapshots.day_of(occurred_at)] += sign * delta
+            key = (account_id, category_id, rollups.month_of(occurred_at), direction)
+            months[key][0] += sign * amount
+            months[key][1] += sign
+        await balance_snapshots.record(self.session, days, self.ledger_slots)
+        await rollups.record(
+            self.session,
+            user_id,
+            {k: (total, count) for k, (total, count) in months.items()},
+            self.ledger_slots,
+        )
+        invalidate_month_cache(self.session, user_id)
+
     async def get(self, user_id: int, tx_id: int) -> Transaction:
         q = select(Transaction).where(
             Transaction.id == tx_id, Transaction.user_id == user_id
@@ -78,12 +231,22 @@ class TransactionRepository:
             raise NotFound("transaction")
         return tx
 
-    async def list(
-        self,
-        user_id: str,
+    async def get_row(
+        self, user_id: int, tx_id: int, columns: Sequence[str] | None = None
+    ) -> dict:
+        q = select(*table_columns(Transaction, columns)).where(
+            Transaction.id == tx_id, Transaction.user_id == user_id
+        )
+        rows = as_dicts(await self.session.execute(q))
+        if not rows:
+            raise NotFound("transaction")
+        return rows[0]
+
+    @staticmethod
+    def _apply_filters(
+        q: Select,
+        user_id: int,
         *,
-        limit: int = 50,
-        cursor: str | None = None,
         account_id: int | None = None,
         category_id: int | None = None,
         direction: Direction | None = None,
@@ -92,11 +255,8 @@ class TransactionRepository:
         min_amount: Decimal | None = None,
         max_amount: Decimal | None = None,
         search: str | None = None,
-    ) -> tuple[list[Transaction], str | None]:
-        limit = min(max(limit, 1), 100)
-
-        q = select(Transaction).where(Transaction.user_id == user_id)
-
+    ) -> Select:
+        q = q.where(Transaction.user_id == user_id)
         if account_id:
             q = q.where(Transaction.account_id == account_id)
         if category_id:
@@ -112,26 +272,242 @@ class TransactionRepository:
         if max_amount is not None:
             q = q.where(Transaction.amount <= max_amount)
         if search:
-            q = q.where(Transaction.note.ilike(f"%{search}%"))
+            q = q.where(_search_condition(search))
+        return q
+
+    async def stream(
+        self,
+        user_id: int,
+        *,
+        batch_size: int = 1000,
+        sort: TransactionSort = TransactionSort.created_at,
+        **filters,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Вся история пользователя пачками по batch_size строк через
+        серверный курсор; фильтры — те же, что у list. Строки — Core Row,
+        без identity map.
+        """
+        q = self._apply_filters(select(*Transaction.__table__.c), user_id, **filters)
+        key = getattr(Transaction, sort.value)
+        q = q.order_by(desc(key), desc(Transaction.id))
+        result = await self.session.stream(q.execution_options(yield_per=batch_size))
+        try:
+            async for part in result.partitions():
+                yield part
+        finally:
+            await result.close()
+
+    @staticmethod
+    def _search_window(base: Select, key, search: str, n: int):
+        """
+        Первые n совпадений по (key DESC, id DESC) среди строк base; base —
+        select(id, key AS k) с уже наложенными фильтрами, без сортировки.
+
+        Планировщик не знает, насколько часто встречается слово, и для
+        ORDER BY ... LIMIT выбирает проход по индексу сортировки с фильтром —
+        на редком слове это скан всей истории. Поэтому сначала смотрим
+        SEARCH_PROBE_ROWS первых строк (хватает для частых слов), и только
+        если там набралось меньше n, берём все совпадения из GIN-индекса.
+        Одним запросом: вторая ветка отсекается One-Time Filter'ом.
+        """
+        scanned = (
+            base.add_columns(Transaction.note)
+            .order_by(desc(key), desc(Transaction.id))
+            .limit(SEARCH_PROBE_ROWS)
+            .subquery("scanned")
+        )
+        probe = (
+            select(scanned.c.id, scanned.c.k)
+            .where(_search_condition(search, scanned.c.note))
+            .order_by(desc(scanned.c.k), desc(scanned.c.id))
+            .limit(n)
+            .cte("probe")
+            .prefix_with("MATERIALIZED")
+        )
+        found = select(func.count()).select_from(probe).scalar_subquery()
+        # MATERIALIZED и без ORDER BY — чтобы совпадения брались по GIN
+        matched = (
+            base.where(found < n, _search_condition(search))
+            .cte("matched")
+            .prefix_with("MATERIALIZED")
+        )
+        top = (
+            select(matched.c.id, matched.c.k)
+            .order_by(desc(matched.c.k), desc(matched.c.id))
+            .limit(n)
+            .subquery("top")
+        )
+        return union_all(
+            select(probe.c.id, probe.c.k).where(found >= n),
+            select(top.c.id, top.c.k),
+        ).subquery("hits")
+
+    def _search_query(
+        self,
+        user_id: int,
+        query: str,
+        *,
+        limit: int,
+        rank_window: int,
+        highlight: tuple[str, str] | None = None,
+    ) -> Select:
+        base = select(
+            Transaction.id, Transaction.occurred_at.label("k")
+        ).where(Transaction.user_id == user_id)
+        hits = self._search_window(base, Transaction.occurred_at, query, rank_window)
+
+        tsq = func.to_tsquery(
+            _FTS_CONFIG,
+            " & ".join(f"{w}:*" for w in _WORD.findall(query.lower())),
+        )
+        rank = func.ts_rank(note_document(Transaction.note), tsq).label("rank")
+        if highlight:
+            start, stop = highlight
+            # PG вычисляет дорогие функции списка выборки после Sort/Limit,
+            # так что headline строится только для отданных строк
+            headline = func.ts_headline(
+                _FTS_CONFIG,
+                Transaction.note,
+                tsq,
+                f'StartSel="{start}", StopSel="{stop}", HighlightAll=true',
+            )
+        else:
+            headline = literal_column("NULL")
+        return (
+            select(Transaction, rank, headline)
+            .join(hits, hits.c.id == Transaction.id)
+            .order_by(desc(rank), desc(hits.c.k), desc(hits.c.id))
+            .limit(limit)
+        )
+
+    async def search(
+        self,
+        user_id: int,
+        query: str,
+        *,
+        limit: int = 20,
+        rank_window: int = 200,
+        highlight: tuple[str, str] | None = None,
+    ) -> "list[tuple[Transaction, float, str | None]]":
+        """
+        Поиск по заметкам с ранжированием (ts_rank) по префиксам слов.
+        Ранжируются rank_window самых свежих совпадений; highlight —
+        (StartSel, StopSel) для ts_headline.
+        """
+        if not _WORD.search(query):
+            return []
+        stmt = self._search_query(
+            user_id,
+            query,
+            limit=limit,
+            rank_window=rank_window,
+            highlight=highlight,
+        )
+        res = await self.session.execute(stmt)
+        return [tuple(row) for row in res.all()]
+
+    def _list_query(
+        self,
+        user_id: int,
+        *,
+        limit: int,
+        cursor: str | None = None,
+        sort: TransactionSort = TransactionSort.created_at,
+        search: str | None = None,
+        **filters,
+    ) -> Select:
+        key = getattr(Transaction, sort.value)
+        q = self._apply_filters(
+            select(Transaction.id, key.label("k")), user_id, **filters
+        )
 
         if cursor:
-            ca, cid = decode_cursor(cursor)
+            cursor_sort, value, cid = decode_cursor(cursor)
+            if cursor_sort != sort.value:
+                raise ValueError("Cursor does not match sort")
             q = q.where(
-                or_(
-                    Transaction.created_at < ca,
-                    and_(Transaction.created_at == ca, Transaction.id < cid),
-                )
+                or_(key < value, and_(key == value, Transaction.id < cid))
             )
 
-        q = q.order_by(desc(Transaction.created_at), desc(Transaction.id)).limit(
-            limit + 1
+        if search:
+            hits = self._search_window(q, key, search, limit + 1)
+            return (
+                select(Transaction)
+                .join(hits, hits.c.id == Transaction.id)
+                .order_by(desc(hits.c.k), desc(hits.c.id))
+            )
+        q = q.with_only_columns(Transaction)
+        return q.order_by(desc(key), desc(Transaction.id)).limit(limit + 1)
+
+    async def list(
+        self,
+        user_id: str,
+        *,
+        limit: int = 50,
+        cursor: str | None = None,
+        sort: TransactionSort = TransactionSort.created_at,
+        account_id: int | None = None,
+        category_id: int | None = None,
+        direction: Direction | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        min_amount: Decimal | None = None,
+        max_amount: Decimal | None = None,
+        search: str | None = None,
+    ) -> tuple[list[Transaction], str | None]:
+        limit = min(max(limit, 1), 100)
+
+        q = self._list_query(
+            user_id,
+            limit=limit,
+            cursor=cursor,
+            sort=sort,
+            account_id=account_id,
+            category_id=category_id,
+            direction=direction,
+            date_from=date_from,
+            date_to=date_to,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            search=search,
         )
         res = (await self.session.execute(q)).scalars().all()
 
         next_cursor = None
         if len(res) > limit:
             last = res[limit - 1]
-            next_cursor = encode_cursor(last.created_at, last.id)
+            next_cursor = encode_cursor(getattr(last, sort.value), last.id, sort.value)
+            res = res[:limit]
+        return res, next_cursor
+
+    async def list_rows(
+        self,
+        user_id: int,
+        *,
+        limit: int = 50,
+        cursor: str | None = None,
+        sort: TransactionSort = TransactionSort.created_at,
+        columns: Sequence[str] | None = None,
+        **filters,
+    ) -> "tuple[list[dict], str | None]":
+        """
+        Та же страница, что у list (фильтры — те же), но строками Core в
+        dict: без ORM-объектов и identity map — для ответа, который сразу
+        уходит в JSON. columns — только эти колонки (None — все).
+        """
+        limit = min(max(limit, 1), 100)
+        if columns is not None:
+            # id и ключ сортировки нужны для курсора
+            columns = list(dict.fromkeys([*columns, "id", sort.value]))
+        q = self._list_query(user_id, limit=limit, cursor=cursor, sort=sort, **filters)
+        q = q.with_only_columns(*table_columns(Transaction, columns))
+        res = as_dicts(await self.session.execute(q))
+
+        next_cursor = None
+        if len(res) > limit:
+            last = res[limit - 1]
+            next_cursor = encode_cursor(last[sort.value], last["id"], sort.value)
             res = res[:limit]
         return res, next_cursor
 
@@ -151,10 +527,7 @@ class TransactionRepository:
 
         # category kind ↔ direction совместимость
         if cat:
-            if direction == Direction.outgoing and cat.kind != CategoryKind.expense:
-                raise ValidationError("expense category required for outgoing tx")
-            if direction == Direction.incoming and cat.kind != CategoryKind.income:
-                raise ValidationError("income category required for incoming tx")
+            self._check_category_kind(direction, cat.kind)
 
         tx = Transaction(
             user_id=user_id,
@@ -168,29 +541,267 @@ class TransactionRepository:
         self.session.add(tx)
         await self.session.flush()
 
-        if self.enforce_non_negative and direction == Direction.outgoing:
-            stmt = (
-                update(Account)
+        delta = amount if direction == Direction.incoming else -amount
+        await self._apply_balance_delta(user_id, acc.id, delta)
+        await self._record_totals(
+            user_id, [(1, acc.id, category_id, direction, amount, occurred_at)]
+        )
+        return tx
+
+    def _create_fast_stmt(
+        self,
+        user_id: int,
+        *,
+        account_id: int,
+        category_id: int | None,
+        direction: Direction,
+        amount: Decimal,
+        note: str | None,
+        occurred_at: datetime,
+        slots: int,
+        skip_locked: bool = True,
+    ) -> Select:
+        if direction == Direction.outgoing:
+            kind, delta = CategoryKind.expense, -amount
+        else:
+            kind, delta = CategoryKind.income, amount
+
+        acc = (
+            select(Account.id)
+            .where(
+                Account.id == account_id,
+                Account.user_id == user_id,
+                Account.archived == False,
+            )
+            .cte("acc")
+        )
+        acc_ok = exists(select(acc.c.id))
+        if category_id is None:
+            cat_ok = kind_ok = true()
+        else:
+            cat = (
+                select(Category.kind)
                 .where(
-                    Account.id == acc.id,
-                    Account.user_id == user_id,
-                    Account.balance >= amount,
+                    Category.id == category_id,
+                    Category.user_id == user_id,
+                    Category.archived == False,
                 )
-                .values(balance=Account.balance - amount)
+                .cte("cat")
+            )
+            cat_ok = exists(select(cat.c.kind))
+            kind_ok = exists(select(cat.c.kind).where(cat.c.kind == kind))
+
+        if slots and delta > 0:
+            upd = ledger.put_stmt(
+                select(
+                    acc.c.id,
+                    literal(random.randrange(slots), SmallInteger),
+                    literal(delta, Numeric(14, 2)),
+                ).where(cat_ok, kind_ok)
+            )
+        elif slots:
+            upd = ledger.take_stmt(
+                account_id,
+                amount,
+                slots,
+                Account.user_id == user_id,
+                Account.archived == False,
+                cat_ok,
+                kind_ok,
+                skip_locked=skip_locked,
             )
-            result = await self.session.execute(stmt)
-            if result.rowcount != 1:
-                raise InsufficientFunds()
         else:
-            delta = amount if direction == Direction.incoming else -amount
-            stmt = (
+            upd = (
                 update(Account)
-                .where(Account.id == acc.id, Account.user_id == user_id)
+                .where(
+                    Account.id == account_id,
+                    Account.user_id == user_id,
+                    Account.archived == False,
+                    cat_ok,
+                    kind_ok,
+                )
                 .values(balance=Account.balance + delta)
+                .returning(Account.id)
+            )
+            if self.enforce_non_negative and direction == Direction.outgoing:
+                # условие перепроверяется под блокировкой строки — гонок нет
+                upd = upd.where(Account.balance >= amount)
+        upd = upd.cte("upd")
+
+        cols = Transaction.__table__.c
+        ins = (
+            insert(Transaction)
+            .from_select(
+                [
+                    "user_id",
+                    "account_id",
+                    "category_id",
+                    "direction",
+                    "amount",
+                    "note",
+                    "occurred_at",
+                ],
+                select(
+                    literal(user_id, cols.user_id.type),
+                    upd.c.id,
+                    literal(category_id, cols.category_id.type),
+                    literal(direction, cols.direction.type),
+                    literal(amount, cols.amount.type),
+                    literal(note, cols.note.type),
+                    literal(occurred_at, cols.occurred_at.type),
+                ),
             )
-            await self.session.execute(stmt)
+            .returning(*cols)
+            .cte("ins")
+        )
+        chk = select(
+            acc_ok.label("acc_ok"), cat_ok.label("cat_ok"), kind_ok.label("kind_ok")
+        ).cte("chk")
+        return select(chk, ins).select_from(chk.outerjoin(ins, true()))
 
-        return tx
+    async def create_fast(
+        self,
+        user_id: int,
+        *,
+        account_id: int,
+        category_id: int | None,
+        direction: Direction,
+        amount: Decimal,
+        note: str | None,
+        occurred_at: datetime,
+    ) -> Transaction:
+        """
+        То же, что create, но одним запросом: проверки счёта и категории,
+        INSERT и условный UPDATE баланса — CTE в одном statement'е.
+        Вставка идёт только из строки, которую вернул UPDATE, так что
+        транзакция без списания (или списание без транзакции) невозможны.
+        В ledger-режиме UPDATE идёт по слоту счёта.
+        """
+        params = dict(
+            account_id=account_id,
+            category_id=category_id,
+            direction=direction,
+            amount=amount,
+            note=note,
+            occurred_at=occurred_at,
+        )
+        # в ledger-режиме списание пробует: незанятый слот, любой слот
+        # с ожиданием блокировки, сам счёт и, если и там не хватает,
+        # счёт после fold — по полному балансу
+        attempts = [dict(slots=0)]
+        if self.ledger_slots:
+            attempts[:0] = [dict(slots=self.ledger_slots)]
+            if direction == Direction.outgoing:
+                attempts[1:1] = [dict(slots=self.ledger_slots, skip_locked=False)]
+                if self.enforce_non_negative:
+                    # неудачный UPDATE счёта тоже оставляет блокировку — в savepoint
+                    attempts[2:] = [
+                        dict(slots=0, savepoint=True),
+                        dict(slots=0, fold=True),
+                    ]
+
+        for attempt in attempts:
+            if attempt.pop("fold", False):
+                await ledger.fold(self.session, [account_id], user_id)
+            savepoint = attempt.pop("savepoint", attempt.get("skip_locked") is False)
+            stmt = self._create_fast_stmt(user_id, **params, **attempt)
+            if savepoint:
+                row = await ledger.try_locked(
+                    self.session, stmt, ok=lambda r: r.id is not None
+                )
+            else:
+                row = (await self.session.execute(stmt)).one()
+            if row.id is not None or not (row.acc_ok and row.cat_ok and row.kind_ok):
+                break
+
+        if not row.acc_ok:
+            raise NotFound("account")
+        if not row.cat_ok:
+            raise NotFound("category")
+        if not row.kind_ok:
+            kind = (
+                CategoryKind.expense
+                if direction == Direction.outgoing
+                else CategoryKind.income
+            )
+            raise ValidationError(
+                f"{kind.value} category required for {direction.name} tx"
+            )
+        if row.id is None:
+            raise InsufficientFunds()
+        await self._record_totals(
+            user_id, [(1, account_id, category_id, direction, amount, occurred_at)]
+        )
+        cols = Transaction.__table__.c
+        return Transaction(**{c.key: row._mapping[c.key] for c in cols})
+
+    async def create_many(
+        self, user_id: int, items: "list[TransactionCreateItem]"
+    ) -> "list[Transaction]":
+        """
+        Пакетное создание: по одному IN-запросу на счета и категории,
+        один многострочный INSERT ... RETURNING и один UPDATE балансов.
+        Коммит/откат — целиком на вызывающей стороне.
+        """
+        if not items:
+            return []
+
+        account_ids = {i.account_id for i in items}
+        if self.enforce_non_negative:
+            # проверка ниже идёт по Account.balance — слоты сворачиваем заранее
+            await ledger.fold(self.session, account_ids, user_id)
+        q = select(Account.id, Account.balance).where(
+            Account.user_id == user_id,
+            Account.id.in_(account_ids),
+            Account.archived == False,
+        )
+        if self.enforce_non_negative:
+            # держим строки счетов до коммита, чтобы проверка остатка была честной
+            q = q.with_for_update()
+        balances: dict[int, Decimal] = dict((await self.session.execute(q)).all())
+        if account_ids - balances.keys():
+            raise NotFound("account")
+
+        category_ids = {i.category_id for i in items if i.category_id is not None}
+        kinds: dict[int, CategoryKind] = {}
+        if category_ids:
+            q = select(Category.id, Category.kind).where(
+                Category.user_id == user_id,
+                Category.id.in_(category_ids),
+                Category.archived == False,
+            )
+            kinds = dict((await self.session.execute(q)).all())
+            if category_ids - kinds.keys():
+                raise NotFound("category")
+
+        # остаток проверяем в порядке элементов пакета — как при поштучном создании
+        deltas: dict[int, Decimal] = defaultdict(Decimal)
+        for item in items:
+            if item.category_id is not None:
+                self._check_category_kind(item.direction, kinds[item.category_id])
+            delta = item.amount if item.direction == Direction.incoming else -item.amount
+            deltas[item.account_id] += delta
+            if (
+                self.enforce_non_negative
+                and delta < 0
+                and balances[item.account_id] + deltas[item.account_id] < 0
+            ):
+                raise InsufficientFunds()
+
+        rows = [{"user_id": user_id, **asdict(item)} for item in items]
+        res = await self.session.scalars(
+            insert(Transaction).values(rows).returning(Transaction)
+        )
+        txs = list(res.all())
+        await self._apply_balance_deltas(user_id, deltas)
+        await self._record_totals(
+            user_id,
+            (
+                (1, i.account_id, i.category_id, i.direction, i.amount, i.occurred_at)
+                for i in items
+            ),
+        )
+        return txs
 
     async def update(
         self,
@@ -214,6 +825,8 @@ class TransactionRepository:
         old_account_id = tx.account_id
         old_direction = tx.direction
         old_amount = tx.amount
+        old_category_id = tx.category_id
+        old_occurred_at = tx.occurred_at
 
         if direction and direction != old_direction:
             raise Conflict("changing direction is not allowed")
@@ -264,15 +877,24 @@ class TransactionRepository:
             )
             await self._apply_balance_delta(user_id, new_account_id, delta_new)
 
+        old = (
+            old_account_id,
+            old_category_id,
+            old_direction,
+            old_amount,
+            old_occurred_at,
+        )
+        new = (new_account_id, tx.category_id, tx.direction, new_amount, tx.occurred_at)
+        if new != old:
+            # перенос задним числом сдвигает баланс всех дней между старой
+            # и новой датой — это следует из оборотов двух дней
+            await self._record_totals(user_id, [(-1, *old), (1, *new)])
         return tx
 
     async def delete(self, user_id: int, tx_id: int) -> None:
         tx = await self.get(user_id, tx_id)
         delta = (-tx.amount) if tx.direction == Direction.incoming else (+tx.amount)
-        stmt = (
-            update(Account)
-            .where(Account.id == tx.account_id, Account.user_id == user_id)
-            .values(balance=Account.balance + delta)
-        )
-        await self.session.execute(stmt)
+        await self._apply_balance_delta(user_id, tx.account_id, delta)
+        key = (tx.account_id, tx.category_id, tx.direction, tx.amount, tx.occurred_at)
+        await self._record_totals(user_id, [(-1, *key)])
         await self.session.delete(tx)
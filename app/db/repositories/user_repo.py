@@ -1,7 +1,46 @@
+from dataclasses import dataclass
+from datetime import datetime
+
 from pydantic import EmailStr
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LocalCache, VersionedCache
+from app.core.config import settings
 from app.core.models import User
+from app.db.db_helper import has_uncommitted, on_commit
+from app.db.types import Role
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Неизменяемый снимок пользователя для авторизации запросов."""
+
+    id: int
+    email: str
+    name: str
+    role: Role
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            role=user.role,
+            created_at=user.created_at,
+        )
+
+
+# пользователь по id без запроса в БД; версия сбрасывается в update/delete
+principal_cache = VersionedCache(
+    LocalCache(
+        max_entries=settings.principal_cache.max_entries,
+        ttl_s=settings.principal_cache.ttl_s,
+    ),
+    enabled=settings.principal_cache.enabled,
+)
 
 
 class UserRepository:
@@ -12,6 +51,16 @@ class UserRepository:
         res = await self.session.execute(select(User).where(User.id == user_id))
         return res.scalar_one_or_none()
 
+    async def get_principal(self, user_id: int) -> Principal | None:
+        async def build() -> Principal | None:
+            user = await self.get_by_id(user_id)
+            return Principal.from_user(user) if user else None
+
+        if has_uncommitted(self.session):
+            return await build()
+        # None в кэш не попадает: несуществующий id каждый раз идёт в БД
+        return await principal_cache.get_or_build(user_id, "principal", build)
+
     async def get_by_email(self, email: EmailStr) -> User | None:
         res = await self.session.execute(select(User).where(User.email == email))
         return res.scalar_one_or_none()
@@ -28,6 +77,12 @@ class UserRepository:
         await self.session.flush()
         return user
 
+    def _invalidate(self, user_id: int) -> None:
+        async def hook() -> None:
+            await principal_cache.invalidate([user_id])
+
+        on_commit(self.session, hook)
+
     async def update(
         self,
         user: User,
@@ -40,7 +95,9 @@ class UserRepository:
         if password_hash is not None:
             user.password_hash = password_hash
         await self.session.flush()
+        self._invalidate(user.id)
         return user
 
     async def delete(self, user: User) -> None:
         await self.session.delete(user)
+        self._invalidate(user.id)
@@ -0,0 +1,72 @@
+"""
+Проверка схемы при старте воркера: ревизия в alembic_version должна
+совпадать с head миграций. Схему создаёт и обновляет только
+`alembic upgrade head` (entrypoint.sh), воркер её лишь сверяет — один
+SELECT вместо create_all с запросами к каталогу на каждую таблицу.
+
+Head берётся разбором файлов миграций, без импорта alembic: так старт
+дешевле на время импорта, а нужны только revision и down_revision.
+"""
+
+import logging
+import re
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+log = logging.getLogger("db")
+
+VERSIONS_DIR = Path(__file__).resolve().parents[1] / "alembic" / "versions"
+
+_REVISION = re.compile(r"^revision(?:\s*:[^=]+)?\s*=\s*['\"](\w+)['\"]", re.M)
+_DOWN_REVISION = re.compile(r"^down_revision(?:\s*:[^=]+)?\s*=\s*(.+)$", re.M)
+_ID = re.compile(r"['\"](\w+)['\"]")
+
+
+class SchemaMismatch(RuntimeError):
+    pass
+
+
+def migration_heads(versions_dir: Path = VERSIONS_DIR) -> set[str]:
+    """Ревизии, на которые не ссылается ни одна другая (head, при ветках — все)."""
+    revisions, parents = set(), set()
+    for path in versions_dir.glob("*.py"):
+        source = path.read_text(encoding="utf-8")
+        rev = _REVISION.search(source)
+        if rev is None:
+            continue
+        revisions.add(rev.group(1))
+        down = _DOWN_REVISION.search(source)
+        if down is not None:
+            # None, "abc" или ("abc", "def") у слияния веток
+            parents.update(_ID.findall(down.group(1)))
+    return revisions - parents
+
+
+async def current_revisions(engine: AsyncEngine) -> set[str] | None:
+    """Ревизии из alembic_version; None — таблицы нет (миграции не прогонялись)."""
+    async with engine.connect() as conn:
+        try:
+            res = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        except ProgrammingError:
+            return None
+        return {row[0] for row in res}
+
+
+async def check_schema(engine: AsyncEngine) -> None:
+    heads = migration_heads()
+    if not heads:
+        log.warning("no migrations in %s, schema check skipped", VERSIONS_DIR)
+        return
+    current = await current_revisions(engine)
+    if current is None:
+        raise SchemaMismatch(
+            "alembic_version not found: run `alembic upgrade head` before start"
+        )
+    if current != heads:
+        raise SchemaMismatch(
+            f"database is at {sorted(current)}, code expects {sorted(heads)}: "
+            "run `alembic upgrade head`"
+        )
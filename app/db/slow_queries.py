@@ -0,0 +1,156 @@
+"""
+Журнал медленных запросов: всё, что дольше порога, пишется в лог "db.slow"
+с формой параметров (типы и длины, без значений), ручкой и пользователем.
+Доля таких запросов повторяется как EXPLAIN (ANALYZE, BUFFERS) на другом
+соединении пула, в фоне, и план ложится в отдельный файл с ротацией.
+
+EXPLAIN ANALYZE выполняет запрос заново, поэтому повторяются только
+SELECT/WITH, в транзакции READ ONLY с statement_timeout и с откатом:
+запись внутри WITH или SELECT FOR UPDATE упадёт, и в файл ляжет ошибка.
+"""
+
+import asyncio
+import contextvars
+import logging
+import random
+import re
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import SlowQueryConfig
+from app.core.request_context import current_route, current_user_id
+
+log = logging.getLogger("db.slow")
+explain_log = logging.getLogger("db.slow.explain")
+
+_MAX_SQL = 4000
+_SPACES = re.compile(r"\s+")
+_READ = re.compile(r"\s*(SELECT|WITH)\b", re.IGNORECASE)
+# внутри фонового EXPLAIN: его собственные запросы не журналируем
+_explaining: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "explaining", default=False
+)
+
+
+def param_shape(value) -> str:
+    """Тип без значения: в параметрах бывают персональные данные."""
+    if isinstance(value, (str, bytes, list, tuple, set, frozenset)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def params_shape(parameters) -> str:
+    if isinstance(parameters, dict):
+        items = (f"{k}: {param_shape(v)}" for k, v in parameters.items())
+        return "{" + ", ".join(items) + "}"
+    return "(" + ", ".join(param_shape(v) for v in parameters or ()) + ")"
+
+
+def _one_line(statement: str) -> str:
+    sql = _SPACES.sub(" ", statement).strip()
+    return sql if len(sql) <= _MAX_SQL else sql[:_MAX_SQL] + "..."
+
+
+def _setup_explain_log(cfg: SlowQueryConfig) -> None:
+    if explain_log.handlers:
+        return
+    path = Path(cfg.explain_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(
+        path, maxBytes=cfg.explain_max_bytes, backupCount=cfg.explain_backups
+    )
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    explain_log.addHandler(handler)
+    explain_log.setLevel(logging.INFO)
+    # планы — только в файл, не в общий лог
+    explain_log.propagate = False
+
+
+class _Explainer:
+    """Не больше одного EXPLAIN за раз на движок: пул нужен самим запросам."""
+
+    def __init__(self, engine: AsyncEngine, cfg: SlowQueryConfig):
+        self.engine = engine
+        self.cfg = cfg
+        self.busy = False
+        self.tasks: set[asyncio.Task] = set()
+
+    def maybe_start(self, statement: str, parameters, header: str) -> None:
+        if self.busy or random.random() >= self.cfg.explain_sample:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # синхронный вызов вне event loop — не наш случай
+        self.busy = True
+        # пустой контекст: запрос EXPLAIN не относится к текущей ручке
+        task = contextvars.Context().run(
+            loop.create_task, self._explain(statement, parameters, header)
+        )
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _explain(self, statement: str, parameters, header: str) -> None:
+        _explaining.set(True)
+        # LOCAL — только до отката, соединение вернётся в пул без таймаута
+        set_timeout = (
+            f"SET LOCAL statement_timeout = {int(self.cfg.explain_timeout_s * 1000)}"
+        )
+        try:
+            async with self.engine.connect() as conn:
+                await conn.execution_options(postgresql_readonly=True)
+                await conn.exec_driver_sql(set_timeout)
+                res = await conn.exec_driver_sql(
+                    "EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters
+                )
+                plan = "\n".join(row[0] for row in res)
+                await conn.rollback()
+        except Exception as e:
+            explain_log.info("%s\nEXPLAIN failed: %s: %s", header, type(e).__name__, e)
+        else:
+            explain_log.info("%s\n%s", header, plan)
+        finally:
+            self.busy = False
+
+
+def listen(engine: AsyncEngine, cfg: SlowQueryConfig) -> None:
+    target = engine.sync_engine
+    threshold_s = cfg.threshold_ms / 1000
+    explainer = None
+    if cfg.explain_sample > 0:
+        _setup_explain_log(cfg)
+        explainer = _Explainer(engine, cfg)
+
+    @event.listens_for(target, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany) -> None:
+        context._slow_started = time.perf_counter()
+
+    @event.listens_for(target, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - context._slow_started
+        if elapsed < threshold_s or _explaining.get():
+            return
+        if executemany:
+            shape = f"executemany x{len(parameters)}"
+        else:
+            shape = params_shape(parameters)
+        route, user_id = current_route() or "-", current_user_id()
+        log.warning(
+            "slow query %.1f ms route=%s user=%s db=%s params=%s sql=%s",
+            elapsed * 1000,
+            route,
+            user_id,
+            engine.url.host,
+            shape,
+            _one_line(statement),
+        )
+        if explainer is not None and not executemany and _READ.match(statement):
+            header = (
+                f"{elapsed * 1000:.1f} ms route={route} user={user_id} "
+                f"db={engine.url.host} params={shape}\n{_one_line(statement)}"
+            )
+            explainer.maybe_start(statement, parameters, header)
@@ -20,3 +20,26 @@ class CategoryKind(str, Enum):
 class Direction(str, Enum):
     incoming = "in"
     outgoing = "out"
+
+
+class ImportFormat(str, Enum):
+    csv = "csv"
+    ofx = "ofx"
+
+
+class ImportStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class TransactionSort(str, Enum):
+    created_at = "created_at"
+    occurred_at = "occurred_at"
+
+
+class BalanceStep(str, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
@@ -0,0 +1,130 @@
+"""
+Прогрев воркера до первого запроса: соединения пула открываются заранее,
+JWT-ключи читаются и разбираются, горячие запросы ручек один раз
+выполняются на каждом открытом соединении. SQLAlchemy кладёт их
+компиляцию в кэш движка, asyncpg — prepared statements в кэш
+соединения, и первым пользователям не достаётся этот счёт.
+
+Запросы идут от несуществующего пользователя в READ ONLY транзакции с
+откатом: данных они не читают и не пишут. Ошибка прогрева только
+пишется в лог — воркер всё равно стартует.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import date
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core import security
+from app.db.db_helper import DataBaseHelper, Session
+from app.db.repositories.account_repo import AccountRepository
+from app.db.repositories.budget import BudgetRepository
+from app.db.repositories.category_repo import CategoryRepository
+from app.db.repositories.transaction_repo import TransactionRepository
+from app.db.repositories.user_repo import UserRepository
+
+log = logging.getLogger("db")
+
+_NOBODY = 0  # id пользователя, которого нет: запросы ничего не находят
+
+
+async def _user(session: Session) -> None:
+    await UserRepository(session).get_by_id(_NOBODY)
+
+
+async def _accounts(session: Session) -> None:
+    await AccountRepository(session).list_rows_for_user(_NOBODY)
+
+
+async def _categories(session: Session) -> None:
+    await CategoryRepository(session).list_rows(_NOBODY)
+
+
+async def _transactions(session: Session) -> None:
+    await TransactionRepository(session).list_rows(_NOBODY)
+
+
+async def _budget_month(session: Session) -> None:
+    # мимо кэша бюджетов: нужны сами запросы
+    await BudgetRepository(session)._build_month_response(
+        user_id=_NOBODY, month=date.today().replace(day=1)
+    )
+
+
+async def _budget_range(session: Session) -> None:
+    month = date.today().replace(day=1)
+    await BudgetRepository(session)._build_range_response(
+        user_id=_NOBODY, month_from=month, month_to=month, account_id=None
+    )
+
+
+# запросы ручек чтения, которые чаще всего приходят первыми
+HOT_QUERIES: list[Callable[[Session], Awaitable[None]]] = [
+    _user,
+    _accounts,
+    _categories,
+    _transactions,
+    _budget_month,
+    _budget_range,
+]
+
+
+def preload_keys() -> None:
+    security._signing_key()
+    security._verifying_key()
+
+
+async def _warm_connection(conn: AsyncConnection) -> None:
+    await conn.execution_options(postgresql_readonly=True)
+    session = Session(bind=conn)
+    try:
+        for query in HOT_QUERIES:
+            try:
+                await query(session)
+            except Exception as e:
+                log.warning(
+                    "warm-up %s failed: %s: %s", query.__name__, type(e).__name__, e
+                )
+                await session.rollback()
+    finally:
+        await session.close()
+        await conn.rollback()
+
+
+async def warm_engine(engine: AsyncEngine, connections: int) -> None:
+    # больше pool_size держать не будем: лишние закроются при возврате
+    connections = min(connections, engine.pool.size())
+    # соединения держим открытыми одновременно — иначе пул отдаст одно и то же
+    conns = await asyncio.gather(
+        *(engine.connect() for _ in range(connections)), return_exceptions=True
+    )
+    opened = [c for c in conns if isinstance(c, AsyncConnection)]
+    failed = [c for c in conns if not isinstance(c, AsyncConnection)]
+    if failed:
+        log.warning(
+            "warm-up %s: %d of %d connections failed: %s",
+            engine.url.host,
+            len(failed),
+            connections,
+            failed[0],
+        )
+    try:
+        for conn in opened:
+            await _warm_connection(conn)
+    finally:
+        for conn in opened:
+            await conn.close()
+
+
+async def warm_up(helper: DataBaseHelper, connections: int) -> None:
+    t0 = time.perf_counter()
+    try:
+        preload_keys()
+    except Exception as e:
+        log.warning("warm-up: JWT keys not loaded: %s: %s", type(e).__name__, e)
+    engines = [helper.engine] + [r.engine for r in helper.replicas]
+    await asyncio.gather(*(warm_engine(engine, connections) for engine in engines))
+    log.info("warm-up done in %.0f ms", (time.perf_counter() - t0) * 1000)
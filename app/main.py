@@ -1,36 +1,97 @@
+import asyncio
+import logging
 from fastapi import FastAPI
-from contextlib import asynccontextmanager
+from fastapi.responses import ORJSONResponse
+from contextlib import asynccontextmanager, suppress
 from app.api.v1.routers.auth import router as auth_router
 
 from app.api.v1.routers.account import router as account_router
 from app.api.v1.routers.category import router as category_router
 from app.api.v1.routers.trancsaction import router as transaction_router
 from app.api.v1.routers.budget import router as budget_router
+from app.api.v1.routers.imports import router as import_router
+from app.api.v1.routers.health import internal_router
+from app.api.v1.routers.health import router as health_router
+from app.core import metrics
+from app.core.metrics import MetricsMiddleware
+from app.core.request_context import RequestContextMiddleware
 from app.core.error_handler import http_exception_handler, unhandled_error_handler
-from app.db import Base, db_helper
+from app.db import db_helper
+from app.db.read_routing import ReadRoutingMiddleware
+from app.db.partitions import run_maintainer
+from app.db.schema import SchemaMismatch, check_schema
+from app.db.warmup import warm_up
+from app.db.repositories.ledger import run_compactor
 import uvicorn
 from app.core.config import settings
+from app.core.security import password_hasher
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+log = logging.getLogger("app")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with db_helper.engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # схему ведёт alembic upgrade head в entrypoint.sh, здесь только сверка
+    if settings.startup.schema_check != "off":
+        try:
+            await check_schema(db_helper.engine)
+        except SchemaMismatch as e:
+            if settings.startup.schema_check == "strict":
+                raise
+            log.warning("%s", e)
+    if settings.startup.warmup:
+        await warm_up(db_helper, settings.startup.warmup_connections)
+
+    tasks = []
+    if settings.ledger.enabled:
+        tasks.append(
+            asyncio.create_task(
+                run_compactor(db_helper.session_factory, settings.ledger)
+            )
+        )
+    if settings.partitions.maintain:
+        # партиции transactions вперёд; из воркеров работает кто-то один
+        tasks.append(
+            asyncio.create_task(run_maintainer(db_helper.engine, settings.partitions))
+        )
 
     yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    password_hasher.shutdown()
     await db_helper.dispose()
 
 
-main_app = FastAPI(lifespan=lifespan)
+# ответы с response_model сериализует pydantic, orjson только пишет байты
+main_app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 main_app.add_exception_handler(StarletteHTTPException, http_exception_handler)
 main_app.add_exception_handler(Exception, unhandled_error_handler)
+if settings.slow_queries.threshold_ms > 0:
+    main_app.add_middleware(RequestContextMiddleware)
+if settings.db.replica_urls:
+    main_app.add_middleware(
+        ReadRoutingMiddleware,
+        window_s=settings.db.read_your_writes_s,
+        secure=settings.cookies.secure,
+        samesite=settings.cookies.samesite,
+    )
+if settings.metrics.enabled:
+    main_app.add_middleware(MetricsMiddleware)
 
 main_app.include_router(auth_router)
 main_app.include_router(account_router)
 main_app.include_router(category_router)
 main_app.include_router(transaction_router)
 main_app.include_router(budget_router)
+main_app.include_router(import_router)
+main_app.include_router(health_router)
+if settings.internal.enabled:
+    main_app.include_router(internal_router)
+if settings.metrics.enabled:
+    metrics.track_routes(main_app)
 
 
 if __name__ == "__main__":
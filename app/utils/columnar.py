@@ -0,0 +1,102 @@
+"""
+Колоночный формат списков для медленных каналов: вместо массива объектов
+с одними и теми же ключами — по массиву на поле. Поля-enum кодируются
+индексами в словаре, который лежит рядом (порядок — как в самом enum,
+поэтому стабилен между страницами). Значения — те же, что в обычном
+JSON: Decimal и даты строками в формате pydantic.
+
+    {"count": 2,
+     "columns": {"id": [7, 6], "direction": [1, 0], "amount": ["1.50", ...]},
+     "dicts": {"direction": ["in", "out"]},
+     "next_cursor": "..."}
+
+Два варианта одного и того же кадра: JSON и MessagePack. Выгрузка —
+поток кадров по пачке в каждом: JSON — по кадру на строку, MessagePack —
+кадры подряд (msgpack.Unpacker читает их по одному).
+"""
+
+from enum import Enum
+from typing import Any, Iterable, Mapping, get_args
+
+import msgpack
+import orjson
+from pydantic import BaseModel, TypeAdapter
+
+COLUMNAR_JSON = "application/vnd.wallet.columnar+json"
+COLUMNAR_MSGPACK = "application/vnd.wallet.columnar+msgpack"
+
+_ACCEPTED = {
+    "application/json": None,
+    COLUMNAR_JSON: COLUMNAR_JSON,
+    COLUMNAR_MSGPACK: COLUMNAR_MSGPACK,
+    "application/msgpack": COLUMNAR_MSGPACK,
+    "application/x-msgpack": COLUMNAR_MSGPACK,
+}
+
+
+def negotiate(accept: str | None) -> str | None:
+    """
+    Колоночный media type по заголовку Accept; None — обычный JSON.
+    Из поддерживаемых берётся тип с наибольшим q, при равных — первый.
+    """
+    best, best_q = None, 0.0
+    for part in (accept or "").split(","):
+        media, *params = (p.strip() for p in part.split(";"))
+        if media.lower() not in _ACCEPTED:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = _ACCEPTED[media.lower()], q
+    return best
+
+
+def _enum_of(annotation) -> type[Enum] | None:
+    for tp in (annotation, *get_args(annotation)):
+        if isinstance(tp, type) and issubclass(tp, Enum):
+            return tp
+    return None
+
+
+class Columnar:
+    """Кодировщик строк (dict/Mapping с полями model) в колоночные кадры."""
+
+    def __init__(self, model: type[BaseModel]):
+        # ключи — как в JSON-ответе: алиас поля, если он есть
+        self.fields = [f.alias or name for name, f in model.model_fields.items()]
+        self.dicts: dict[str, list] = {}
+        self._codes: dict[str, dict] = {}
+        self._adapters: dict[str, TypeAdapter] = {}
+        for name, field in zip(self.fields, model.model_fields.values()):
+            enum = _enum_of(field.annotation)
+            if enum is not None:
+                self.dicts[name] = [m.value for m in enum]
+                # str-enum равен своему значению: сырое значение тоже найдётся
+                self._codes[name] = {m: i for i, m in enumerate(enum)}
+            else:
+                # форматирование значений — то же, что у строкового JSON
+                self._adapters[name] = TypeAdapter(list[field.annotation])
+
+    def frame(self, rows: Iterable[Mapping], **extra: Any) -> dict:
+        rows = list(rows)
+        columns = {}
+        for name in self.fields:
+            values = [r[name] for r in rows]
+            codes = self._codes.get(name)
+            if codes is not None:
+                columns[name] = [None if v is None else codes[v] for v in values]
+            else:
+                columns[name] = self._adapters[name].dump_python(values, mode="json")
+        return {"count": len(rows), "columns": columns, "dicts": self.dicts, **extra}
+
+    def encode(self, media_type: str, rows: Iterable[Mapping], **extra: Any) -> bytes:
+        frame = self.frame(rows, **extra)
+        if media_type == COLUMNAR_MSGPACK:
+            return msgpack.packb(frame)
+        return orjson.dumps(frame)
@@ -1,16 +1,22 @@
 import base64
 from datetime import datetime
 
+# курсор без имени поля (старый формат) — это всегда created_at
+_LEGACY_SORT = "created_at"
 
-def encode_cursor(created_at: datetime, id_: int) -> str:
-    s = f"{created_at.isoformat()}|{id_}"
+
+def encode_cursor(key: datetime, id_: int, sort: str = _LEGACY_SORT) -> str:
+    s = f"{sort}|{key.isoformat()}|{id_}"
     return base64.urlsafe_b64encode(s.encode()).decode()
 
 
-def decode_cursor(cursor: str) -> tuple[datetime, str]:
+def decode_cursor(cursor: str) -> tuple[str, datetime, int]:
     try:
         raw = base64.urlsafe_b64decode(cursor.encode()).decode()
-        ts_str, id_ = raw.split("|", 1)
-        return datetime.fromisoformat(ts_str), id_
+        parts = raw.split("|")
+        if len(parts) == 2:
+            parts.insert(0, _LEGACY_SORT)
+        sort, ts_str, id_ = parts
+        return sort, datetime.fromisoformat(ts_str), int(id_)
     except Exception:
         raise ValueError("Invalid cursor")
@@ -0,0 +1,88 @@
+"""
+Сериализация выгрузки транзакций: NDJSON/CSV построчно, колоночные кадры
+(JSON или MessagePack) по пачке, и gzip на лету. Всё — генераторы над
+пачками строк, целиком выгрузка в памяти не живёт.
+"""
+
+import csv
+import io
+import zlib
+from enum import Enum
+from typing import AsyncIterator, Iterable, Sequence
+
+from sqlalchemy import Row
+
+from app.api.v1.schemas.transaction import TransactionOut
+from app.utils.columnar import COLUMNAR_JSON, COLUMNAR_MSGPACK, Columnar
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+    columnar = "columnar"
+    msgpack = "msgpack"
+
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv; charset=utf-8",
+    ExportFormat.columnar: COLUMNAR_JSON,
+    ExportFormat.msgpack: COLUMNAR_MSGPACK,
+}
+FILE_EXTENSIONS = {
+    ExportFormat.ndjson: "ndjson",
+    ExportFormat.csv: "csv",
+    ExportFormat.columnar: "columnar.json",
+    ExportFormat.msgpack: "msgpack",
+}
+CSV_COLUMNS = list(TransactionOut.model_fields)
+_columnar = Columnar(TransactionOut)
+
+
+def encode_ndjson(rows: Iterable[Row]) -> bytes:
+    return b"".join(
+        TransactionOut.model_validate(r._mapping).model_dump_json().encode() + b"\n"
+        for r in rows
+    )
+
+
+def encode_csv(rows: Iterable[Row], *, header: bool = False) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    for r in rows:
+        out = TransactionOut.model_validate(r._mapping).model_dump(mode="json")
+        writer.writerow(out[c] for c in CSV_COLUMNS)
+    return buf.getvalue().encode()
+
+
+def encode_columnar(rows: Iterable[Row], media_type: str) -> bytes:
+    frame = _columnar.encode(media_type, (r._mapping for r in rows))
+    # JSON-кадры — по одному на строку; MessagePack разделитель не нужен
+    return frame + b"\n" if media_type == COLUMNAR_JSON else frame
+
+
+async def encode_stream(
+    batches: AsyncIterator[Sequence[Row]], fmt: ExportFormat
+) -> AsyncIterator[bytes]:
+    if fmt == ExportFormat.csv:
+        yield encode_csv((), header=True)
+        async for batch in batches:
+            yield encode_csv(batch)
+    elif fmt in (ExportFormat.columnar, ExportFormat.msgpack):
+        async for batch in batches:
+            yield encode_columnar(batch, MEDIA_TYPES[fmt])
+    else:
+        async for batch in batches:
+            yield encode_ndjson(batch)
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    # wbits=31 -> gzip-заголовок, чтобы клиент мог распаковать по Content-Encoding
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
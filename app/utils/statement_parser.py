@@ -0,0 +1,204 @@
+"""
+Потоковый разбор банковских выписок (CSV/OFX).
+
+Все функции — генераторы: файл читается по кускам, в памяти держится
+только текущая запись, поэтому размер выписки на память не влияет.
+"""
+
+import csv
+import html
+import re
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Iterator, NamedTuple, TextIO
+
+from app.db.types import Direction, ImportFormat
+
+NOTE_MAX_LEN = 500
+_CENT = Decimal("0.01")
+
+
+class StatementError(ValueError):
+    def __init__(self, line_no: int, message: str):
+        super().__init__(f"line {line_no}: {message}")
+        self.line_no = line_no
+
+
+class ImportRecord(NamedTuple):
+    # порядок полей = порядок колонок staging-таблицы
+    line_no: int
+    account_id: int
+    category_id: int | None
+    direction: str  # имя члена Direction, как его хранит enum в БД
+    amount: Decimal
+    note: str | None
+    occurred_at: datetime
+
+
+def guess_format(filename: str | None) -> ImportFormat:
+    if filename and filename.lower().endswith((".ofx", ".qfx")):
+        return ImportFormat.ofx
+    return ImportFormat.csv
+
+
+def _parse_amount(raw: str, line_no: int) -> Decimal:
+    s = raw.strip().replace(" ", "").replace("\u00a0", "")
+    if "," in s and "." not in s:
+        s = s.replace(",", ".")
+    try:
+        value = Decimal(s).quantize(_CENT)
+    except InvalidOperation:
+        raise StatementError(line_no, f"invalid amount {raw!r}")
+    if value == 0:
+        raise StatementError(line_no, "amount must be non-zero")
+    return value
+
+
+def _parse_datetime(raw: str, line_no: int) -> datetime:
+    s = raw.strip()
+    if s.endswith(("Z", "z")):
+        s = s[:-1] + "+00:00"
+    try:
+        dt = datetime.fromisoformat(s)
+    except ValueError:
+        raise StatementError(line_no, f"invalid occurred_at {raw!r}")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _parse_direction(raw: str | None, amount: Decimal, line_no: int) -> Direction:
+    if not raw or not raw.strip():
+        return Direction.incoming if amount > 0 else Direction.outgoing
+    s = raw.strip().lower()
+    for d in Direction:
+        if s in (d.value, d.name):
+            return d
+    raise StatementError(line_no, f"invalid direction {raw!r}")
+
+
+def _parse_int(raw: str | None, field: str, line_no: int) -> int | None:
+    if raw is None or not raw.strip():
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise StatementError(line_no, f"invalid {field} {raw!r}")
+
+
+def _note(raw: str | None) -> str | None:
+    if raw is None:
+        return None
+    raw = raw.strip()
+    return raw[:NOTE_MAX_LEN] or None
+
+
+def iter_csv(
+    stream: TextIO, *, default_account_id: int | None
+) -> Iterator[ImportRecord]:
+    """
+    Колонки (по заголовку): occurred_at, amount — обязательны;
+    direction, category_id, note, account_id — опциональны.
+    Без direction направление берётся из знака amount.
+    """
+    reader = csv.DictReader(stream)
+    header = set(reader.fieldnames or ())
+    missing = {"occurred_at", "amount"} - header
+    if missing:
+        raise StatementError(1, f"missing columns: {sorted(missing)}")
+
+    for row in reader:
+        line_no = reader.line_num
+        amount = _parse_amount(row["amount"] or "", line_no)
+        direction = _parse_direction(row.get("direction"), amount, line_no)
+        account_id = _parse_int(row.get("account_id"), "account_id", line_no)
+        account_id = account_id or default_account_id
+        if account_id is None:
+            raise StatementError(line_no, "account_id is required")
+        yield ImportRecord(
+            line_no=line_no,
+            account_id=account_id,
+            category_id=_parse_int(row.get("category_id"), "category_id", line_no),
+            direction=direction.name,
+            amount=abs(amount),
+            note=_note(row.get("note")),
+            occurred_at=_parse_datetime(row["occurred_at"] or "", line_no),
+        )
+
+
+# --- OFX ---
+_OFX_DATE = re.compile(
+    r"^(\d{8})(\d{6})?(?:\.\d+)?(?:\[([+-]?\d+(?:\.\d+)?)(?::[^\]]*)?\])?"
+)
+
+
+def _parse_ofx_date(raw: str, rec_no: int) -> datetime:
+    m = _OFX_DATE.match(raw.strip())
+    if not m:
+        raise StatementError(rec_no, f"invalid DTPOSTED {raw!r}")
+    day, hms, offset = m.groups()
+    dt = datetime.strptime(day + (hms or "000000"), "%Y%m%d%H%M%S")
+    tz = timezone(timedelta(hours=float(offset))) if offset else timezone.utc
+    return dt.replace(tzinfo=tz)
+
+
+def _ofx_tokens(
+    stream: TextIO, read_size: int = 64 * 1024
+) -> Iterator[tuple[str, str]]:
+    """(TAG, text) для каждого тега; работает и для SGML (OFX 1.x), и для XML."""
+    buf = ""
+    while True:
+        data = stream.read(read_size)
+        buf += data
+        parts = buf.split("<")
+        # последний кусок может быть недочитан — оставляем до следующего чтения
+        buf = parts.pop() if data else ""
+        for part in parts:
+            tag, sep, text = part.partition(">")
+            if sep:
+                yield tag.strip().upper(), text
+        if not data:
+            return
+
+
+def iter_ofx(
+    stream: TextIO, *, default_account_id: int | None
+) -> Iterator[ImportRecord]:
+    if default_account_id is None:
+        raise StatementError(0, "account_id is required for OFX import")
+
+    rec_no = 0
+    current: dict[str, str] | None = None
+    for tag, text in _ofx_tokens(stream):
+        if tag == "STMTTRN":
+            current = {}
+            rec_no += 1
+        elif tag == "/STMTTRN" and current is not None:
+            if "TRNAMT" not in current or "DTPOSTED" not in current:
+                raise StatementError(rec_no, "TRNAMT and DTPOSTED are required")
+            amount = _parse_amount(current["TRNAMT"], rec_no)
+            note = " ".join(
+                v for v in (current.get("NAME"), current.get("MEMO")) if v
+            )
+            yield ImportRecord(
+                line_no=rec_no,
+                account_id=default_account_id,
+                category_id=None,
+                direction=_parse_direction(None, amount, rec_no).name,
+                amount=abs(amount),
+                note=_note(note),
+                occurred_at=_parse_ofx_date(current["DTPOSTED"], rec_no),
+            )
+            current = None
+        elif current is not None and not tag.startswith("/"):
+            value = html.unescape(text.strip())
+            if value:
+                current[tag] = value
+
+
+def iter_statement(
+    stream: TextIO, fmt: ImportFormat, *, default_account_id: int | None
+) -> Iterator[ImportRecord]:
+    if fmt == ImportFormat.ofx:
+        return iter_ofx(stream, default_account_id=default_account_id)
+    return iter_csv(stream, default_account_id=default_account_id)
@@ -0,0 +1,104 @@
+"""
+Цена авторизации запроса: get_current_user с походом в БД за пользователем
+и с кэшем снимков пользователя (principal_cache). Для сравнения — только
+проверка JWT. Каждый вызов — как в ручке: своя сессия на запрос.
+
+    python -m benchmarks.auth_overhead -n 5000 -c 8
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import text
+from starlette.requests import Request
+
+from app.api.v1.auth_depends import ACCESS_COOKIE_NAME, get_current_user
+from app.core.models import User
+from app.core.security import create_access_token, decode_token
+from app.db import db_helper
+from app.db.repositories.user_repo import principal_cache
+
+
+async def seed() -> int:
+    async with db_helper.session_factory() as session:
+        user = User(
+            email=f"bench-{uuid.uuid4().hex[:8]}@bench.local",
+            password_hash="-",
+            name="bench",
+        )
+        session.add(user)
+        await session.commit()
+        return user.id
+
+
+def make_request(token: str) -> Request:
+    cookie = f"{ACCESS_COOKIE_NAME}={token}".encode()
+    return Request({"type": "http", "headers": [(b"cookie", cookie)]})
+
+
+async def one(mode: str, token: str) -> None:
+    if mode == "jwt":
+        decode_token(token)
+        return
+    async with db_helper.session_factory() as session:
+        await get_current_user(make_request(token), session)
+
+
+async def run_mode(mode: str, n: int, concurrency: int, token: str) -> dict:
+    principal_cache.enabled = mode == "cache"
+    latencies: list[float] = []
+    left = n
+
+    async def worker() -> None:
+        nonlocal left
+        while left > 0:
+            left -= 1
+            t0 = time.perf_counter()
+            await one(mode, token)
+            latencies.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    q = statistics.quantiles(latencies, n=100)
+    return {
+        "mean": statistics.fmean(latencies) * 1e6,
+        "p50": q[49] * 1e6,
+        "p99": q[98] * 1e6,
+        "rps": n / elapsed,
+    }
+
+
+async def main(n: int, concurrency: int, warmup: int) -> None:
+    user_id = await seed()
+    token = create_access_token(str(user_id))
+    try:
+        for mode in ("jwt", "db", "cache"):
+            await run_mode(mode, warmup, concurrency, token)
+            r = await run_mode(mode, n, concurrency, token)
+            print(
+                f"{mode:6} mean {r['mean']:8.1f} us   p50 {r['p50']:8.1f} us"
+                f"   p99 {r['p99']:8.1f} us   {r['rps']:9.1f} req/s"
+            )
+        print(
+            f"principal_cache hit rate {principal_cache.stats.hit_rate:.3f}"
+            f" ({principal_cache.stats})"
+        )
+    finally:
+        async with db_helper.session_factory() as session:
+            await session.execute(text("DELETE FROM users WHERE id = :u"), {"u": user_id})
+            await session.commit()
+        await db_helper.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", type=int, default=5000, help="вызовов на режим")
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.n, args.concurrency, args.warmup))
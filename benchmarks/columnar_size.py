@@ -0,0 +1,111 @@
+"""
+Размер и время кодирования колоночного формата против обычного JSON:
+страница ленты (list_rows, как в GET /transactions) и вся выгрузка
+пачками (stream, как в GET /transactions/export, против NDJSON). Размер
+— как есть и после gzip (медленные каналы обычно сжимают), время — CPU
+на кодирование уже выбранных строк.
+
+    python -m benchmarks.columnar_size --rows 5000 --limit 100
+"""
+
+import argparse
+import asyncio
+import gzip
+import time
+
+from sqlalchemy import text
+
+from app.api.v1.responses import JSONAdapter
+from app.api.v1.schemas.transaction import TransactionOut, TransactionsPage
+from app.db import db_helper
+from app.db.repositories.transaction_repo import TransactionRepository
+from app.utils.columnar import COLUMNAR_JSON, COLUMNAR_MSGPACK, Columnar
+from app.utils.export import encode_columnar, encode_ndjson
+from benchmarks.explain_transactions import seed
+
+
+def cpu_per_call(n: int, fn) -> tuple[bytes, float]:
+    body = fn()
+    t0 = time.process_time()
+    for _ in range(n):
+        fn()
+    return body, (time.process_time() - t0) / n * 1e6
+
+
+def report(title: str, variants: dict[str, tuple[bytes, float]]) -> None:
+    base = len(variants["json"][0])
+    print(f"\n{title}")
+    print(f"{'':10}{'bytes':>10}{'%':>6}{'gzip':>9}{'%':>6}{'encode, us':>12}")
+    base_gz = len(gzip.compress(variants["json"][0]))
+    for name, (body, us) in variants.items():
+        gz = len(gzip.compress(body))
+        print(
+            f"{name:10}{len(body):10}{len(body) / base:6.0%}"
+            f"{gz:9}{gz / base_gz:6.0%}{us:12.0f}"
+        )
+
+
+async def main(rows: int, limit: int, n: int, batch_size: int) -> None:
+    async with db_helper.session_factory() as session:
+        user_id = await seed(session, rows)
+    try:
+        async with db_helper.session_factory() as session:
+            repo = TransactionRepository(session)
+            items, cursor = await repo.list_rows(user_id, limit=limit)
+            batches = [
+                list(b) async for b in repo.stream(user_id, batch_size=batch_size)
+            ]
+    finally:
+        async with db_helper.session_factory() as session:
+            await session.execute(text("DELETE FROM users WHERE id = :u"), {"u": user_id})
+            await session.commit()
+        await db_helper.dispose()
+
+    page_json = JSONAdapter(TransactionsPage)
+    columnar = Columnar(TransactionOut)
+    report(
+        f"page of {len(items)} rows",
+        {
+            "json": cpu_per_call(
+                n,
+                lambda: page_json.response(
+                    {"items": items, "next_cursor": cursor}
+                ).body,
+            ),
+            "columnar": cpu_per_call(
+                n, lambda: columnar.encode(COLUMNAR_JSON, items, next_cursor=cursor)
+            ),
+            "msgpack": cpu_per_call(
+                n,
+                lambda: columnar.encode(COLUMNAR_MSGPACK, items, next_cursor=cursor),
+            ),
+        },
+    )
+
+    def export(encode) -> bytes:
+        return b"".join(encode(batch) for batch in batches)
+
+    rounds = max(1, n // 50)
+    report(
+        f"export of {rows} rows, batches of {batch_size}",
+        {
+            "json": cpu_per_call(rounds, lambda: export(encode_ndjson)),
+            "columnar": cpu_per_call(
+                rounds, lambda: export(lambda b: encode_columnar(b, COLUMNAR_JSON))
+            ),
+            "msgpack": cpu_per_call(
+                rounds,
+                lambda: export(lambda b: encode_columnar(b, COLUMNAR_MSGPACK)),
+            ),
+        },
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=5000, help="транзакций у пользователя")
+    parser.add_argument("--limit", type=int, default=100, help="строк на странице")
+    parser.add_argument("-n", type=int, default=300, help="кодирований страницы")
+    parser.add_argument("--batch-size", type=int, default=1000, help="пачка выгрузки")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.limit, args.n, args.batch_size))
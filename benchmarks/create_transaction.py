@@ -0,0 +1,118 @@
+"""
+Сравнение путей создания транзакции: create (4 запроса) и create_fast
+(один CTE-запрос). Каждая операция — как в ручке: своя сессия, commit.
+
+    python -m benchmarks.create_transaction -n 2000 -c 8
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from app.core.models import Account, Category, User
+from app.db import db_helper
+from app.db.repositories.transaction_repo import TransactionRepository
+from app.db.types import AccountType, CategoryKind, Direction
+
+
+async def seed(accounts: int) -> tuple[int, list[int], int]:
+    async with db_helper.session_factory() as session:
+        user = User(
+            email=f"bench-{uuid.uuid4().hex[:8]}@bench.local",
+            password_hash="-",
+            name="bench",
+        )
+        session.add(user)
+        await session.flush()
+        accs = [
+            Account(
+                user_id=user.id,
+                name=f"acc{i}",
+                currency="RUB",
+                type=AccountType.card,
+                balance=Decimal("1000000000"),
+            )
+            for i in range(accounts)
+        ]
+        cat = Category(user_id=user.id, name="bench", kind=CategoryKind.expense)
+        session.add_all([*accs, cat])
+        await session.commit()
+        return user.id, [a.id for a in accs], cat.id
+
+
+async def one(method: str, user_id: int, account_id: int, category_id: int) -> None:
+    async with db_helper.session_factory() as session:
+        repo = TransactionRepository(session, enforce_non_negative=True)
+        await getattr(repo, method)(
+            user_id,
+            account_id=account_id,
+            category_id=category_id,
+            direction=Direction.outgoing,
+            amount=Decimal("1.25"),
+            note="bench",
+            occurred_at=datetime.now(timezone.utc),
+        )
+        await session.commit()
+
+
+async def run_path(
+    method: str, n: int, concurrency: int, user_id: int, accounts: list[int], cat_id: int
+) -> dict:
+    latencies: list[float] = []
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(n):
+        queue.put_nowait(i)
+
+    async def worker() -> None:
+        while not queue.empty():
+            i = queue.get_nowait()
+            t0 = time.perf_counter()
+            await one(method, user_id, accounts[i % len(accounts)], cat_id)
+            latencies.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    q = statistics.quantiles(latencies, n=100)
+    return {
+        "p50": q[49] * 1000,
+        "p99": q[98] * 1000,
+        "rps": n / elapsed,
+    }
+
+
+async def main(n: int, concurrency: int, accounts: int, warmup: int) -> None:
+    user_id, accs, cat_id = await seed(accounts)
+    try:
+        for method in ("create", "create_fast"):
+            await run_path(method, warmup, concurrency, user_id, accs, cat_id)
+            r = await run_path(method, n, concurrency, user_id, accs, cat_id)
+            print(
+                f"{method:12} p50 {r['p50']:7.2f} ms   p99 {r['p99']:7.2f} ms"
+                f"   {r['rps']:8.1f} tx/s"
+            )
+    finally:
+        async with db_helper.session_factory() as session:
+            await session.execute(text("DELETE FROM users WHERE id = :u"), {"u": user_id})
+            await session.commit()
+        await db_helper.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", type=int, default=2000, help="операций на путь")
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--accounts", type=int, default=8, help="счетов (меньше — больше конкуренции)"
+    )
+    parser.add_argument("--warmup", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.n, args.concurrency, args.accounts, args.warmup))
@@ -0,0 +1,333 @@
+"""
+Проверка планов запросов ленты, поиска транзакций и факта бюджета.
+
+Засевает отдельного пользователя N транзакциями, делает VACUUM ANALYZE
+и прогоняет EXPLAIN (ANALYZE, BUFFERS) для тех же запросов, что строят
+репозитории. Каждый путь должен идти через свой индекс — index scan
+или index-only scan, а запросы за месяцы — читать только партиции этих
+месяцев; иначе скрипт завершается с кодом 1.
+
+    python -m benchmarks.explain_transactions --rows 1000000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import uuid
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.models import Account, Category, User
+from app.db import db_helper, partitions
+from app.db.repositories import rollups
+from app.db.repositories.budget import BudgetRepository
+from app.db.repositories.transaction_repo import TransactionRepository
+from app.db.types import AccountType, CategoryKind, TransactionSort
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+# seq scan, отбросивший меньше строк, — не ошибка плана: партиция почти
+# пустая (default) или в ней только строки этого пользователя
+SEQ_SCAN_ROWS = 1000
+
+SEED_SQL = text(
+    """
+    INSERT INTO transactions
+        (user_id, account_id, category_id, direction, amount, note, occurred_at, created_at)
+    SELECT
+        :user_id,
+        (CAST(:accounts AS int[]))[1 + g % cardinality(CAST(:accounts AS int[]))],
+        CASE WHEN g % 5 = 0
+            THEN (CAST(:income AS int[]))[1 + g % cardinality(CAST(:income AS int[]))]
+            ELSE (CAST(:expense AS int[]))[1 + g % cardinality(CAST(:expense AS int[]))]
+        END,
+        CASE WHEN g % 5 = 0 THEN 'incoming' ELSE 'outgoing' END::direction,
+        round((random() * 5000 + 1)::numeric, 2),
+        (ARRAY['coffee', 'taxi', 'groceries', 'rent', 'pharmacy'])[1 + g % 5]
+            || ' #' || g,
+        TIMESTAMPTZ '2023-01-01' + (random() * interval '1095 days'),
+        TIMESTAMP '2023-01-01' + g * interval '1 minute'
+    FROM generate_series(1, :rows) AS g
+    """
+)
+
+
+async def seed(session, rows: int) -> int:
+    user = User(
+        email=f"explain-{uuid.uuid4().hex[:8]}@bench.local",
+        password_hash="-",
+        name="explain",
+    )
+    session.add(user)
+    await session.flush()
+    accounts = [
+        Account(
+            user_id=user.id,
+            name=f"acc{i}",
+            currency="RUB",
+            type=AccountType.card,
+            balance=0,
+        )
+        for i in range(4)
+    ]
+    expense = [
+        Category(user_id=user.id, name=f"exp{i}", kind=CategoryKind.expense)
+        for i in range(10)
+    ]
+    income = [
+        Category(user_id=user.id, name=f"inc{i}", kind=CategoryKind.income)
+        for i in range(2)
+    ]
+    session.add_all([*accounts, *expense, *income])
+    await session.flush()
+
+    await session.execute(
+        SEED_SQL,
+        {
+            "user_id": user.id,
+            "accounts": [a.id for a in accounts],
+            "expense": [c.id for c in expense],
+            "income": [c.id for c in income],
+            "rows": rows,
+        },
+    )
+    # месячные обороты — мимо репозитория, поэтому пересчитываем
+    await rollups.rebuild(session, [user.id])
+    await session.commit()
+    return user.id
+
+
+def _nodes(plan: dict):
+    # ветки, отсечённые One-Time Filter'ом или при старте (партиции), в
+    # плане есть, но не выполнялись
+    if plan.get("Actual Loops") == 0:
+        return
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _nodes(child)
+
+
+def _index_nodes(plan: dict, parents: dict[str, str]):
+    # индекс партиции — под именем индекса родителя
+    for node in _nodes(plan):
+        if "Index Name" in node:
+            name = node["Index Name"]
+            yield node["Node Type"], parents.get(name, name)
+
+
+def _seq_scans(plan: dict):
+    for node in _nodes(plan):
+        if node["Node Type"] == "Seq Scan":
+            removed = node.get("Rows Removed by Filter", 0)
+            if removed * node["Actual Loops"] >= SEQ_SCAN_ROWS:
+                yield node["Relation Name"]
+
+
+def _partitions(plan: dict) -> set[str]:
+    """Прочитанные таблицы transactions: партиции, не отсечённые планом."""
+    return {
+        node["Relation Name"]
+        for node in _nodes(plan)
+        if node.get("Relation Name", "").startswith("transactions")
+    }
+
+
+async def parent_indexes(session) -> dict[str, str]:
+    res = await session.execute(
+        text(
+            """
+            SELECT c.relname, p.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relkind = 'I'
+            """
+        )
+    )
+    return dict(res.all())
+
+
+async def explain(session, stmt) -> dict:
+    # диалект живого соединения знает standard_conforming_strings —
+    # иначе обратные слэши в литералах (ESCAPE '\\') задвоятся
+    dialect = (await session.connection()).dialect
+    sql = stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+    res = await session.execute(
+        text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+    )
+    return res.scalar_one()[0]
+
+
+async def run(rows: int, keep: bool, verbose: bool) -> bool:
+    # партиции на весь диапазон SEED_SQL, иначе всё ляжет в default
+    await partitions.maintain(
+        db_helper.engine, settings.partitions, since=date(2023, 1, 1)
+    )
+    async with db_helper.session_factory() as session:
+        print(f"seeding {rows} transactions...")
+        user_id = await seed(session, rows)
+
+    # VACUUM — вне транзакции; заодно заполняет visibility map для index-only
+    async with db_helper.engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE transactions"))
+        await conn.execute(text("VACUUM ANALYZE category_month_rollups"))
+
+    ok = True
+    try:
+        async with db_helper.session_factory() as session:
+            tx = TransactionRepository(session)
+            budgets = BudgetRepository(session)
+            account_id = await session.scalar(
+                text("SELECT min(id) FROM accounts WHERE user_id = :u"), {"u": user_id}
+            )
+            _, cursor = await tx.list(user_id, limit=50)
+            _, occ_cursor = await tx.list(
+                user_id, limit=50, sort=TransactionSort.occurred_at
+            )
+            parents = await parent_indexes(session)
+            month_from = datetime(2024, 3, 1, tzinfo=timezone.utc)
+            month_to = datetime(2024, 4, 1, tzinfo=timezone.utc)
+            since = date(2025, 10, 1)
+            # с since до последней нарезанной партиции и default
+            today = datetime.now(timezone.utc).date()
+            horizon = partitions.add_months(today, settings.partitions.premake_months)
+            since_partitions = len(list(partitions.months(since, horizon))) + 1
+            by_user = (
+                "ix__transactions__user_id_occurred_at_id",
+                "ix__transactions__user_id_created_at_id",
+                "ix__transactions__user_id_account_id_created_at_id",
+            )
+
+            cases = [
+                (
+                    "list, sort=created_at",
+                    tx._list_query(user_id, limit=50),
+                    "ix__transactions__user_id_created_at_id",
+                ),
+                (
+                    "list, sort=created_at, next page",
+                    tx._list_query(user_id, limit=50, cursor=cursor),
+                    "ix__transactions__user_id_created_at_id",
+                ),
+                (
+                    "list, sort=occurred_at, next page",
+                    tx._list_query(
+                        user_id,
+                        limit=50,
+                        cursor=occ_cursor,
+                        sort=TransactionSort.occurred_at,
+                    ),
+                    "ix__transactions__user_id_occurred_at_id",
+                ),
+                (
+                    "list, sort=occurred_at, date range",
+                    tx._list_query(
+                        user_id,
+                        limit=50,
+                        sort=TransactionSort.occurred_at,
+                        date_from=month_from,
+                        date_to=month_to,
+                    ),
+                    "ix__transactions__user_id_occurred_at_id",
+                    1,
+                ),
+                (
+                    "rollups check, since",
+                    rollups.check_stmt([user_id], since),
+                    by_user,
+                    since_partitions,
+                ),
+                (
+                    "list, account_id",
+                    tx._list_query(user_id, limit=50, account_id=account_id),
+                    "ix__transactions__user_id_account_id_created_at_id",
+                ),
+                (
+                    "budget month actuals",
+                    budgets._month_actuals_stmt(
+                        user_id=user_id, month=date(2024, 3, 1)
+                    ),
+                    "uq__category_month_rollups__key",
+                ),
+                (
+                    "budget month actuals, account_id",
+                    budgets._month_actuals_stmt(
+                        user_id=user_id, month=date(2024, 3, 1), account_id=account_id
+                    ),
+                    "uq__category_month_rollups__key",
+                ),
+                (
+                    "list, search, frequent word",
+                    tx._list_query(user_id, limit=50, search="coff"),
+                    "ix__transactions__user_id_created_at_id",
+                ),
+                (
+                    "list, search, rare word",
+                    tx._list_query(user_id, limit=50, search="123457"),
+                    "ix__transactions__note_fts",
+                ),
+                (
+                    "search, frequent word",
+                    tx._search_query(
+                        user_id,
+                        "coff",
+                        limit=20,
+                        rank_window=200,
+                        highlight=("<mark>", "</mark>"),
+                    ),
+                    "ix__transactions__user_id_occurred_at_id",
+                ),
+                (
+                    "search, rare word",
+                    tx._search_query(user_id, "123457", limit=20, rank_window=200),
+                    "ix__transactions__note_fts",
+                ),
+            ]
+
+            for title, stmt, expected, *pruned in cases:
+                result = await explain(session, stmt)
+                plan = result["Plan"]
+                nodes = list(_index_nodes(plan, parents))
+                seq = [t for t in _seq_scans(plan) if t.startswith("transactions")]
+                scanned = _partitions(plan)
+                if isinstance(expected, str):
+                    expected = (expected,)
+                hit = any(
+                    name in expected and node in INDEX_SCANS for node, name in nodes
+                )
+                # pruned — сколько партиций transactions может остаться в плане
+                fits = not pruned or len(scanned) <= pruned[0]
+                status = "ok" if hit and not seq and fits else "FAIL"
+                ok &= status == "ok"
+                used = ", ".join(sorted({f"{node} {name}" for node, name in nodes}))
+                print(
+                    f"[{status:4}] {title:38} {result['Execution Time']:9.2f} ms"
+                    f"  {len(scanned):3} parts  {used or '-'}"
+                )
+                if verbose or status != "ok":
+                    print(json.dumps(plan, indent=2))
+    finally:
+        if not keep:
+            async with db_helper.session_factory() as session:
+                await session.execute(
+                    text("DELETE FROM users WHERE id = :u"), {"u": user_id}
+                )
+                await session.commit()
+        await db_helper.dispose()
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--keep", action="store_true", help="не удалять данные")
+    parser.add_argument("-v", "--verbose", action="store_true", help="печатать планы")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.rows, args.keep, args.verbose)) else 1)
+
+
+if __name__ == "__main__":
+    main()
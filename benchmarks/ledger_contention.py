@@ -0,0 +1,224 @@
+"""
+Конкуренция писателей за один «горячий» счёт: обычный режим (UPDATE строки
+accounts) против ledger-режима (слоты + компактор в фоне). Смесь списаний
+с проверкой остатка и пополнений, каждая операция — своя сессия и commit.
+В конце сверяется итоговый баланс счёта.
+
+--hold — пауза между записью и COMMIT: сетевой RTT до базы и прочая работа
+внутри транзакции, всё это время строка баланса заблокирована. На локальной
+машине без неё упираемся в CPU клиента, а не в блокировки: ledger-режим
+дороже по CPU (лишний запрос, savepoint), выигрывает он на времени
+удержания строки.
+
+    python -m benchmarks.ledger_contention -n 4000 -c 32
+"""
+
+import argparse
+import asyncio
+import contextlib
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import select, text
+
+from app.core.config import settings
+from app.core.models import Account, Category, User
+from app.db import db_helper
+from app.db.repositories import ledger
+from app.db.repositories.transaction_repo import InsufficientFunds, TransactionRepository
+from app.db.types import AccountType, CategoryKind, Direction
+
+INITIAL = Decimal("1000000")
+DEBIT = Decimal("1.00")
+CREDIT = Decimal("3.00")
+
+
+async def seed() -> tuple[int, list[int], int, int]:
+    async with db_helper.session_factory() as session:
+        user = User(
+            email=f"ledger-{uuid.uuid4().hex[:8]}@bench.local",
+            password_hash="-",
+            name="ledger",
+        )
+        session.add(user)
+        await session.flush()
+        # по счёту на режим, чтобы прогоны не мешали друг другу
+        accs = [
+            Account(
+                user_id=user.id,
+                name=f"family{i}",
+                currency="RUB",
+                type=AccountType.card,
+                balance=INITIAL,
+            )
+            for i in range(2)
+        ]
+        exp = Category(user_id=user.id, name="shop", kind=CategoryKind.expense)
+        inc = Category(user_id=user.id, name="topup", kind=CategoryKind.income)
+        session.add_all([*accs, exp, inc])
+        await session.commit()
+        return user.id, [a.id for a in accs], exp.id, inc.id
+
+
+async def run_mode(
+    slots: int,
+    n: int,
+    concurrency: int,
+    debits: float,
+    user_id: int,
+    account_id: int,
+    exp_id: int,
+    inc_id: int,
+    hold: float,
+) -> dict:
+    latencies: list[float] = []
+    applied = Decimal(0)
+    rejected = 0
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(n):
+        queue.put_nowait(i)
+
+    async def one() -> None:
+        nonlocal applied, rejected
+        outgoing = random.random() < debits
+        async with db_helper.session_factory() as session:
+            repo = TransactionRepository(
+                session, enforce_non_negative=True, ledger_slots=slots
+            )
+            try:
+                await repo.create_fast(
+                    user_id,
+                    account_id=account_id,
+                    category_id=exp_id if outgoing else inc_id,
+                    direction=Direction.outgoing if outgoing else Direction.incoming,
+                    amount=DEBIT if outgoing else CREDIT,
+                    note="bench",
+                    occurred_at=datetime.now(timezone.utc),
+                )
+            except InsufficientFunds:
+                rejected += 1
+                return
+            if hold:
+                await asyncio.sleep(hold)
+            await session.commit()
+        applied += -DEBIT if outgoing else CREDIT
+
+    async def worker() -> None:
+        while not queue.empty():
+            queue.get_nowait()
+            t0 = time.perf_counter()
+            await one()
+            latencies.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        # при ошибке остальные не должны писать параллельно с очисткой
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    q = statistics.quantiles(latencies, n=100)
+    return {
+        "p50": q[49] * 1000,
+        "p99": q[98] * 1000,
+        "rps": n / elapsed,
+        "applied": applied,
+        "rejected": rejected,
+    }
+
+
+async def current_balance(account_id: int) -> Decimal:
+    async with db_helper.session_factory() as session:
+        return await session.scalar(
+            select(Account.balance + ledger.pending_delta()).where(
+                Account.id == account_id
+            )
+        )
+
+
+async def main(
+    n: int,
+    concurrency: int,
+    debits: float,
+    slots: int,
+    interval: float,
+    hold: float,
+) -> None:
+    user_id, accs, exp_id, inc_id = await seed()
+    cfg = settings.ledger.model_copy(
+        update={"slots": slots, "compact_interval_s": interval}
+    )
+    try:
+        for title, mode_slots, account_id in (
+            ("accounts", 0, accs[0]),
+            (f"ledger/{slots}", slots, accs[1]),
+        ):
+            compactor = None
+            if mode_slots:
+                compactor = asyncio.create_task(
+                    ledger.run_compactor(db_helper.session_factory, cfg)
+                )
+            try:
+                r = await run_mode(
+                    mode_slots,
+                    n,
+                    concurrency,
+                    debits,
+                    user_id,
+                    account_id,
+                    exp_id,
+                    inc_id,
+                    hold,
+                )
+            finally:
+                if compactor:
+                    compactor.cancel()
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await compactor
+
+            balance = await current_balance(account_id)
+            ok = balance == INITIAL + r["applied"] and balance >= 0
+            print(
+                f"{title:10} p50 {r['p50']:7.2f} ms   p99 {r['p99']:7.2f} ms"
+                f"   {r['rps']:8.1f} tx/s   rejected {r['rejected']}"
+                f"   balance {'ok' if ok else 'MISMATCH'} ({balance})"
+            )
+    finally:
+        async with db_helper.session_factory() as session:
+            await session.execute(text("DELETE FROM users WHERE id = :u"), {"u": user_id})
+            await session.commit()
+        await db_helper.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", type=int, default=4000, help="операций на режим")
+    parser.add_argument("-c", "--concurrency", type=int, default=32)
+    parser.add_argument("--debits", type=float, default=0.8, help="доля списаний")
+    parser.add_argument("--slots", type=int, default=settings.ledger.slots)
+    parser.add_argument(
+        "--interval", type=float, default=0.5, help="период компактора, с"
+    )
+    parser.add_argument(
+        "--hold", type=float, default=20.0, help="пауза перед COMMIT, мс"
+    )
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            args.n,
+            args.concurrency,
+            args.debits,
+            args.slots,
+            args.interval,
+            args.hold / 1000,
+        )
+    )
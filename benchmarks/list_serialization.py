@@ -0,0 +1,164 @@
+"""
+CPU на страницу списка: ORM-объекты + response_model (как было) против
+строк Core + TypeAdapter (list_rows и app.api.v1.responses). Меряется
+process_time воркера — выборка (asyncpg и SQLAlchemy), валидация и
+JSON, без времени Postgres; отдельно — только сериализация готовой
+страницы. Перед замером ответы обоих путей сверяются побайтно.
+
+    python -m benchmarks.list_serialization -n 300 --limit 100
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy import text
+
+from app.api.v1.responses import JSONAdapter
+from app.api.v1.schemas.account import AccountOut
+from app.api.v1.schemas.category import CategoryOut
+from app.api.v1.schemas.transaction import TransactionOut, TransactionsPage
+from app.db import db_helper
+from app.db.repositories.account_repo import AccountRepository
+from app.db.repositories.category_repo import CategoryRepository
+from app.db.repositories.transaction_repo import TransactionRepository
+from benchmarks.explain_transactions import seed
+
+
+class Endpoint:
+    """Ручка списка в двух вариантах: old — ORM, new — строки Core."""
+
+    def __init__(self, name, model, out, fetch_old, fetch_new, wrap=None):
+        self.name = name
+        self.out = out
+        self.field = create_model_field("resp", model, mode="serialization")
+        self.adapter = JSONAdapter(model)
+        self.fetch_old = fetch_old
+        self.fetch_new = fetch_new
+        # страница транзакций — объект с курсором, остальные — просто список
+        self.wrap = wrap or (lambda items, _cursor=None: items)
+
+    async def render_old(self, fetched, response_class=JSONResponse) -> bytes:
+        items, cursor = fetched
+        content = self.wrap([self.out.model_validate(x) for x in items], cursor)
+        data = await serialize_response(
+            field=self.field, response_content=content, is_coroutine=True
+        )
+        return response_class(data).body
+
+    def render_new(self, fetched) -> bytes:
+        items, cursor = fetched
+        return self.adapter.response(self.wrap(items, cursor)).body
+
+
+def endpoints(user_id: int, limit: int) -> list[Endpoint]:
+    async def tx_old(s):
+        return await TransactionRepository(s).list(user_id, limit=limit)
+
+    async def tx_new(s):
+        return await TransactionRepository(s).list_rows(user_id, limit=limit)
+
+    async def cat_old(s):
+        return await CategoryRepository(s).list(user_id, limit=limit), None
+
+    async def cat_new(s):
+        return await CategoryRepository(s).list_rows(user_id, limit=limit), None
+
+    async def acc_old(s):
+        return await AccountRepository(s).list_for_user(user_id, limit=limit), None
+
+    async def acc_new(s):
+        return await AccountRepository(s).list_rows_for_user(user_id, limit=limit), None
+
+    def page(items, cursor):
+        return {"items": items, "next_cursor": cursor}
+
+    return [
+        Endpoint(
+            "transactions", TransactionsPage, TransactionOut, tx_old, tx_new, page
+        ),
+        Endpoint("categories", list[CategoryOut], CategoryOut, cat_old, cat_new),
+        Endpoint("accounts", list[AccountOut], AccountOut, acc_old, acc_new),
+    ]
+
+
+async def cpu_per_call(n: int, fn) -> float:
+    await fn()
+    t0 = time.process_time()
+    for _ in range(n):
+        await fn()
+    return (time.process_time() - t0) / n * 1e6
+
+
+async def measure(ep: Endpoint, n: int) -> dict:
+    async def old():
+        async with db_helper.session_factory() as s:
+            await ep.render_old(await ep.fetch_old(s))
+
+    async def new():
+        async with db_helper.session_factory() as s:
+            ep.render_new(await ep.fetch_new(s))
+
+    async with db_helper.session_factory() as s:
+        fetched_old = await ep.fetch_old(s)
+        fetched_new = await ep.fetch_new(s)
+    body = await ep.render_old(fetched_old)
+    if body != ep.render_new(fetched_new):
+        raise SystemExit(f"{ep.name}: responses differ")
+    if body != await ep.render_old(fetched_old, ORJSONResponse):
+        raise SystemExit(f"{ep.name}: ORJSONResponse differs from JSONResponse")
+
+    async def ser_old():
+        await ep.render_old(fetched_old)
+
+    async def ser_new():
+        ep.render_new(fetched_new)
+
+    return {
+        "rows": len(fetched_new[0]),
+        "bytes": len(body),
+        "page_old": await cpu_per_call(n, old),
+        "page_new": await cpu_per_call(n, new),
+        "ser_old": await cpu_per_call(n, ser_old),
+        "ser_new": await cpu_per_call(n, ser_new),
+    }
+
+
+async def main(n: int, limit: int, rows: int) -> None:
+    async with db_helper.session_factory() as session:
+        user_id = await seed(session, rows)
+    try:
+        results = {ep.name: await measure(ep, n) for ep in endpoints(user_id, limit)}
+    finally:
+        async with db_helper.session_factory() as session:
+            await session.execute(text("DELETE FROM users WHERE id = :u"), {"u": user_id})
+            await session.commit()
+        await db_helper.dispose()
+
+    print(
+        f"{'CPU, us':13}{'rows':>5}{'bytes':>7}"
+        f"{'page ORM':>11}{'page Core':>11}{'x':>6}"
+        f"{'ser ORM':>10}{'ser Core':>10}{'x':>6}"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:13}{r['rows']:5}{r['bytes']:7}"
+            f"{r['page_old']:11.0f}{r['page_new']:11.0f}"
+            f"{r['page_old'] / r['page_new']:6.1f}"
+            f"{r['ser_old']:10.0f}{r['ser_new']:10.0f}"
+            f"{r['ser_old'] / r['ser_new']:6.1f}"
+        )
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", type=int, default=300, help="страниц на вариант")
+    parser.add_argument("--limit", type=int, default=100, help="строк на странице")
+    parser.add_argument("--rows", type=int, default=1000, help="транзакций у пользователя")
+    args = parser.parse_args()
+    asyncio.run(main(args.n, args.limit, args.rows))
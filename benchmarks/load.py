@@ -0,0 +1,460 @@
+"""
+Нагрузочный прогон всего приложения: смешанная нагрузка на ручки по
+засеянным данным, итог — JSON с rps и p50/p95/p99 по ручкам, чтобы
+сравнивать прогоны между коммитами.
+
+Засевает --users пользователей (счета, категории, бюджеты за год и
+история транзакций) прямо в БД из настроек приложения. Нагрузку дают
+-c виртуальных пользователей со своими cookie: логин, создание, правка и
+удаление транзакций, лента (первая страница, следующая по курсору, с
+фильтрами) и бюджет месяца — в пропорциях --mix. По умолчанию main_app
+работает в этом же процессе (httpx + ASGITransport, с lifespan) — в
+цифры входит и клиент; с --url нагрузка идёт на запущенный uvicorn,
+который смотрит в ту же БД.
+
+    python -m benchmarks.load --users 20 --transactions 5000 -c 16 --duration 30
+    python -m benchmarks.load --url http://localhost:8000 --out load.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import httpx
+from sqlalchemy import text
+
+from app.core.models import Account, Budget, Category, User
+from app.core.security import hash_password
+from app.db import db_helper
+from app.db.repositories import balance_snapshots, rollups
+from app.db.types import AccountType, CategoryKind
+
+PASSWORD = "password123"
+INITIAL_BALANCE = Decimal("1000000000")
+DEFAULT_MIX = (
+    "login=1,create=10,update=5,delete=3,"
+    "list_first=25,list_next=10,list_filtered=20,budget_month=10"
+)
+OPERATIONS = (
+    "login",
+    "create",
+    "update",
+    "delete",
+    "list_first",
+    "list_next",
+    "list_filtered",
+    "budget_month",
+)
+
+SEED_SQL = text(
+    """
+    INSERT INTO transactions
+        (user_id, account_id, category_id, direction, amount, note, occurred_at)
+    SELECT
+        :user_id,
+        (CAST(:accounts AS int[]))[1 + g % cardinality(CAST(:accounts AS int[]))],
+        CASE WHEN g % 5 = 0
+            THEN (CAST(:income AS int[]))[1 + g % cardinality(CAST(:income AS int[]))]
+            ELSE (CAST(:expense AS int[]))[1 + g % cardinality(CAST(:expense AS int[]))]
+        END,
+        CASE WHEN g % 5 = 0 THEN 'incoming' ELSE 'outgoing' END::direction,
+        round((random() * 5000 + 1)::numeric, 2),
+        (ARRAY['coffee', 'taxi', 'groceries', 'rent', 'pharmacy'])[1 + g % 5]
+            || ' #' || g,
+        now() - random() * interval '365 days'
+    FROM generate_series(1, :rows) AS g
+    """
+)
+
+# баланс = начальный + все обороты: как будто транзакции шли через API
+BALANCE_SQL = text(
+    """
+    UPDATE accounts a
+    SET balance = :initial + coalesce((
+        SELECT sum(CASE WHEN t.direction = 'incoming' THEN t.amount ELSE -t.amount END)
+        FROM transactions t
+        WHERE t.account_id = a.id
+    ), 0)
+    WHERE a.id = ANY(CAST(:ids AS int[]))
+    """
+)
+
+
+@dataclass
+class SeedUser:
+    id: int
+    email: str
+    accounts: list[int]
+    expense: list[int]
+    income: list[int]
+    tx_ids: list[int] = field(default_factory=list)
+
+
+def month_start(d: date, back: int = 0) -> date:
+    y, m = divmod(d.year * 12 + d.month - 1 - back, 12)
+    return date(y, m + 1, 1)
+
+
+async def seed(
+    run_id: str, users: int, accounts: int, categories: int, transactions: int
+) -> list[SeedUser]:
+    hashed = hash_password(PASSWORD)
+    this_month = date.today().replace(day=1)
+    seeded: list[SeedUser] = []
+    async with db_helper.session_factory() as session:
+        for i in range(users):
+            user = User(
+                email=f"load-{run_id}-{i}@load.example.com",
+                password_hash=hashed,
+                name="load",
+            )
+            session.add(user)
+            await session.flush()
+            accs = [
+                Account(
+                    user_id=user.id,
+                    name=f"acc{j}",
+                    currency="RUB",
+                    type=AccountType.card,
+                    balance=0,
+                )
+                for j in range(accounts)
+            ]
+            n_income = max(1, categories // 5)
+            income = [
+                Category(user_id=user.id, name=f"inc{j}", kind=CategoryKind.income)
+                for j in range(n_income)
+            ]
+            expense = [
+                Category(user_id=user.id, name=f"exp{j}", kind=CategoryKind.expense)
+                for j in range(max(1, categories - n_income))
+            ]
+            session.add_all([*accs, *income, *expense])
+            await session.flush()
+            session.add_all(
+                Budget(
+                    user_id=user.id,
+                    category_id=c.id,
+                    month=month_start(this_month, back),
+                    amount=Decimal("20000"),
+                )
+                for c in expense
+                for back in range(12)
+            )
+            await session.execute(
+                SEED_SQL,
+                {
+                    "user_id": user.id,
+                    "accounts": [a.id for a in accs],
+                    "expense": [c.id for c in expense],
+                    "income": [c.id for c in income],
+                    "rows": transactions,
+                },
+            )
+            tx_ids = await session.scalars(
+                text("SELECT id FROM transactions WHERE user_id = :u LIMIT 1000"),
+                {"u": user.id},
+            )
+            seeded.append(
+                SeedUser(
+                    id=user.id,
+                    email=user.email,
+                    accounts=[a.id for a in accs],
+                    expense=[c.id for c in expense],
+                    income=[c.id for c in income],
+                    tx_ids=list(tx_ids),
+                )
+            )
+
+        # обороты, снимки и балансы — мимо репозиториев, поэтому пересчитываем
+        user_ids = [u.id for u in seeded]
+        account_ids = [a for u in seeded for a in u.accounts]
+        await rollups.rebuild(session, user_ids)
+        await balance_snapshots.backfill(session, account_ids)
+        await session.execute(
+            BALANCE_SQL, {"initial": INITIAL_BALANCE, "ids": account_ids}
+        )
+        await session.commit()
+
+    async with db_helper.engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in ("transactions", "category_month_rollups", "budgets"):
+            await conn.execute(text(f"ANALYZE {table}"))
+    return seeded
+
+
+async def cleanup(run_id: str) -> None:
+    async with db_helper.session_factory() as session:
+        await session.execute(
+            text("DELETE FROM users WHERE email LIKE :p"),
+            {"p": f"load-{run_id}-%@load.example.com"},
+        )
+        await session.commit()
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.enabled = False
+
+    def add(self, name: str, status: int, seconds: float) -> None:
+        if self.enabled:
+            self.latencies[name].append(seconds)
+            self.statuses[name][status] += 1
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, user: SeedUser, rec: Recorder):
+        self.client = client
+        self.user = user
+        self.rec = rec
+        self.created: list[int] = []
+        self.cursor: str | None = None
+
+    async def call(self, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        t0 = time.perf_counter()
+        r = await self.client.request(method, url, **kwargs)
+        self.rec.add(name, r.status_code, time.perf_counter() - t0)
+        return r
+
+    def _tx_body(self) -> dict:
+        u = self.user
+        incoming = random.random() < 0.2
+        return {
+            "account_id": random.choice(u.accounts),
+            "category_id": random.choice(u.income if incoming else u.expense),
+            "direction": "in" if incoming else "out",
+            "amount": f"{random.uniform(1, 5000):.2f}",
+            "note": random.choice(["coffee", "taxi", "groceries", "rent"]),
+            "occurred_at": (
+                datetime.now(timezone.utc) - timedelta(days=random.uniform(0, 60))
+            ).isoformat(),
+        }
+
+    async def login(self) -> None:
+        body = {"email": self.user.email, "password": PASSWORD, "name": "load"}
+        await self.call("login", "POST", "/auth/login", json=body)
+
+    async def create(self) -> None:
+        r = await self.call("create", "POST", "/transactions", json=self._tx_body())
+        if r.status_code == 201:
+            self.created.append(r.json()["id"])
+
+    async def update(self) -> None:
+        tx_id = random.choice(self.created or self.user.tx_ids)
+        body = {"amount": f"{random.uniform(1, 5000):.2f}", "note": "edited"}
+        await self.call("update", "PATCH", f"/transactions/{tx_id}", json=body)
+
+    async def delete(self) -> None:
+        # удаляем только своё созданное — засеянный объём не тает
+        if not self.created:
+            return await self.create()
+        tx_id = self.created.pop(random.randrange(len(self.created)))
+        await self.call("delete", "DELETE", f"/transactions/{tx_id}")
+
+    async def list_first(self) -> None:
+        r = await self.call("list_first", "GET", "/transactions", params={"limit": 50})
+        if r.status_code == 200:
+            self.cursor = r.json().get("next_cursor")
+
+    async def list_next(self) -> None:
+        if not self.cursor:
+            return await self.list_first()
+        params = {"limit": 50, "cursor": self.cursor}
+        r = await self.call("list_next", "GET", "/transactions", params=params)
+        if r.status_code == 200:
+            self.cursor = r.json().get("next_cursor")
+
+    async def list_filtered(self) -> None:
+        now = datetime.now(timezone.utc)
+        params = {
+            "limit": 50,
+            "account_id": random.choice(self.user.accounts),
+            "direction": "out",
+            "date_from": (now - timedelta(days=random.choice((30, 90, 365)))).isoformat(),
+            "date_to": now.isoformat(),
+        }
+        if random.random() < 0.5:
+            params["category_id"] = random.choice(self.user.expense)
+        if random.random() < 0.3:
+            params["min_amount"] = "1000"
+        await self.call("list_filtered", "GET", "/transactions", params=params)
+
+    async def budget_month(self) -> None:
+        month = month_start(date.today(), random.randrange(12))
+        await self.call("budget_month", "GET", f"/budgets/{month:%Y-%m}")
+
+    async def run(self, ops: list[str], weights: list[float], deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            op = random.choices(ops, weights)[0]
+            await getattr(self, op)()
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise SystemExit(f"unknown operation in --mix: {name!r}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def summarize(rec: Recorder, elapsed: float) -> dict:
+    endpoints = {}
+    for name, lat in sorted(rec.latencies.items()):
+        lat.sort()
+        q = (
+            statistics.quantiles(lat, n=100, method="inclusive")
+            if len(lat) > 1
+            else lat * 99
+        )
+        statuses = rec.statuses[name]
+        endpoints[name] = {
+            "count": len(lat),
+            "errors": sum(n for s, n in statuses.items() if s >= 400),
+            "statuses": {str(s): n for s, n in sorted(statuses.items())},
+            "rps": round(len(lat) / elapsed, 2),
+            "mean_ms": round(statistics.fmean(lat) * 1000, 3),
+            "p50_ms": round(q[49] * 1000, 3),
+            "p95_ms": round(q[94] * 1000, 3),
+            "p99_ms": round(q[98] * 1000, 3),
+            "max_ms": round(lat[-1] * 1000, 3),
+        }
+    total = sum(e["count"] for e in endpoints.values())
+    return {
+        "duration_s": round(elapsed, 3),
+        "requests": total,
+        "rps": round(total / elapsed, 2),
+        "errors": sum(e["errors"] for e in endpoints.values()),
+        "endpoints": endpoints,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+async def drive(
+    transport: httpx.AsyncBaseTransport | None,
+    base_url: str,
+    seeded: list[SeedUser],
+    args: argparse.Namespace,
+) -> dict:
+    weights = parse_mix(args.mix)
+    rec = Recorder()
+    clients = [
+        httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60)
+        for _ in range(args.concurrency)
+    ]
+    vus = [
+        VirtualUser(c, seeded[i % len(seeded)], rec) for i, c in enumerate(clients)
+    ]
+    try:
+        # cookie сессии до замера; прогрев — без записи в статистику
+        await asyncio.gather(*(vu.login() for vu in vus))
+        ops, w = list(weights), list(weights.values())
+        deadline = time.perf_counter() + args.warmup
+        await asyncio.gather(*(vu.run(ops, w, deadline) for vu in vus))
+
+        rec.enabled = True
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(vu.run(ops, w, deadline) for vu in vus))
+        elapsed = time.perf_counter() - started
+    finally:
+        for c in clients:
+            await c.aclose()
+    return summarize(rec, elapsed)
+
+
+async def main(args: argparse.Namespace) -> dict:
+    random.seed(args.seed)
+    run_id = uuid.uuid4().hex[:8]
+    started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    seed_t0 = time.perf_counter()
+    seeded = await seed(
+        run_id, args.users, args.accounts, args.categories, args.transactions
+    )
+    seed_s = time.perf_counter() - seed_t0
+    try:
+        if args.url:
+            result = await drive(None, args.url, seeded, args)
+        else:
+            from app.main import main_app
+
+            async with main_app.router.lifespan_context(main_app):
+                transport = httpx.ASGITransport(app=main_app)
+                result = await drive(transport, "http://load", seeded, args)
+    finally:
+        if not args.keep:
+            await cleanup(run_id)
+        await db_helper.dispose()
+    return {
+        "commit": git_commit(),
+        "started_at": started_at,
+        "target": args.url or "asgi",
+        "params": {
+            "users": args.users,
+            "accounts": args.accounts,
+            "categories": args.categories,
+            "transactions": args.transactions,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "mix": parse_mix(args.mix),
+            "seed": args.seed,
+        },
+        "seed_s": round(seed_s, 3),
+        **result,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--accounts", type=int, default=3, help="счетов на пользователя")
+    parser.add_argument(
+        "--categories", type=int, default=8, help="категорий на пользователя"
+    )
+    parser.add_argument(
+        "--transactions", type=int, default=2000, help="транзакций на пользователя"
+    )
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0, help="секунд замера")
+    parser.add_argument("--warmup", type=float, default=2.0, help="секунд прогрева")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="операция=вес,...")
+    parser.add_argument("--url", help="адрес запущенного приложения вместо ASGI")
+    parser.add_argument("--out", help="куда ещё записать JSON")
+    parser.add_argument("--seed", type=int, default=1, help="seed выбора операций")
+    parser.add_argument(
+        "--keep", action="store_true", help="не удалять засеянных пользователей"
+    )
+    args = parser.parse_args()
+    parse_mix(args.mix)
+    report = asyncio.run(main(args))
+    out = json.dumps(report, indent=2, ensure_ascii=False)
+    print(out)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(out + "\n")
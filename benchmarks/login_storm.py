@@ -0,0 +1,83 @@
+"""
+Задержка «посторонних» запросов во время шквала логинов: bcrypt прямо в
+event loop (как было) против пула PasswordHasher. Посторонний запрос —
+короткий SELECT в своей сессии раз в --probe-ms.
+
+    python -m benchmarks.login_storm --logins 40
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.core.security import PasswordHasherBusy, password_hasher, pwd
+from app.db import db_helper
+
+
+async def probe(stop: asyncio.Event, every: float, latencies: list[float]) -> None:
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        async with db_helper.session_factory() as session:
+            await session.execute(text("SELECT 1"))
+        latencies.append(time.perf_counter() - t0)
+        await asyncio.sleep(every)
+
+
+async def login(mode: str, hashed: str) -> bool:
+    if mode == "inline":
+        await asyncio.sleep(0)  # как ручка: перед bcrypt был await запроса в БД
+        return pwd.verify("password123", hashed)
+    try:
+        ok, _ = await password_hasher.verify_and_update("password123", hashed)
+        return ok
+    except PasswordHasherBusy:
+        return False
+
+
+async def run_mode(mode: str, logins: int, every: float, hashed: str) -> dict:
+    latencies: list[float] = []
+    stop = asyncio.Event()
+    task = asyncio.create_task(probe(stop, every, latencies))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login(mode, hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await task
+
+    q = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "probes": len(latencies),
+        "p50": q[49] * 1000,
+        "p99": q[98] * 1000,
+        "max": max(latencies) * 1000,
+        "ok": sum(results),
+        "elapsed": elapsed,
+    }
+
+
+async def main(logins: int, probe_ms: float) -> None:
+    hashed = pwd.hash("password123")
+    try:
+        # прогрев пула соединений и пула потоков
+        await run_mode("pool", 2, probe_ms / 1000, hashed)
+        for mode in ("inline", "pool"):
+            r = await run_mode(mode, logins, probe_ms / 1000, hashed)
+            print(
+                f"{mode:7} probes {r['probes']:4}   p50 {r['p50']:8.2f} ms"
+                f"   p99 {r['p99']:8.2f} ms   max {r['max']:8.2f} ms"
+                f"   logins ok {r['ok']}/{logins} in {r['elapsed']:.2f} s"
+            )
+    finally:
+        password_hasher.shutdown()
+        await db_helper.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--logins", type=int, default=40, help="одновременных логинов")
+    parser.add_argument("--probe-ms", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.probe_ms))
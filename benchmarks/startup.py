@@ -0,0 +1,160 @@
+"""
+Холодный старт воркера: время импорта app.main, время lifespan до
+готовности и задержка первых запросов после неё. Каждый прогон — новый
+процесс python, как при rolling deploy или автоскейлинге. Варианты:
+
+    create_all  — как было: Base.metadata.create_all на каждом старте
+    check       — сверка alembic_version с head миграций
+    warmup      — сверка и прогрев (соединения, ключи JWT, горячие запросы)
+
+Первые запросы — лента транзакций, счета, категории и бюджет месяца от
+засеянного пустого пользователя, через ASGITransport без сети. В конце —
+самые тяжёлые пакеты импорта app.main по `python -X importtime`.
+
+    python -m benchmarks.startup --runs 5
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+MODES = ("create_all", "check", "warmup")
+FIRST_REQUESTS = ("/transactions", "/accounts", "/categories", "/budgets/{month}")
+
+
+async def child(mode: str, user_id: int) -> dict:
+    t0 = time.perf_counter()
+    from app.main import main_app
+
+    imported = time.perf_counter() - t0
+
+    import httpx
+
+    from app.api.v1.auth_depends import ACCESS_COOKIE_NAME
+    from app.core.config import settings
+    from app.core.security import create_access_token
+    from app.db import Base, db_helper
+
+    settings.startup.schema_check = "off" if mode == "create_all" else "strict"
+    settings.startup.warmup = mode == "warmup"
+    out = {"import": imported}
+    t0 = time.perf_counter()
+    async with main_app.router.lifespan_context(main_app):
+        if mode == "create_all":
+            async with db_helper.engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+        out["startup"] = time.perf_counter() - t0
+
+        cookies = {ACCESS_COOKIE_NAME: create_access_token(str(user_id))}
+        month = time.strftime("%Y-%m")
+        transport = httpx.ASGITransport(app=main_app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", cookies=cookies
+        ) as client:
+            for path in FIRST_REQUESTS:
+                t0 = time.perf_counter()
+                res = await client.get(path.format(month=month))
+                res.raise_for_status()
+                out[path] = time.perf_counter() - t0
+            # тот же путь ещё раз — уровень прогретого воркера
+            t0 = time.perf_counter()
+            await client.get(FIRST_REQUESTS[0])
+            out["warm"] = time.perf_counter() - t0
+    return out
+
+
+def run_child(mode: str, user_id: int) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child", mode, str(user_id)],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def heaviest_imports(top: int) -> list[tuple[str, float]]:
+    """Пакеты по собственному времени импорта их модулей, мс."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    totals: dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        if not self_us.strip().isdigit():
+            continue  # заголовок
+        # self без вложенных импортов: суммы по пакетам не пересекаются
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0.0) + int(self_us) / 1000
+    return sorted(totals.items(), key=lambda kv: -kv[1])[:top]
+
+
+async def seed() -> int:
+    from app.core.models import User
+    from app.db import db_helper
+
+    async with db_helper.session_factory() as session:
+        user = User(
+            email=f"startup-{time.time_ns()}@bench.local",
+            password_hash="-",
+            name="bench",
+        )
+        session.add(user)
+        await session.commit()
+    await db_helper.dispose()
+    return user.id
+
+
+async def drop(user_id: int) -> None:
+    from sqlalchemy import text
+
+    from app.db import db_helper
+
+    async with db_helper.engine.begin() as conn:
+        await conn.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+    await db_helper.dispose()
+
+
+def main(runs: int) -> None:
+    user_id = asyncio.run(seed())
+    try:
+        results = {mode: [] for mode in MODES}
+        # варианты по очереди внутри прогона: дрейф машины делится поровну
+        for _ in range(runs):
+            for mode in MODES:
+                results[mode].append(run_child(mode, user_id))
+    finally:
+        asyncio.run(drop(user_id))
+
+    columns = ("import", "startup", *FIRST_REQUESTS, "warm")
+    print(f"{'ms, median':12}" + "".join(f"{c:>17}" for c in columns))
+    for mode, rows in results.items():
+        cells = (statistics.median(r[c] for r in rows) * 1000 for c in columns)
+        print(f"{mode:12}" + "".join(f"{v:17.1f}" for v in cells))
+
+    print("\nimport app.main, heaviest packages:")
+    for package, ms in heaviest_imports(10):
+        print(f"  {package:24} {ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="процессов на вариант")
+    parser.add_argument(
+        "--child", nargs=2, metavar=("MODE", "USER_ID"), help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+    if args.child:
+        mode, user_id = args.child
+        print(json.dumps(asyncio.run(child(mode, int(user_id)))))
+    else:
+        main(args.runs)
@@ -0,0 +1,91 @@
+"""
+Стоимость проверки access-токена на запрос: RS256 и EdDSA (Ed25519),
+с кэшем проверенных токенов и без; для сравнения — цена подписи (логин,
+refresh). Ключи генерируются во временный каталог, БД не нужна.
+
+    python -m benchmarks.token_verify -n 20000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+from app.core import security
+from app.core.config import settings
+
+
+def write_keys(directory: Path, algorithm: str) -> tuple[Path, Path]:
+    if algorithm == "EdDSA":
+        key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    priv, pub = directory / f"{algorithm}.pem", directory / f"{algorithm}.pub.pem"
+    priv.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    pub.write_bytes(
+        key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    )
+    return priv, pub
+
+
+def use_algorithm(algorithm: str, priv: Path, pub: Path) -> None:
+    settings.jwt.algorithm = algorithm
+    settings.jwt.private_key_path, settings.jwt.public_key_path = priv, pub
+    for f in (
+        security.load_private_key,
+        security.load_public_key,
+        security._signing_key,
+        security._verifying_key,
+    ):
+        f.cache_clear()
+    security.verified_tokens.clear()
+
+
+def run_mode(n: int, op) -> dict:
+    latencies: list[float] = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        op()
+        latencies.append(time.perf_counter() - t0)
+    q = statistics.quantiles(latencies, n=100)
+    return {"mean": statistics.fmean(latencies) * 1e6, "p99": q[98] * 1e6}
+
+
+def main(n: int) -> None:
+    cache_size = settings.jwt.verified_cache_size or 10_000
+    with tempfile.TemporaryDirectory() as tmp:
+        for algorithm in ("RS256", "EdDSA"):
+            use_algorithm(algorithm, *write_keys(Path(tmp), algorithm))
+            token = security.create_access_token("1")
+            modes = {
+                f"{algorithm} sign": lambda: security.create_access_token("1"),
+                f"{algorithm}": lambda: security.decode_token(token),
+                f"{algorithm} +cache": lambda: security.decode_token(token),
+            }
+            for mode, op in modes.items():
+                cached = mode.endswith("+cache")
+                security.verified_tokens.max_entries = cache_size if cached else 0
+                runs = n // 10 if mode.endswith("sign") else n
+                run_mode(min(runs, 200), op)
+                r = run_mode(runs, op)
+                print(f"{mode:14} mean {r['mean']:8.2f} us   p99 {r['p99']:8.2f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", type=int, default=20000, help="проверок на режим")
+    args = parser.parse_args()
+    main(args.n)
@@ -27,8 +27,12 @@ PUB="/app/app/certs/jwt-public.pem"
 if [ ! -f "$PRIV" ] || [ ! -f "$PUB" ]; then
   echo "Generating JWT key pair..."
   mkdir -p /app/app/certs
-  openssl genrsa -out "$PRIV" 2048 >/dev/null 2>&1
-  openssl rsa -in "$PRIV" -pubout -out "$PUB" >/dev/null 2>&1
+  if [ "${APP_CONFIG__JWT__ALGORITHM:-RS256}" = "EdDSA" ]; then
+    openssl genpkey -algorithm ed25519 -out "$PRIV" >/dev/null 2>&1
+  else
+    openssl genrsa -out "$PRIV" 2048 >/dev/null 2>&1
+  fi
+  openssl pkey -in "$PRIV" -pubout -out "$PUB" >/dev/null 2>&1
   chmod 600 "$PRIV" "$PUB"
 fi
 
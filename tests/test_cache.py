@@ -0,0 +1,136 @@
+"""LocalCache и VersionedCache без БД: LRU, TTL и инвалидация во время сборки."""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.core import cache as cache_module
+from app.core.cache import LocalCache, VersionedCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    async def run():
+        c = LocalCache(max_entries=2)
+        await c.set("a", 1)
+        await c.set("b", 2)
+        assert await c.get("a") == 1  # a свежее b
+        await c.set("c", 3)
+        return [await c.get(k) for k in "abc"], c.stats
+
+    values, stats = asyncio.run(run())
+    assert values == [1, None, 3]
+    assert stats.evictions == 1
+    assert (stats.hits, stats.misses) == (3, 1)
+
+
+def test_ttl_expiry(monkeypatch):
+    clock = _Clock()
+    fake_time = SimpleNamespace(monotonic=clock.monotonic)
+    monkeypatch.setattr(cache_module, "time", fake_time)
+
+    async def run():
+        c = LocalCache(ttl_s=10)
+        await c.set("k", "v")
+        clock.now += 9.9
+        fresh = await c.get("k")
+        clock.now += 0.2
+        return fresh, await c.get("k"), c.stats
+
+    fresh, expired, stats = asyncio.run(run())
+    assert (fresh, expired) == ("v", None)
+    assert stats.evictions == 1
+
+
+def test_invalidate_during_build_is_not_served():
+    """Запись, закоммиченная пока строился ответ: он ляжет под старую
+    версию, и следующий запрос соберёт ответ заново."""
+    cache = VersionedCache(LocalCache())
+    started, written = asyncio.Event(), asyncio.Event()
+    builds = []
+
+    async def slow_build():
+        builds.append("slow")
+        started.set()
+        await written.wait()
+        return "before write"
+
+    async def build():
+        builds.append("fresh")
+        return "after write"
+
+    async def run():
+        reader = asyncio.create_task(cache.get_or_build("user:1", "budget", slow_build))
+        await started.wait()
+        await cache.invalidate(["user:1"])
+        written.set()
+        raced = await reader
+        return raced, await cache.get_or_build("user:1", "budget", build)
+
+    assert asyncio.run(run()) == ("before write", "after write")
+    assert builds == ["slow", "fresh"]
+
+
+def test_hit_until_invalidated_other_scopes_kept():
+    cache = VersionedCache(LocalCache())
+    calls = []
+
+    async def build_for(scope):
+        calls.append(scope)
+        return f"v{len(calls)}"
+
+    async def run():
+        get = cache.get_or_build
+        first = await get("u1", "k", lambda: build_for("u1"))
+        await get("u2", "k", lambda: build_for("u2"))
+        hit = await get("u1", "k", lambda: build_for("u1"))
+        await cache.invalidate(["u1"])
+        rebuilt = await get("u1", "k", lambda: build_for("u1"))
+        other = await get("u2", "k", lambda: build_for("u2"))
+        return first, hit, rebuilt, other
+
+    assert asyncio.run(run()) == ("v1", "v1", "v3", "v2")
+    assert calls == ["u1", "u2", "u1"]
+
+
+def test_evicted_version_does_not_revive_old_entries():
+    backend = LocalCache(max_scopes=1)
+    cache = VersionedCache(backend)
+    calls = []
+
+    async def build():
+        calls.append(1)
+        return len(calls)
+
+    async def run():
+        before = await cache.get_or_build("u1", "k", build)
+        await cache.invalidate(["u1"])
+        # версию u1 вытесняет версия u2: u1 читает пол, а не исходную 0
+        await cache.invalidate(["u2"])
+        return before, await cache.get_or_build("u1", "k", build)
+
+    assert asyncio.run(run()) == (1, 2)
+
+
+def test_disabled_cache_and_none_are_not_stored():
+    calls = []
+
+    async def build():
+        calls.append(1)
+        return None if len(calls) < 3 else "v"
+
+    async def run():
+        off = VersionedCache(LocalCache(), enabled=False)
+        await off.get_or_build("u", "k", build)
+        on = VersionedCache(LocalCache())
+        await on.get_or_build("u", "k", build)
+        return await on.get_or_build("u", "k", build), off.stats.misses
+
+    assert asyncio.run(run()) == ("v", 0)
+    assert len(calls) == 3
@@ -0,0 +1,98 @@
+"""
+Компактор против прямого списания со строки accounts (fallback списания,
+create_fast со slots=0, delete без проверки остатка): списание, пришедшее
+между чтением баланса компактором и его UPDATE, не должно потеряться.
+
+Нужна база из настроек приложения (APP_CONFIG__DB__URL) со схемой head,
+без неё тест пропускается (tests/conftest.py).
+"""
+
+import asyncio
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import delete, select, update
+
+from app.core.config import LedgerConfig
+from app.core.models import Account, User
+from app.db import db_helper
+from app.db.repositories import ledger
+from app.db.types import AccountType
+
+pytestmark = pytest.mark.db
+
+CFG = LedgerConfig(enabled=True, slots=4, reserve_ratio=0.5)
+
+
+async def _seed() -> tuple[int, int]:
+    async with db_helper.session_factory() as session:
+        user = User(
+            email=f"compact-{uuid.uuid4().hex[:8]}@test.local",
+            password_hash="-",
+            name="compact",
+        )
+        session.add(user)
+        await session.flush()
+        account = Account(
+            user_id=user.id,
+            name="hot",
+            currency="RUB",
+            type=AccountType.card,
+            balance=Decimal("100.00"),
+        )
+        session.add(account)
+        await session.flush()
+        await ledger.put(session, {account.id: Decimal("50.00")}, CFG.slots)
+        await session.commit()
+        return user.id, account.id
+
+
+async def _balance(account_id: int) -> tuple[Decimal, Decimal]:
+    """(Account.balance, balance + несвёрнутые слоты)."""
+    async with db_helper.session_factory() as session:
+        row = await session.execute(
+            select(Account.balance, Account.balance + ledger.pending_delta()).where(
+                Account.id == account_id
+            )
+        )
+        return tuple(row.one())
+
+
+async def _race() -> tuple[tuple, tuple]:
+    user_id, account_id = await _seed()
+    try:
+        async with db_helper.session_factory() as debit:
+            async with db_helper.session_factory() as compactor:
+                # прямое списание держит строку счёта, пока компактор идёт
+                await debit.execute(
+                    update(Account)
+                    .where(Account.id == account_id)
+                    .values(balance=Account.balance - Decimal("30.00"))
+                )
+                compact = asyncio.create_task(ledger.compact(compactor, CFG))
+                await asyncio.sleep(0.5)
+                await debit.commit()
+                await asyncio.wait_for(compact, 10)
+                await compactor.commit()
+        raced = await _balance(account_id)
+
+        # следующий проход сворачивает пропущенный счёт
+        async with db_helper.session_factory() as session:
+            while await ledger.compact(session, CFG) == CFG.compact_batch:
+                pass
+            await session.commit()
+        return raced, await _balance(account_id)
+    finally:
+        async with db_helper.session_factory() as session:
+            await session.execute(delete(User).where(User.id == user_id))
+            await session.commit()
+        await db_helper.dispose()
+
+
+def test_compact_keeps_concurrent_debit():
+    raced, compacted = asyncio.run(_race())
+    # 100 + 50 в слоте - 30 списания
+    assert raced[1] == Decimal("120.00")
+    # половина остатка снова разложена по 4 слотам
+    assert compacted == (Decimal("60.00"), Decimal("120.00"))
@@ -0,0 +1,147 @@
+"""Разбор выписок без БД: знак и направление, форматы сумм и дат, OFX."""
+
+import io
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.db.types import ImportFormat
+from app.utils.statement_parser import (
+    StatementError,
+    _ofx_tokens,
+    guess_format,
+    iter_csv,
+    iter_ofx,
+)
+
+
+def _csv(text: str, default_account_id: int | None = 1) -> list:
+    return list(iter_csv(io.StringIO(text), default_account_id=default_account_id))
+
+
+def _one(amount: str, direction: str = "", occurred_at: str = "2025-08-10"):
+    text = f"occurred_at,amount,direction\n{occurred_at},{amount},{direction}\n"
+    (record,) = _csv(text)
+    return record
+
+
+@pytest.mark.parametrize(
+    ("amount", "direction", "expected"),
+    [
+        ("-10.50", "", ("outgoing", Decimal("10.50"))),
+        ("10.50", "", ("incoming", Decimal("10.50"))),
+        # явное направление важнее знака, сумма всегда по модулю
+        ("-3", "in", ("incoming", Decimal("3.00"))),
+        ("3", "OUT", ("outgoing", Decimal("3.00"))),
+        ("3", "outgoing", ("outgoing", Decimal("3.00"))),
+    ],
+)
+def test_direction_from_sign_or_column(amount, direction, expected):
+    record = _one(amount, direction)
+    assert (record.direction, record.amount) == expected
+
+
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [
+        ("1234.5", Decimal("1234.50")),
+        ('"1 234,56"', Decimal("1234.56")),
+        ("1 000", Decimal("1000.00")),
+        ("12.3", Decimal("12.30")),
+        ('"-7,1"', Decimal("7.10")),
+    ],
+)
+def test_amount_formats(raw, expected):
+    assert _one(raw).amount == expected
+
+
+@pytest.mark.parametrize("raw", ["abc", "0", "0,00", ""])
+def test_bad_amount_reports_line(raw):
+    with pytest.raises(StatementError) as e:
+        _csv(f"occurred_at,amount\n2025-08-10,1\n2025-08-11,{raw}\n")
+    assert e.value.line_no == 3
+
+
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [
+        ("2025-08-10T10:00:00Z", datetime(2025, 8, 10, 10, tzinfo=timezone.utc)),
+        ("2025-08-10 10:00:00", datetime(2025, 8, 10, 10, tzinfo=timezone.utc)),
+        ("2025-08-10", datetime(2025, 8, 10, tzinfo=timezone.utc)),
+        (
+            "2025-08-10T10:00:00+03:00",
+            datetime(2025, 8, 10, 7, tzinfo=timezone.utc),
+        ),
+    ],
+)
+def test_date_formats(raw, expected):
+    occurred_at = _one("1", occurred_at=raw).occurred_at
+    assert occurred_at.tzinfo is not None
+    assert occurred_at == expected
+
+
+def test_bad_date_and_direction():
+    with pytest.raises(StatementError, match="occurred_at"):
+        _one("1", occurred_at="10/08/2025")
+    with pytest.raises(StatementError, match="direction"):
+        _one("1", direction="sideways")
+
+
+def test_csv_columns_and_account():
+    with pytest.raises(StatementError, match="missing columns") as e:
+        _csv("date,amount\n2025-08-10,1\n")
+    assert e.value.line_no == 1
+    with pytest.raises(StatementError, match="account_id"):
+        _csv("occurred_at,amount\n2025-08-10,1\n", default_account_id=None)
+
+    (record,) = _csv(
+        "occurred_at,amount,account_id,category_id,note\n"
+        "2025-08-10,-1,5,9,  coffee  \n"
+    )
+    assert (record.account_id, record.category_id, record.note) == (5, 9, "coffee")
+
+
+OFX = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250810120000.000[-5:EST]
+<TRNAMT>-12.34<NAME>Cafe &amp; Bar<MEMO>latte
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250811<TRNAMT>1000,00</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+def test_ofx_records():
+    first, second = iter_ofx(io.StringIO(OFX), default_account_id=3)
+    assert first.direction == "outgoing"
+    assert first.amount == Decimal("12.34")
+    assert first.note == "Cafe & Bar latte"
+    assert first.occurred_at == datetime(
+        2025, 8, 10, 12, tzinfo=timezone(timedelta(hours=-5))
+    )
+    assert (second.direction, second.amount) == ("incoming", Decimal("1000.00"))
+    assert second.occurred_at == datetime(2025, 8, 11, tzinfo=timezone.utc)
+    assert {first.account_id, second.account_id} == {3}
+
+
+def test_ofx_tokens_across_reads():
+    # тег, разрезанный границей чтения, собирается целиком
+    assert list(_ofx_tokens(io.StringIO(OFX), read_size=7)) == list(
+        _ofx_tokens(io.StringIO(OFX))
+    )
+
+
+def test_ofx_requires_account_and_fields():
+    with pytest.raises(StatementError, match="account_id"):
+        list(iter_ofx(io.StringIO(OFX), default_account_id=None))
+    broken = "<STMTTRN><TRNAMT>1</STMTTRN>"
+    with pytest.raises(StatementError, match="DTPOSTED"):
+        list(iter_ofx(io.StringIO(broken), default_account_id=1))
+
+
+def test_guess_format():
+    assert guess_format("bank.OFX") == ImportFormat.ofx
+    assert guess_format("bank.qfx") == ImportFormat.ofx
+    assert guess_format("bank.csv") == ImportFormat.csv
+    assert guess_format(None) == ImportFormat.csv
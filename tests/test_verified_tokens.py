@@ -0,0 +1,63 @@
+"""Кэш проверенных токенов: срок жизни по exp и ограничение размера."""
+
+from types import SimpleNamespace
+
+from app.core import security
+from app.core.security import VerifiedTokens
+
+
+def _clock(monkeypatch, now: float) -> SimpleNamespace:
+    fake = SimpleNamespace(now=now)
+    fake.time = lambda: fake.now
+    monkeypatch.setattr(security, "time", fake)
+    return fake
+
+
+def test_entry_not_served_after_exp(monkeypatch):
+    clock = _clock(monkeypatch, 1000.0)
+    tokens = VerifiedTokens(max_entries=10)
+    tokens.put(b"t", {"sub": "1", "exp": 1060})
+
+    clock.now = 1059.9
+    assert tokens.get(b"t") == {"sub": "1", "exp": 1060}
+    clock.now = 1060
+    assert tokens.get(b"t") is None
+    # истёкшая запись удалена, а не просто скрыта
+    clock.now = 0
+    assert tokens.get(b"t") is None
+
+
+def test_size_bound_evicts_least_recently_used(monkeypatch):
+    _clock(monkeypatch, 1000.0)
+    tokens = VerifiedTokens(max_entries=3)
+    for i in range(3):
+        tokens.put(bytes([i]), {"sub": str(i), "exp": 2000})
+    assert tokens.get(bytes([0])) is not None  # 0 свежее 1 и 2
+
+    for i in range(3, 10):
+        tokens.put(bytes([i]), {"sub": str(i), "exp": 2000})
+        assert len(tokens._data) <= 3
+
+    assert [tokens.get(bytes([i])) is not None for i in (0, 1, 2)] == [False] * 3
+    assert all(tokens.get(bytes([i])) is not None for i in (7, 8, 9))
+
+
+def test_uncacheable_payloads(monkeypatch):
+    _clock(monkeypatch, 1000.0)
+    tokens = VerifiedTokens(max_entries=3)
+    tokens.put(b"no-exp", {"sub": "1"})
+    assert tokens.get(b"no-exp") is None
+
+    off = VerifiedTokens(max_entries=0)
+    off.put(b"t", {"sub": "1", "exp": 2000})
+    assert off.get(b"t") is None
+
+
+def test_returned_payload_is_a_copy(monkeypatch):
+    _clock(monkeypatch, 1000.0)
+    tokens = VerifiedTokens(max_entries=3)
+    payload = {"sub": "1", "exp": 2000}
+    tokens.put(b"t", payload)
+    payload["sub"] = "2"
+    tokens.get(b"t")["sub"] = "3"
+    assert tokens.get(b"t")["sub"] == "1"